@@ -0,0 +1,143 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from ..db.database import get_db
+from ..models.prompt import Prompt, PromptException
+from ..models.prompt_template import PromptTemplateException
+from ..models.result_rollup import ResultRollup
+from ..schemas.analytics import DuplicateCluster, ResultStatistics, VersionSimilarity
+from ..utils.analytics.rollups import rollup_statistics
+from ..settings.settings import settings
+from ..utils.similarity.duplicates import duplicate_clusters
+from ..utils.similarity.response_similarity import compare_prompt_versions
+from typing import List, Optional
+from datetime import datetime, time
+import sqlalchemy
+import uuid
+
+router = APIRouter()
+
+
+def _result_filters(created_after: Optional[datetime], created_before: Optional[datetime]) -> list:
+    """Date filters on the daily rollups; bounds are rounded out to whole days."""
+    filters = []
+    if created_after is not None:
+        filters.append(ResultRollup.day >= created_after.date())
+    if created_before is not None:
+        if created_before.time() == time.min:
+            filters.append(ResultRollup.day < created_before.date())
+        else:
+            filters.append(ResultRollup.day <= created_before.date())
+    return filters
+
+
+@router.get("/prompt-template/{template_id}/analytics", response_model=List[ResultStatistics])
+def read_prompt_template_analytics(
+    template_id: str,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    """Result statistics of every version of a prompt template, per version and LLM."""
+    try:
+        try:
+            template_uuid = uuid.UUID(template_id)
+        except ValueError:
+            raise PromptTemplateException(status_code=400, error_key="INVALID_PROMPT_TEMPLATE_ID_FORMAT")
+
+        return rollup_statistics(
+            db,
+            [Prompt.prompt_template_id == template_uuid, *_result_filters(created_after, created_before)],
+        )
+    except PromptTemplateException as pte:
+        raise pte
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        raise PromptTemplateException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
+
+
+@router.get("/prompt/{prompt_id}/analytics", response_model=List[ResultStatistics])
+def read_prompt_analytics(
+    prompt_id: str,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    """Result statistics of one prompt version, per LLM."""
+    try:
+        try:
+            prompt_uuid = uuid.UUID(prompt_id)
+        except ValueError:
+            raise PromptException(status_code=400, error_key="INVALID_PROMPT_ID_FORMAT")
+
+        return rollup_statistics(
+            db,
+            [ResultRollup.prompt_id == prompt_uuid, *_result_filters(created_after, created_before)],
+        )
+    except PromptException as pe:
+        raise pe
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        raise PromptException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
+
+
+@router.get("/prompt-template/{template_id}/similarity", response_model=List[VersionSimilarity], response_model_exclude_none=True)
+def read_prompt_template_similarity(
+    template_id: str,
+    prompt_ids: Optional[List[str]] = Query(None),
+    include_inputs: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    How much the responses of a template's versions differ on the same inputs.
+
+    Compares every pair of the given versions, or of all versions of the
+    template, with per-input scores when `include_inputs` is set.
+    """
+    try:
+        try:
+            template_uuid = uuid.UUID(template_id)
+        except ValueError:
+            raise PromptTemplateException(status_code=400, error_key="INVALID_PROMPT_TEMPLATE_ID_FORMAT")
+
+        query = db.query(Prompt).filter(Prompt.prompt_template_id == template_uuid)
+        if prompt_ids:
+            try:
+                prompt_uuids = {uuid.UUID(prompt_id) for prompt_id in prompt_ids}
+            except ValueError:
+                raise PromptException(status_code=400, error_key="INVALID_PROMPT_ID_FORMAT")
+            query = query.filter(Prompt.id.in_(prompt_uuids))
+        prompts = query.all()
+        if len(prompts) < 2:
+            raise PromptException(status_code=400, error_key="NOT_ENOUGH_PROMPT_VERSIONS")
+
+        return compare_prompt_versions(db, prompts, include_inputs)
+    except (PromptTemplateException, PromptException) as e:
+        raise e
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        raise PromptTemplateException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
+
+
+@router.get("/prompt-template/{template_id}/duplicates", response_model=List[DuplicateCluster])
+def read_prompt_template_duplicates(
+    template_id: str,
+    threshold: Optional[float] = Query(None, ge=0.0, le=1.0),
+    db: Session = Depends(get_db),
+):
+    """
+    Clusters of near-duplicate responses across a template's versions and inputs.
+
+    A cluster spanning several prompts means those versions answer alike; one
+    spanning several inputs points at a prompt giving the same answer to
+    everything.
+    """
+    try:
+        try:
+            template_uuid = uuid.UUID(template_id)
+        except ValueError:
+            raise PromptTemplateException(status_code=400, error_key="INVALID_PROMPT_TEMPLATE_ID_FORMAT")
+
+        return duplicate_clusters(
+            db, template_uuid, settings.DUPLICATE_THRESHOLD if threshold is None else threshold
+        )
+    except PromptTemplateException as pte:
+        raise pte
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        raise PromptTemplateException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
@@ -0,0 +1,230 @@
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from ..db.database import get_db
+from ..db.bulk import bulk_insert
+from ..models.dataset import Dataset, DatasetItem, DatasetRun, DatasetException
+from ..models.prompt import Prompt
+from ..models.test import Test, test_prompt_association
+from ..models.test_job import TestJob
+from ..schemas.dataset import DatasetResponse, DatasetRunCreate, DatasetRunResponse
+from ..settings.settings import settings
+from ..utils.datasets.upload import DatasetFileError, DatasetRecords, MultipartFile, detect_format
+from ..utils.jobs.queue import enqueue
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from datetime import datetime
+import sqlalchemy
+import uuid
+
+router = APIRouter()
+
+
+def _get_dataset(db: Session, dataset_id: str) -> Dataset:
+    try:
+        dataset_uuid = uuid.UUID(dataset_id)
+    except ValueError:
+        raise DatasetException(status_code=400, error_key="INVALID_DATASET_ID_FORMAT")
+
+    dataset = db.query(Dataset).filter(Dataset.id == dataset_uuid).first()
+    if dataset is None:
+        raise DatasetException(status_code=404, error_key="DATASET_NOT_FOUND")
+    return dataset
+
+
+def _run_response(db: Session, dataset_run: DatasetRun, job: TestJob) -> DatasetRunResponse:
+    failed = (
+        db.query(func.count())
+        .select_from(test_prompt_association)
+        .join(Test, Test.id == test_prompt_association.c.test_id)
+        .filter(Test.dataset_run_id == dataset_run.id, test_prompt_association.c.error.isnot(None))
+        .scalar()
+    )
+    return DatasetRunResponse(
+        id=dataset_run.id,
+        dataset_id=dataset_run.dataset_id,
+        name=dataset_run.name,
+        prompt_ids=dataset_run.prompt_ids,
+        creation_date=dataset_run.creation_date,
+        job_id=job.id,
+        status=job.status,
+        total=job.total,
+        completed=job.completed,
+        failed=failed,
+        attempts=job.attempts,
+        error=job.error,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+@router.post("/datasets", response_model=DatasetResponse)
+async def upload_dataset(
+    request: Request,
+    name: Optional[str] = None,
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Upload a CSV or JSONL file of test inputs as the `file` field of a
+    multipart form.
+
+    The body is parsed as it streams in and items are inserted
+    DATASET_UPLOAD_BATCH_SIZE at a time, so the file is never held in memory.
+    The format is taken from `format` or the file extension. Records have a
+    `user_input` and, optionally, an `expected_answer` and `expected_pattern`.
+    """
+    try:
+        try:
+            upload = MultipartFile(request.headers.get("content-type", ""))
+            dataset = None
+            records = None
+            items = []
+
+            async def store():
+                rows = [
+                    {"id": uuid.uuid4(), "dataset_id": dataset.id, "position": dataset.item_count + offset, **item}
+                    for offset, item in enumerate(items)
+                ]
+                await run_in_threadpool(bulk_insert, db, DatasetItem.__table__, rows)
+                dataset.item_count += len(rows)
+                items.clear()
+
+            async def start():
+                dataset_format = detect_format(format, upload.filename)
+                new_dataset = Dataset(name=name or upload.filename or "dataset", format=dataset_format, item_count=0)
+                db.add(new_dataset)
+                await run_in_threadpool(db.flush)
+                return new_dataset, DatasetRecords(dataset_format)
+
+            async for data in upload.chunks(request.stream()):
+                if records is None:
+                    dataset, records = await start()
+                items.extend(records.feed(data))
+                if len(items) >= settings.DATASET_UPLOAD_BATCH_SIZE:
+                    await store()
+            if records is None:
+                dataset, records = await start()
+            items.extend(records.close())
+            if items:
+                await store()
+        except DatasetFileError as e:
+            raise DatasetException(status_code=400, error_key="INVALID_DATASET_FILE", detail=str(e))
+
+        if dataset.item_count == 0:
+            raise DatasetException(status_code=400, error_key="DATASET_EMPTY")
+        if name is None and upload.fields.get("name"):
+            dataset.name = upload.fields["name"]
+        await run_in_threadpool(db.commit)
+        return DatasetResponse.from_orm(dataset)
+    except DatasetException as de:
+        db.rollback()
+        raise de
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        db.rollback()
+        raise DatasetException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
+
+
+@router.get("/datasets", response_model=List[DatasetResponse])
+def list_datasets(db: Session = Depends(get_db)):
+    try:
+        datasets = db.query(Dataset).order_by(Dataset.creation_date.desc()).all()
+        return [DatasetResponse.from_orm(dataset) for dataset in datasets]
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        raise DatasetException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
+
+
+@router.get("/datasets/{dataset_id}", response_model=DatasetResponse)
+def read_dataset(dataset_id: str, db: Session = Depends(get_db)):
+    try:
+        return DatasetResponse.from_orm(_get_dataset(db, dataset_id))
+    except DatasetException as de:
+        raise de
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        raise DatasetException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
+
+
+@router.post("/datasets/{dataset_id}/runs", response_model=DatasetRunResponse, status_code=202)
+def create_dataset_run(dataset_id: str, run: DatasetRunCreate, db: Session = Depends(get_db)):
+    """
+    Queue a run of every dataset item against every given prompt, as one job
+    for the background workers, and return it right away.
+
+    Each item becomes a test of the run, inserted in bulk here; the run's
+    progress and failures are reported by GET /dataset-runs/{run_id}.
+    """
+    try:
+        dataset = _get_dataset(db, dataset_id)
+        prompt_ids = list(dict.fromkeys(run.prompt_ids))
+        prompt_count = db.query(Prompt).filter(Prompt.id.in_(prompt_ids)).count()
+        if not prompt_ids or prompt_count != len(prompt_ids):
+            raise DatasetException(status_code=400, error_key="INVALID_PROMPT_IDS")
+
+        dataset_run = DatasetRun(
+            dataset_id=dataset.id,
+            name=run.name or dataset.name,
+            prompt_ids=[str(prompt_id) for prompt_id in prompt_ids],
+        )
+        db.add(dataset_run)
+        db.flush()
+
+        creation_date = datetime.utcnow()
+        batch_size = settings.DATASET_UPLOAD_BATCH_SIZE
+        for start in range(0, dataset.item_count, batch_size):
+            items = (
+                db.query(DatasetItem.position, DatasetItem.user_input, DatasetItem.expected_answer, DatasetItem.expected_pattern)
+                .filter(
+                    DatasetItem.dataset_id == dataset.id,
+                    DatasetItem.position >= start,
+                    DatasetItem.position < start + batch_size,
+                )
+                .order_by(DatasetItem.position)
+                .all()
+            )
+            bulk_insert(db, Test.__table__, [
+                {
+                    "id": uuid.uuid4(),
+                    "test_name": f"{dataset_run.name} #{item.position + 1}",
+                    "user_input": item.user_input,
+                    "expected_answer": item.expected_answer,
+                    "expected_pattern": item.expected_pattern,
+                    "dataset_run_id": dataset_run.id,
+                    "creation_date": creation_date,
+                }
+                for item in items
+            ])
+
+        job = enqueue(
+            db, None, "dataset",
+            {"prompt_ids": dataset_run.prompt_ids, "stream": bool(run.stream), "use_cache": run.use_cache},
+            total=dataset.item_count * len(prompt_ids),
+            dataset_run=dataset_run,
+        )
+        db.commit()
+        return _run_response(db, dataset_run, job)
+    except DatasetException as de:
+        db.rollback()
+        raise de
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        db.rollback()
+        raise DatasetException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
+
+
+@router.get("/dataset-runs/{run_id}", response_model=DatasetRunResponse)
+def read_dataset_run(run_id: str, db: Session = Depends(get_db)):
+    """Status and progress of a dataset run; `completed` counts results stored so far."""
+    try:
+        try:
+            run_uuid = uuid.UUID(run_id)
+        except ValueError:
+            raise DatasetException(status_code=400, error_key="INVALID_DATASET_RUN_ID_FORMAT")
+
+        dataset_run = db.query(DatasetRun).filter(DatasetRun.id == run_uuid).first()
+        if dataset_run is None:
+            raise DatasetException(status_code=404, error_key="DATASET_RUN_NOT_FOUND")
+        job = db.query(TestJob).filter(TestJob.dataset_run_id == dataset_run.id).one()
+        return _run_response(db, dataset_run, job)
+    except DatasetException as de:
+        raise de
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        raise DatasetException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
@@ -0,0 +1,106 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session
+from ..db.database import get_db
+from ..models.test import TestException
+from ..utils.blobs.blob_store import image_store
+from typing import Optional, Tuple
+import os
+import re
+
+router = APIRouter()
+
+IMAGE_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Content-addressed, so a URL always serves the same bytes
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+CHUNK_SIZE = 64 * 1024
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single byte range.
+
+    Returns None when the whole file should be sent: no header, a malformed one,
+    or several ranges. Raises ValueError when the range can't be satisfied.
+    """
+    if not range_header:
+        return None
+    match = RANGE_PATTERN.match(range_header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix_length = int(last)
+        if suffix_length == 0:
+            raise ValueError(range_header)
+        return max(size - suffix_length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(range_header)
+    return start, end
+
+
+def _read_file(path: str, start: int, length: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@router.get("/images/{image_hash}", name="read_image")
+def read_image(image_hash: str, request: Request, db: Session = Depends(get_db)):
+    if not IMAGE_HASH_PATTERN.match(image_hash):
+        raise TestException(status_code=400, error_key="INVALID_IMAGE_HASH")
+
+    blob = image_store.get(db, image_hash)
+    path = image_store.blobs.path(image_hash)
+    if blob is None or not os.path.isfile(path):
+        raise TestException(status_code=404, error_key="IMAGE_NOT_FOUND")
+
+    etag = f'"{image_hash}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMAGE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    size = blob.size
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = _parse_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        (start, end), status_code = byte_range, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    length = end - start + 1
+    headers["Content-Length"] = str(length)
+
+    return StreamingResponse(
+        _read_file(path, start, length),
+        status_code=status_code,
+        media_type=blob.content_type or "application/octet-stream",
+        headers=headers,
+    )
@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from ..db.database import get_db
 from ..models.llm import LLM, LLMException
 from ..schemas.llm import LLMCreate, LLMResponse, LLMUpdate, ConversationInput
 import sqlalchemy
 from ..exceptions.error_messages import ErrorMessages
-from typing import List
+from typing import List, Optional
 import uuid
-import boto3
 from ..schemas.llm import ImageConversationInput
+from ..utils.llm.client_pool import bedrock_clients
+from ..utils.llm.rate_limiter import rate_limiters
+from ..utils.llm.config_cache import llm_configs
+from ..utils.llm.coalescer import converse_coalescer
+from ..utils.llm import invoker
+from ..utils.llm.response_cache import response_cache, request_key, is_cache_enabled
+from ..utils.pagination.pagination import NEXT_CURSOR_HEADER, decode_cursor, keyset_page, page_size
+from starlette.concurrency import run_in_threadpool
 from botocore.exceptions import ClientError
 import json
 
@@ -33,6 +41,7 @@ def create_llm(llm: LLMCreate, db: Session = Depends(get_db)):
         db.add(db_llm)
         db.commit()
         db.refresh(db_llm)
+        llm_configs.put(db_llm)
         
         return LLMResponse.from_orm(db_llm)
         
@@ -109,6 +118,10 @@ def update_llm(llm_id: str, llm: LLMUpdate, db: Session = Depends(get_db)):
                 error_key="LLM_NOT_FOUND"
             )
 
+        # Clients and configs built from the old credentials must not be reused
+        bedrock_clients.invalidate(db_llm)
+        llm_configs.invalidate(db_llm.id)
+
         # Update LLM fields
         for key, value in llm.dict(exclude_unset=True).items():
             setattr(db_llm, key, value)
@@ -116,6 +129,7 @@ def update_llm(llm_id: str, llm: LLMUpdate, db: Session = Depends(get_db)):
         try:
             db.commit()
             db.refresh(db_llm)
+            llm_configs.put(db_llm)
         except sqlalchemy.exc.IntegrityError as e:
             db.rollback()
             raise LLMException(
@@ -142,11 +156,34 @@ def update_llm(llm_id: str, llm: LLMUpdate, db: Session = Depends(get_db)):
         )
 
 @router.get("/llms", response_model=List[LLMResponse])
-def list_llms(db: Session = Depends(get_db)):
+def list_llms(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    name: Optional[str] = None,
+    llm_model_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """LLMs, newest first, one page at a time; X-Next-Cursor points to the next page."""
     try:
-        llms = db.query(LLM).all()
-        
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise LLMException(status_code=400, error_key="INVALID_CURSOR")
+
+        query = db.query(LLM)
+        if name is not None:
+            query = query.filter(LLM.name.ilike(f"%{name}%"))
+        if llm_model_id is not None:
+            query = query.filter(LLM.llm_model_id == llm_model_id)
+
+        llms, next_cursor = keyset_page(query, LLM.creation_date, LLM.id, position, page_size(limit))
+        if next_cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
         return [LLMResponse.from_orm(llm) for llm in llms]
+    except LLMException as le:
+        raise le
     except sqlalchemy.exc.SQLAlchemyError as e:
         raise LLMException(status_code=500, error_key="DATABASE_ERROR")
     except Exception as e:
@@ -157,6 +194,15 @@ def list_llms(db: Session = Depends(get_db)):
         )
 
 
+@router.get("/llms/invocation-stats", response_model=dict)
+def read_invocation_stats():
+    """
+    Counts of Converse calls sent to Bedrock and of identical requests that
+    were coalesced onto a call already in flight, since the worker started.
+    """
+    return converse_coalescer.stats()
+
+
 @router.delete("/llm/{llm_id}", response_model=dict)
 def delete_llm(llm_id: str, db: Session = Depends(get_db)):
     try:
@@ -179,8 +225,11 @@ def delete_llm(llm_id: str, db: Session = Depends(get_db)):
             )
 
         # Delete LLM
+        bedrock_clients.invalidate(db_llm)
+        rate_limiters.invalidate(db_llm.id)
         db.delete(db_llm)
         db.commit()
+        llm_configs.invalidate(uuid_obj)
 
         return {"message": "LLM Deleted Successfully"}
         
@@ -205,42 +254,35 @@ async def converse_with_llm(
     conversation_input: ConversationInput, db: Session = Depends(get_db)
 ):
     try:
-        llm = db.query(LLM).filter(LLM.id == conversation_input.llm_id).first()
+        llm = await run_in_threadpool(llm_configs.get, db, conversation_input.llm_id)
 
         if llm is None:
             raise LLMException(status_code=404, error_key="LLM_NOT_FOUND")
-        
-        
-        bedrock = boto3.client(
-            aws_access_key_id=llm.access_key,
-            aws_secret_access_key=llm.secret_access_key,
-            service_name="bedrock-runtime",
-            region_name=llm.aws_region,
+
+        request = invoker.build_text_request(llm, conversation_input)
+        use_cache = is_cache_enabled(
+            conversation_input.use_cache, conversation_input.temperature
         )
+        if use_cache:
+            cache_key = request_key(request)
+            cached = await run_in_threadpool(response_cache.get, db, cache_key)
+            if cached is not None:
+                return {"response": cached, "cache_hit": True}
 
-        try:            
-            response = bedrock.converse(
-                modelId=llm.llm_model_id,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [{"text": conversation_input.user_input}],
-                    }
-                ],
-                system=[{"text": conversation_input.prompt}],
-                inferenceConfig={
-                    "temperature": conversation_input.temperature,
-                    "maxTokens": conversation_input.max_tokens,
-                    "topP": conversation_input.top_p
-                },
-            )
-            print("response: ",response)
-            return {"response": response}
+        try:
+            response = await invoker.converse(llm, request)
         except Exception as e:
             raise LLMException(
                 status_code=500,
                 error_key="CONVERSATION_ERROR",
             )
+
+        if use_cache:
+            def store():
+                response_cache.put(db, cache_key, llm.llm_model_id, response)
+                db.commit()
+            await run_in_threadpool(store)
+        return {"response": response, "cache_hit": False}
     
     except LLMException as le:
         raise le
@@ -251,6 +293,50 @@ async def converse_with_llm(
         )
 
 
+@router.post("/llm/converse-stream")
+async def converse_with_llm_stream(
+    conversation_input: ConversationInput, db: Session = Depends(get_db)
+):
+    """
+    Streams the completion back as server-sent events while it is generated.
+
+    Emits a `token` event per text delta and a final `metrics` event carrying
+    usage, latency, time to first token and tokens per second.
+    """
+    llm = await run_in_threadpool(llm_configs.get, db, conversation_input.llm_id)
+    if llm is None:
+        raise LLMException(status_code=404, error_key="LLM_NOT_FOUND")
+
+    request = invoker.build_text_request(llm, conversation_input)
+
+    def sse(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    async def event_stream():
+        timer = invoker.StreamTimer()
+        try:
+            async for event in invoker.converse_stream(llm, request, timer):
+                text = event.get("contentBlockDelta", {}).get("delta", {}).get("text")
+                if text:
+                    yield sse("token", {"text": text})
+            yield sse("metrics", {
+                "usage": timer.usage,
+                "stopReason": timer.stop_reason,
+                **timer.summary(),
+            })
+        except Exception as e:
+            yield sse("error", {
+                "error_key": "CONVERSATION_ERROR",
+                "message": ErrorMessages.CONVERSATION_ERROR,
+            })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/llm/converse-image", response_model=dict)
 async def converse_with_llm_image(
     conversation_input: ImageConversationInput,
@@ -261,43 +347,16 @@ async def converse_with_llm_image(
     """
 
     try:
-        llm = db.query(LLM).filter(LLM.id == conversation_input.llm_id).first()
+        llm = await run_in_threadpool(llm_configs.get, db, conversation_input.llm_id)
         if llm is None:
             raise LLMException(status_code=404, error_key="LLM_NOT_FOUND")
 
-        bedrock = boto3.client(
-            aws_access_key_id=llm.access_key,
-            aws_secret_access_key=llm.secret_access_key,
-            service_name="bedrock-runtime",
-            region_name=llm.aws_region,
-        )
-
-        if conversation_input.image is None:
+        if not conversation_input.image:
             raise LLMException(status_code=400, error_key="NO_IMAGE_PROVIDED")
 
-        image_content = conversation_input.image  # .read()
-
-        if not image_content:
-            raise LLMException(status_code=400, error_key="NO_IMAGE_PROVIDED")
-
-        message = {
-            "role": "user",
-            "content": [
-                {"text": conversation_input.prompt},
-                {"image": {"format": "jpeg", "source": {"bytes": image_content}}},
-            ],
-        }
-
         try:
-            response = bedrock.converse(
-                modelId=llm.llm_model_id,
-                messages=[message],
-                # system=[{"text": conversation_input.prompt}],
-                inferenceConfig={
-                    "temperature": conversation_input.temperature,
-                    "maxTokens": conversation_input.max_tokens,
-                    "topP": conversation_input.top_p,
-                },
+            response = await invoker.converse(
+                llm, invoker.build_image_request(llm, conversation_input)
             )
         except Exception as e:
             raise LLMException(
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from ..db.database import get_db
 from ..models.project import Project, ProjectException
@@ -6,11 +6,13 @@ from ..models.prompt_template import PromptTemplate
 from ..schemas.project import ProjectCreate, ProjectResponse, ProjectUpdate
 import sqlalchemy
 from ..exceptions.error_messages import ErrorMessages
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 import uuid
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from ..utils.logger.logger import logger
+from ..utils.pagination.pagination import NEXT_CURSOR_HEADER, decode_cursor, keyset_page, page_size
 
 router = APIRouter()
 
@@ -149,9 +151,35 @@ def update_project(
         )
 
 @router.get("/projects", response_model=List[ProjectResponse])
-def list_projects(db: Session = Depends(get_db)):
+def list_projects(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    name: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    """Projects, newest first, one page at a time; X-Next-Cursor points to the next page."""
     try:
-        projects = db.query(Project).order_by(Project.creation_date.desc()).all()
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise ProjectException(status_code=400, error_key="INVALID_CURSOR")
+
+        query = db.query(Project)
+        if name is not None:
+            query = query.filter(Project.name.ilike(f"%{name}%"))
+        if created_after is not None:
+            query = query.filter(Project.creation_date >= created_after)
+        if created_before is not None:
+            query = query.filter(Project.creation_date < created_before)
+
+        projects, next_cursor = keyset_page(
+            query, Project.creation_date, Project.id, position, page_size(limit)
+        )
+        if next_cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
         return [
             {
@@ -163,6 +191,8 @@ def list_projects(db: Session = Depends(get_db)):
             }
             for project in projects
         ]
+    except ProjectException as pe:
+        raise pe
     except SQLAlchemyError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     except Exception as e:
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from ..db.database import get_db
 from ..models.prompt_template import PromptTemplate, PromptTemplateException
 from ..schemas.prompt_template import PromptTemplateCreate, PromptTemplateResponse, PromptTemplateUpdate
 import sqlalchemy
 from ..exceptions.error_messages import ErrorMessages
-from typing import List
+from typing import List, Optional
 import uuid
+from datetime import datetime
+from ..utils.pagination.pagination import NEXT_CURSOR_HEADER, decode_cursor, keyset_page, page_size
 
 router = APIRouter()
 
@@ -158,8 +160,15 @@ def update_prompt_template(
 @router.get("/prompt-templates/{project_id}", response_model=List[PromptTemplateResponse])
 def list_prompt_templates(
     project_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    name: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
     db: Session = Depends(get_db)
 ):
+    """Prompt templates of a project, newest first, one page at a time; X-Next-Cursor points to the next page."""
     try:
         # Validate project_id is a valid UUID
         try:
@@ -169,14 +178,25 @@ def list_prompt_templates(
                 status_code=400, 
                 error_key="INVALID_PROJECT_ID_FORMAT"
             )
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise PromptTemplateException(status_code=400, error_key="INVALID_CURSOR")
         
         # Query templates with validated UUID
-        templates = db.query(PromptTemplate).filter(
-            PromptTemplate.project_id == project_uuid
-        ).all()
-        
-        if not templates:
-            return []
+        query = db.query(PromptTemplate).filter(PromptTemplate.project_id == project_uuid)
+        if name is not None:
+            query = query.filter(PromptTemplate.name.ilike(f"%{name}%"))
+        if created_after is not None:
+            query = query.filter(PromptTemplate.creation_date >= created_after)
+        if created_before is not None:
+            query = query.filter(PromptTemplate.creation_date < created_before)
+
+        templates, next_cursor = keyset_page(
+            query, PromptTemplate.creation_date, PromptTemplate.id, position, page_size(limit)
+        )
+        if next_cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
         
         return [PromptTemplateResponse.from_orm(template) for template in templates]
         
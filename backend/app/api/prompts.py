@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from ..db.database import get_db
 from ..models.prompt import Prompt, PromptException
@@ -7,14 +7,24 @@ from ..models.llm import LLM
 from ..schemas.prompt import PromptCreate, PromptResponse, PromptUpdate
 import sqlalchemy
 from ..exceptions.error_messages import ErrorMessages
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 import uuid
 from sqlalchemy import func
 from ..models.test import test_prompt_association
 from uuid import UUID
+from ..utils.tokenizer.tokenizer import count_tokens
+from ..utils.llm.config_cache import llm_configs
+from ..utils.pagination.pagination import NEXT_CURSOR_HEADER, decode_cursor, keyset_order, keyset_page, page_size
+from ..utils.streaming.ndjson import stream_ndjson, wants_ndjson
 
 router = APIRouter()
 
+def _count_prompt_tokens(db: Session, text: str, llm_id) -> Optional[int]:
+    """Count the tokens of a prompt with the tokenizer of the model it runs on."""
+    llm = llm_configs.get(db, uuid.UUID(str(llm_id))) if llm_id is not None else None
+    return count_tokens(text, llm.llm_model_id if llm else None)
+
 @router.post("/prompt", response_model=PromptResponse)
 def create_prompt(prompt: PromptCreate, db: Session = Depends(get_db)):
     try:
@@ -22,7 +32,7 @@ def create_prompt(prompt: PromptCreate, db: Session = Depends(get_db)):
         if existing_prompt:
             raise PromptException(status_code=400, error_key="PROMPT_NAME_EXISTS")
 
-        db_prompt = Prompt(**prompt.dict())
+        db_prompt = Prompt(**prompt.dict(), prompt_tokens=_count_prompt_tokens(db, prompt.prompt, prompt.llm_id))
         db.add(db_prompt)
         db.commit()
         db.refresh(db_prompt)
@@ -109,12 +119,15 @@ def update_prompt(prompt_id: str, prompt: PromptUpdate, db: Session = Depends(ge
                 Prompt.prompt_template_id == db_prompt.prompt_template_id
             ).scalar() or 0
             
+            new_prompt_text = prompt.prompt if prompt.prompt is not None else db_prompt.prompt
+            new_llm_id = prompt.llm_id if prompt.llm_id is not None else db_prompt.llm_id
             new_prompt = Prompt(
                 name=f"{db_prompt.name}_v_{max_version + 1:.1f}",
-                prompt=prompt.prompt if prompt.prompt is not None else db_prompt.prompt,
+                prompt=new_prompt_text,
+                prompt_tokens=_count_prompt_tokens(db, new_prompt_text, new_llm_id),
                 notes=prompt.notes if prompt.notes is not None else db_prompt.notes,
                 version=max_version + 1,
-                llm_id=prompt.llm_id if prompt.llm_id is not None else db_prompt.llm_id,
+                llm_id=new_llm_id,
                 prompt_template_id=db_prompt.prompt_template_id
             )
             db.add(new_prompt)
@@ -149,21 +162,73 @@ def update_prompt(prompt_id: str, prompt: PromptUpdate, db: Session = Depends(ge
             detail=f"{ErrorMessages.UNEXPECTED_ERROR}: {str(e)}",
         )
              
+def _prompt_response(row) -> PromptResponse:
+    prompt, llm_model_name = row
+    prompt.llm_model_name = llm_model_name
+    return PromptResponse.from_orm(prompt)
+
+
 @router.get("/prompts/{prompt_template_id}", response_model=List[PromptResponse])
-def list_prompts(prompt_template_id: str, db: Session = Depends(get_db)):
+def list_prompts(
+    prompt_template_id: str,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    min_version: Optional[float] = None,
+    max_version: Optional[float] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Prompt versions of a template, newest first, one page at a time; X-Next-Cursor points to the next page.
+
+    With `Accept: application/x-ndjson` every matching version is streamed instead, one per line.
+    """
     try:
         # Validate UUID format
         try:
             prompt_template_uuid = uuid.UUID(prompt_template_id)
         except ValueError:
             raise PromptException(status_code=400, error_key="INVALID_PROMPT_TEMPLATE_ID_FORMAT")
-        
-        prompts = db.query(Prompt).filter(Prompt.prompt_template_id == prompt_template_uuid).all()
-        for prompt in prompts:
-            llm = db.query(LLM).filter(LLM.id == prompt.llm_id).first()
-            prompt.llm_model_name = llm.name if llm else None
-                        
-        return [PromptResponse.from_orm(prompt) for prompt in prompts]
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise PromptException(status_code=400, error_key="INVALID_CURSOR")
+
+        query = (
+            db.query(Prompt, LLM.name)
+            .outerjoin(LLM, LLM.id == Prompt.llm_id)
+            .filter(Prompt.prompt_template_id == prompt_template_uuid)
+        )
+        if min_version is not None:
+            query = query.filter(Prompt.version >= min_version)
+        if max_version is not None:
+            query = query.filter(Prompt.version <= max_version)
+        if created_after is not None:
+            query = query.filter(Prompt.creation_date >= created_after)
+        if created_before is not None:
+            query = query.filter(Prompt.creation_date < created_before)
+
+        if wants_ndjson(request):
+            query = keyset_order(query, Prompt.creation_date, Prompt.id, position)
+            return stream_ndjson(db, query, lambda row: _prompt_response(row).model_dump_json())
+
+        rows, next_cursor = keyset_page(
+            query,
+            Prompt.creation_date,
+            Prompt.id,
+            position,
+            page_size(limit),
+            key=lambda row: (row.Prompt.creation_date, row.Prompt.id),
+        )
+        if next_cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+        return [_prompt_response(row) for row in rows]
+    except PromptException as pe:
+        raise pe
     except ValueError:
         raise PromptException(status_code=400, error_key="INVALID_PROMPT_TEMPLATE_ID_FORMAT")
     except sqlalchemy.exc.SQLAlchemyError as e:
@@ -1,85 +1,107 @@
 from ..models.llm import LLMException
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, Response
 from sqlalchemy.orm import Session
 from ..db.database import get_db
+from ..utils.analytics.rollups import ROLLUP_SOURCE_COLUMNS, record_results, remove_results
+from ..utils.analytics.sample_statistics import sample_summaries
+from ..db.bulk import bulk_insert
 from ..models.test import Test, TestException
-from ..schemas.test import TestCreate, TestResponse, TestUpdate
+from ..schemas.test import MatrixCell, MatrixLLM, MatrixRow, SampleSummary, TestCreate, TestMatrixCreate, TestMatrixResponse, TestResponse, TestUpdate
+from ..schemas.test_job import TestJobResponse
 import sqlalchemy
 from ..exceptions.error_messages import ErrorMessages
 from typing import List
 import uuid
 from ..models.prompt import Prompt
 from ..models.test import test_prompt_association
+from ..models.response_lsh_band import ResponseLshBand
+from ..models.result_sample import ResultSample
+from ..models.test_job import TestJob
 from sqlalchemy import delete
-from .llms import converse_with_llm, converse_with_llm_image
-from ..schemas.llm import ConversationInput, ImageConversationInput
+from ..utils.llm.response_cache import response_cache
+from ..utils.llm.config_cache import llm_configs
 from datetime import datetime
-import gpt3_tokenizer
+from ..utils.blobs.blob_store import image_store
+from ..utils.scoring.reference_scoring import rescore_test, score_results, validate_pattern
+from ..utils.jobs.queue import enqueue
+from ..settings.settings import settings
+from ..utils.runs.runner import ensure_prompt_tokens, load_llms, load_prompt_llms, run_image_prompts, run_text_pairs, run_text_prompts, run_text_samples
+from ..utils.pagination.pagination import NEXT_CURSOR_HEADER, decode_cursor, keyset_order, keyset_page, page_size
+from ..utils.streaming.ndjson import stream_ndjson, wants_ndjson
 from typing import Optional
 import json
-import base64
+import regex
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter()
 
+def _check_expected_pattern(pattern: Optional[str]):
+    try:
+        validate_pattern(pattern)
+    except regex.error as e:
+        raise TestException(status_code=400, error_key="INVALID_EXPECTED_PATTERN", detail=str(e))
+
+
+def _check_samples(samples: Optional[int]):
+    if samples is not None and not 1 <= samples <= settings.SAMPLE_MAX_COUNT:
+        raise TestException(
+            status_code=400,
+            error_key="INVALID_SAMPLE_COUNT",
+            detail=f"samples must be between 1 and {settings.SAMPLE_MAX_COUNT}",
+        )
+
+
 @router.post("/test/text", response_model=TestResponse)
 async def create_test(test: TestCreate, db: Session = Depends(get_db)):
     try:
-        db_test = Test(test_name=test.test_name, user_input=test.user_input)
+        _check_expected_pattern(test.expected_pattern)
+        _check_samples(test.samples)
+        db_test = Test(
+            test_name=test.test_name,
+            user_input=test.user_input,
+            expected_answer=test.expected_answer,
+            expected_pattern=test.expected_pattern,
+        )
 
 
         db.add(db_test)
-        db.flush()
+        await run_in_threadpool(db.flush)
         
-        prompts = db.query(Prompt).filter(Prompt.id.in_(test.prompt_ids)).all()
-        
-        print("prompts: ",prompts[0].id)
-        print("prompts: ",prompts[0].prompt)
-        print("prompts[0].llm_id: ",prompts[0].llm_id)
-
+        prompts = await run_in_threadpool(
+            lambda: db.query(Prompt).filter(Prompt.id.in_(test.prompt_ids)).all()
+        )
 
         if len(prompts) != len(test.prompt_ids):
             raise TestException(status_code=400, error_key="INVALID_PROMPT_IDS")
 
-        for prompt in prompts:            
-            conversation_input = ConversationInput(
-                llm_id=prompt.llm_id,
-                user_input=test.user_input,
-                prompt=prompt.prompt,
-            )
+        llms = await load_prompt_llms(db, prompts)
+        await run_in_threadpool(ensure_prompt_tokens, prompts, llms)
 
-            try:
-                llm_response = await converse_with_llm(conversation_input, db)
-            except Exception as e:
-                raise LLMException(
-                    status_code=500,
-                    error_key="CONVERSATION_ERROR"
-                )
-            
-            print("llm_response", llm_response)
-            
-            try:
-                association = db.execute(
-                    test_prompt_association.insert().values(
-                        test_id=db_test.id,
-                        prompt_id=prompt.id,
-                        llm_response=llm_response["response"]["output"]["message"]["content"][0]["text"],
-                        input_tokens=llm_response["response"]["usage"]["inputTokens"],
-                        output_tokens=llm_response["response"]["usage"]["outputTokens"],
-                        total_tokens=llm_response["response"]["usage"]["totalTokens"],
-                        latency_ms=llm_response["response"]["metrics"]["latencyMs"],
-                        prompt_tokens=gpt3_tokenizer.count_tokens(prompt.prompt),
-                        user_input_tokens=gpt3_tokenizer.count_tokens(test.user_input),
-                    )
+        sample_rows = []
+        fresh_responses = []
+        try:
+            if test.samples and test.samples > 1:
+                rows, sample_rows = await run_text_samples(
+                    db, db_test, prompts, llms, test.samples, stream=test.stream
                 )
-                db.flush()
-            except Exception as e:
-                raise LLMException(
-                    status_code=500,
-                    error_key="CONVERSATION_ERROR"
+            else:
+                rows, fresh_responses = await run_text_prompts(
+                    db, db_test, prompts, llms, stream=test.stream, use_cache=test.use_cache
                 )
-
-        db.commit()
-        db.refresh(db_test)
+        except Exception as e:
+            raise LLMException(
+                status_code=500,
+                error_key="CONVERSATION_ERROR"
+            )
+        if rows and all(row["error"] is not None for row in rows):
+            raise LLMException(status_code=500, error_key="CONVERSATION_ERROR", detail=rows[0]["error"])
+
+        await run_in_threadpool(score_results, rows, test.expected_answer, test.expected_pattern)
+        await run_in_threadpool(response_cache.put_many, db, fresh_responses)
+        await run_in_threadpool(record_results, db, rows)
+        await run_in_threadpool(bulk_insert, db, ResultSample.__table__, sample_rows)
+        await run_in_threadpool(db.commit)
+        await run_in_threadpool(db.refresh, db_test)
         
 
         return TestResponse.from_orm(db_test)
@@ -109,9 +131,12 @@ async def create_test(
     input_type: str = Form(...),
     text_input: Optional[str] = Form(None),
     image_input: Optional[UploadFile] = File(None),
+    expected_answer: Optional[str] = Form(None),
+    expected_pattern: Optional[str] = Form(None),
     db: Session = Depends(get_db),
 ):
     try:
+        _check_expected_pattern(expected_pattern)
         if image_input is None or image_input.file is None:
             raise TestException(status_code=400, error_key="NO_IMAGE_FILE_PROVIDED")
 
@@ -120,21 +145,25 @@ async def create_test(
         if not image_content:
             raise TestException(status_code=400, error_key="IMAGE_CONTENT_EMPTY")
 
-        # db_test = Test(test_name=test_name, image=image_input.file.read())
-        # db.add(db_test)
-        # db.flush()
-        
-        image_input.file.seek(0)
-        image_data = image_input.file.read()
-        db_test = Test(test_name=test_name, image=image_data)
+        image_hash = await run_in_threadpool(
+            image_store.add, db, image_content, image_input.content_type
+        )
+        db_test = Test(
+            test_name=test_name,
+            image_hash=image_hash,
+            expected_answer=expected_answer,
+            expected_pattern=expected_pattern,
+        )
         db.add(db_test)
-        db.flush()
+        await run_in_threadpool(db.flush)
 
         try:
             if isinstance(prompt_ids, str):
                 prompt_ids = json.loads(prompt_ids)
             prompt_ids = [uuid.UUID(id) for id in prompt_ids]
-            prompts = db.query(Prompt).filter(Prompt.id.in_(prompt_ids)).all()
+            prompts = await run_in_threadpool(
+                lambda: db.query(Prompt).filter(Prompt.id.in_(prompt_ids)).all()
+            )
         except Exception as e:
             raise LLMException(
                 status_code=500,
@@ -146,45 +175,23 @@ async def create_test(
         if len(prompts) != len(prompt_ids):
             raise TestException(status_code=400, error_key="INVALID_PROMPT_IDS")
 
-        for prompt in prompts:
- 
-            img_conversation_input = ImageConversationInput(
-                llm_id=prompt.llm_id,
-                image=image_content,
-                prompt=prompt.prompt,
-            )
-            llm_response = await converse_with_llm_image(img_conversation_input, db)
-
-            
-            try:
-                association = db.execute(
-                    test_prompt_association.insert().values(
-                        test_id=db_test.id,
-                        prompt_id=prompt.id,
-                        llm_response=llm_response["output"]["message"][
-                            "content"
-                        ][0]["text"],
-                        input_tokens=llm_response["usage"]["inputTokens"],
-                        output_tokens=llm_response["usage"]["outputTokens"],
-                        total_tokens=llm_response["usage"]["totalTokens"],
-                        latency_ms=llm_response["metrics"]["latencyMs"],
-                        prompt_tokens=gpt3_tokenizer.count_tokens(prompt.prompt),
-                        # user_input_tokens=gpt3_tokenizer.count_tokens(text_input) if text_input else '0',
-                    )
-                )
+        llms = await load_prompt_llms(db, prompts)
+        await run_in_threadpool(ensure_prompt_tokens, prompts, llms)
 
-                db.flush()
-            except Exception as e:
-                raise LLMException(
-                    status_code=500,
-                    error_key="CONVERSATION_ERROR",
-                    detail=str(e),
-                )
-        
+        try:
+            rows = await run_image_prompts(db_test, prompts, llms, image_content)
+        except Exception as e:
+            raise LLMException(
+                status_code=500,
+                error_key="CONVERSATION_ERROR",
+                detail=str(e),
+            )
+        if rows and all(row["error"] is not None for row in rows):
+            raise LLMException(status_code=500, error_key="CONVERSATION_ERROR", detail=rows[0]["error"])
 
-        
-        db.commit()
-        db.refresh(db_test)
+        await run_in_threadpool(score_results, rows, expected_answer, expected_pattern)
+        await run_in_threadpool(record_results, db, rows)
+        await run_in_threadpool(db.commit)
         
         
         return {"message": "Test Image created successfully"}
@@ -207,6 +214,239 @@ async def create_test(
         )
 
 
+@router.post("/test/text/jobs", response_model=TestJobResponse, status_code=202)
+def create_test_job(test: TestCreate, db: Session = Depends(get_db)):
+    """Queue a text test for the background workers and return its job right away."""
+    try:
+        _check_expected_pattern(test.expected_pattern)
+        if test.samples and test.samples > 1:
+            raise TestException(status_code=400, error_key="SAMPLING_NOT_QUEUEABLE")
+        prompt_count = db.query(Prompt).filter(Prompt.id.in_(test.prompt_ids)).count()
+        if prompt_count != len(set(test.prompt_ids)):
+            raise TestException(status_code=400, error_key="INVALID_PROMPT_IDS")
+
+        db_test = Test(
+            test_name=test.test_name,
+            user_input=test.user_input,
+            expected_answer=test.expected_answer,
+            expected_pattern=test.expected_pattern,
+        )
+        db.add(db_test)
+        db.flush()
+        prompt_ids = [str(prompt_id) for prompt_id in dict.fromkeys(test.prompt_ids)]
+        job = enqueue(
+            db, db_test, "text",
+            {"prompt_ids": prompt_ids, "stream": bool(test.stream), "use_cache": test.use_cache},
+            total=len(prompt_ids),
+        )
+        db.commit()
+        return TestJobResponse.from_orm(job)
+    except TestException as te:
+        db.rollback()
+        raise te
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        db.rollback()
+        raise TestException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
+
+
+@router.post("/test/image/jobs", response_model=TestJobResponse, status_code=202)
+async def create_image_test_job(
+    test_name: str = Form(...),
+    prompt_ids: str = Form(...),
+    image_input: Optional[UploadFile] = File(None),
+    expected_answer: Optional[str] = Form(None),
+    expected_pattern: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+):
+    """Queue an image test for the background workers and return its job right away."""
+    try:
+        _check_expected_pattern(expected_pattern)
+        try:
+            prompt_ids = list(dict.fromkeys(uuid.UUID(prompt_id) for prompt_id in json.loads(prompt_ids)))
+        except (ValueError, TypeError):
+            raise TestException(status_code=400, error_key="INVALID_PROMPT_IDS")
+        prompt_count = await run_in_threadpool(
+            lambda: db.query(Prompt).filter(Prompt.id.in_(prompt_ids)).count()
+        )
+        if prompt_count != len(prompt_ids):
+            raise TestException(status_code=400, error_key="INVALID_PROMPT_IDS")
+
+        if image_input is None or image_input.file is None:
+            raise TestException(status_code=400, error_key="NO_IMAGE_FILE_PROVIDED")
+        image_content = await image_input.read()
+        if not image_content:
+            raise TestException(status_code=400, error_key="IMAGE_CONTENT_EMPTY")
+
+        image_hash = await run_in_threadpool(
+            image_store.add, db, image_content, image_input.content_type
+        )
+        db_test = Test(
+            test_name=test_name,
+            image_hash=image_hash,
+            expected_answer=expected_answer,
+            expected_pattern=expected_pattern,
+        )
+        db.add(db_test)
+        await run_in_threadpool(db.flush)
+        job = enqueue(
+            db, db_test, "image",
+            {"prompt_ids": [str(prompt_id) for prompt_id in prompt_ids]},
+            total=len(prompt_ids),
+        )
+        await run_in_threadpool(db.commit)
+        return TestJobResponse.from_orm(job)
+    except TestException as te:
+        db.rollback()
+        raise te
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        db.rollback()
+        raise TestException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
+
+
+@router.get("/jobs/{job_id}", response_model=TestJobResponse)
+def read_test_job(job_id: str, db: Session = Depends(get_db)):
+    """Status and progress of a queued test."""
+    try:
+        try:
+            job_uuid = uuid.UUID(job_id)
+        except ValueError:
+            raise TestException(status_code=400, error_key="INVALID_JOB_ID_FORMAT")
+
+        job = db.query(TestJob).filter(TestJob.id == job_uuid).first()
+        if job is None:
+            raise TestException(status_code=404, error_key="JOB_NOT_FOUND")
+        return TestJobResponse.from_orm(job)
+    except TestException as te:
+        raise te
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        raise TestException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
+
+
+def _matrix_response(db: Session, matrix_id: uuid.UUID) -> TestMatrixResponse:
+    """A matrix's results, one row per prompt and one column per LLM, ordered by name."""
+    tests = db.query(Test).filter(Test.matrix_id == matrix_id).all()
+    if not tests:
+        raise TestException(status_code=404, error_key="MATRIX_NOT_FOUND")
+    llms = llm_configs.get_many(db, [test.llm_id for test in tests if test.llm_id is not None])
+    columns = sorted(llms.values(), key=lambda llm: (llm.name, str(llm.id)))
+
+    results = (
+        db.query(
+            test_prompt_association,
+            Prompt.name.label("prompt_name"),
+            Prompt.version,
+        )
+        .join(Prompt, Prompt.id == test_prompt_association.c.prompt_id)
+        .filter(test_prompt_association.c.test_id.in_([test.id for test in tests]))
+        .order_by(Prompt.name, Prompt.version)
+        .all()
+    )
+    rows = {}
+    cells = {}
+    for result in results:
+        rows.setdefault(result.prompt_id, MatrixRow(
+            prompt_id=result.prompt_id,
+            prompt_name=result.prompt_name,
+            version=result.version,
+            cells=[],
+        ))
+        cells[(result.prompt_id, result.llm_id)] = MatrixCell(
+            **{field: getattr(result, field) for field in MatrixCell.model_fields}
+        )
+    for prompt_id, row in rows.items():
+        row.cells = [cells.get((prompt_id, llm.id)) for llm in columns]
+
+    first = tests[0]
+    return TestMatrixResponse(
+        matrix_id=matrix_id,
+        test_name=first.matrix_name,
+        user_input=first.user_input,
+        creation_date=first.creation_date,
+        llms=[
+            MatrixLLM(id=llm.id, name=llm.name, llm_model_id=llm.llm_model_id, aws_region=llm.aws_region)
+            for llm in columns
+        ],
+        rows=list(rows.values()),
+    )
+
+
+@router.post("/test/matrix", response_model=TestMatrixResponse)
+async def create_test_matrix(test: TestMatrixCreate, db: Session = Depends(get_db)):
+    """
+    Run the same prompts against several LLMs and return the results as one matrix.
+
+    Each LLM gets a test of its own, grouped under a matrix id, that runs the
+    prompts on it in place of the prompts' own LLM. Each model and region has
+    a pool of MATRIX_POOL_CONCURRENCY calls, so a slow or throttled one
+    doesn't hold up the others.
+    """
+    try:
+        _check_expected_pattern(test.expected_pattern)
+        prompt_ids = list(dict.fromkeys(test.prompt_ids))
+        llm_ids = list(dict.fromkeys(test.llm_ids))
+        if not llm_ids:
+            raise TestException(status_code=400, error_key="INVALID_LLM_IDS")
+        prompts = await run_in_threadpool(
+            lambda: db.query(Prompt).filter(Prompt.id.in_(prompt_ids)).all()
+        )
+        if not prompts or len(prompts) != len(prompt_ids):
+            raise TestException(status_code=400, error_key="INVALID_PROMPT_IDS")
+        llms = await load_llms(db, llm_ids)
+
+        matrix_id = uuid.uuid4()
+        db_tests = [
+            Test(
+                test_name=test.test_name,
+                user_input=test.user_input,
+                expected_answer=test.expected_answer,
+                expected_pattern=test.expected_pattern,
+                matrix_id=matrix_id,
+                matrix_name=test.test_name,
+                llm_id=llm_id,
+            )
+            for llm_id in llm_ids
+        ]
+        db.add_all(db_tests)
+        await run_in_threadpool(db.flush)
+
+        rows, fresh_responses = await run_text_pairs(
+            db,
+            [(db_test, prompt) for db_test in db_tests for prompt in prompts],
+            llms,
+            stream=test.stream,
+            use_cache=test.use_cache,
+            pool_concurrency=settings.MATRIX_POOL_CONCURRENCY,
+        )
+        if all(row["error"] is not None for row in rows):
+            raise LLMException(status_code=500, error_key="CONVERSATION_ERROR", detail=rows[0]["error"])
+
+        await run_in_threadpool(score_results, rows, test.expected_answer, test.expected_pattern)
+        await run_in_threadpool(response_cache.put_many, db, fresh_responses)
+        await run_in_threadpool(record_results, db, rows)
+        await run_in_threadpool(db.commit)
+        return await run_in_threadpool(_matrix_response, db, matrix_id)
+    except (TestException, LLMException) as e:
+        db.rollback()
+        raise e
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        db.rollback()
+        raise TestException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
+
+
+@router.get("/test/matrix/{matrix_id}", response_model=TestMatrixResponse)
+def read_test_matrix(matrix_id: str, db: Session = Depends(get_db)):
+    try:
+        try:
+            matrix_uuid = uuid.UUID(matrix_id)
+        except ValueError:
+            raise TestException(status_code=400, error_key="INVALID_MATRIX_ID_FORMAT")
+        return _matrix_response(db, matrix_uuid)
+    except TestException as te:
+        raise te
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        raise TestException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
+
+
 @router.get("/test/{test_id}", response_model=TestResponse)
 def read_test(test_id: str, db: Session = Depends(get_db)):
     try:
@@ -239,6 +479,27 @@ def read_test(test_id: str, db: Session = Depends(get_db)):
         )
 
 
+@router.get("/test/{test_id}/samples", response_model=List[SampleSummary])
+def read_test_samples(test_id: str, db: Session = Depends(get_db)):
+    """
+    Latency, token and output-stability statistics over the samples of each
+    prompt of a sampled test; empty for a test run once per prompt.
+    """
+    try:
+        try:
+            test_uuid = uuid.UUID(test_id)
+        except ValueError:
+            raise TestException(status_code=400, error_key="INVALID_TEST_ID_FORMAT")
+
+        if db.query(Test.id).filter(Test.id == test_uuid).first() is None:
+            raise TestException(status_code=404, error_key="TEST_NOT_FOUND")
+        return [SampleSummary(**summary) for summary in sample_summaries(db, test_uuid)]
+    except TestException as te:
+        raise te
+    except sqlalchemy.exc.SQLAlchemyError as e:
+        raise TestException(status_code=500, error_key="DATABASE_ERROR", detail=str(e))
+
+
 @router.put("/tests/{test_id}", response_model=TestResponse)
 def update_test(test_id: str, test: TestUpdate, db: Session = Depends(get_db)):
     try:
@@ -251,13 +512,20 @@ def update_test(test_id: str, test: TestUpdate, db: Session = Depends(get_db)):
         if db_test is None:
             raise TestException(status_code=404, error_key="TEST_NOT_FOUND")
 
-        for key, value in test.dict(exclude_unset=True).items():
+        changes = test.dict(exclude_unset=True)
+        _check_expected_pattern(changes.get("expected_pattern"))
+        for key, value in changes.items():
             setattr(db_test, key, value)
+        if changes.keys() & {"expected_answer", "expected_pattern"}:
+            rescore_test(db, db_test)
 
         db.commit()
         db.refresh(db_test)
 
         return TestResponse.from_orm(db_test)
+    except TestException as te:
+        db.rollback()
+        raise te
     except ValueError:
         raise TestException(status_code=400, error_key="INVALID_TEST_ID_FORMAT")
     except sqlalchemy.exc.SQLAlchemyError as e:
@@ -271,6 +539,10 @@ def update_test(test_id: str, test: TestUpdate, db: Session = Depends(get_db)):
         )
 
 
+def _stored_results(db: Session, *filters) -> List[dict]:
+    return [dict(row._mapping) for row in db.query(*ROLLUP_SOURCE_COLUMNS).filter(*filters)]
+
+
 @router.delete("/test/{test_id}/prompt/{prompt_id}", response_model=dict)
 def delete_test(test_id: str, prompt_id: str, db: Session = Depends(get_db)):
     try:
@@ -292,12 +564,29 @@ def delete_test(test_id: str, prompt_id: str, db: Session = Depends(get_db)):
 
 
         if association_count == 1:
+            remove_results(db, _stored_results(db, test_prompt_association.c.test_id == db_test.id))
+            db.query(ResponseLshBand).filter(ResponseLshBand.test_id == db_test.id).delete()
+            db.query(ResultSample).filter(ResultSample.test_id == db_test.id).delete()
             db.query(test_prompt_association).filter(
                 test_prompt_association.c.test_id == db_test.id
             ).delete()
+            image_store.release(db, db_test.image_hash)
             db.delete(db_test)
             message = "Test and its single association deleted successfully"
         elif association_count > 1:
+            remove_results(db, _stored_results(
+                db,
+                test_prompt_association.c.test_id == db_test.id,
+                test_prompt_association.c.prompt_id == uuid.UUID(prompt_id),
+            ))
+            db.query(ResponseLshBand).filter(
+                ResponseLshBand.test_id == db_test.id,
+                ResponseLshBand.prompt_id == uuid.UUID(prompt_id),
+            ).delete()
+            db.query(ResultSample).filter(
+                ResultSample.test_id == db_test.id,
+                ResultSample.prompt_id == uuid.UUID(prompt_id),
+            ).delete()
             db.execute(
                 delete(test_prompt_association)
                 .where(test_prompt_association.c.test_id == db_test.id)
@@ -307,6 +596,7 @@ def delete_test(test_id: str, prompt_id: str, db: Session = Depends(get_db)):
                 "One association deleted, test retained due to multiple associations"
             )
         else:
+            image_store.release(db, db_test.image_hash)
             db.delete(db_test)
             message = "Test deleted successfully (no associations found)"
 
@@ -326,56 +616,113 @@ def delete_test(test_id: str, prompt_id: str, db: Session = Depends(get_db)):
         )
 
 
+# Columns of a test listing; llm_response is only loaded when asked for
+TEST_LIST_COLUMNS = (
+    Test.id,
+    Test.test_name,
+    Test.user_input,
+    Test.creation_date,
+    Test.image_hash,
+    test_prompt_association.c.llm_id,
+    test_prompt_association.c.creation_date.label("result_creation_date"),
+    test_prompt_association.c.input_tokens,
+    test_prompt_association.c.output_tokens,
+    test_prompt_association.c.total_tokens,
+    test_prompt_association.c.latency_ms,
+    test_prompt_association.c.prompt_tokens,
+    test_prompt_association.c.user_input_tokens,
+    test_prompt_association.c.time_to_first_token_ms,
+    test_prompt_association.c.tokens_per_second,
+    test_prompt_association.c.cache_hit,
+    test_prompt_association.c.error,
+    Test.expected_answer,
+    Test.expected_pattern,
+    test_prompt_association.c.exact_match,
+    test_prompt_association.c.regex_match,
+    test_prompt_association.c.bleu,
+    test_prompt_association.c.rouge_1,
+    test_prompt_association.c.rouge_l,
+)
+
+
+def _test_response(request: Request, row) -> TestResponse:
+    if row.image_hash:
+        image_url = str(request.url_for("read_image", image_hash=row.image_hash))
+    else:
+        image_url = None
+    return TestResponse(**row._mapping, image_url=image_url)
+
+
 @router.get("/tests/{prompt_id}", response_model=List[TestResponse])
-def list_tests(prompt_id: str, db: Session = Depends(get_db)):
+def list_tests(
+    prompt_id: str,
+    request: Request,
+    response: Response,
+    include_response: bool = False,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    llm_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Results of a prompt, newest first, one page at a time; X-Next-Cursor points to the next page.
+
+    With `Accept: application/x-ndjson` every matching result is streamed instead, one per line.
+    """
     try:
         try:
-            uuid.UUID(prompt_id)
+            uuid_prompt_id = uuid.UUID(prompt_id)
         except ValueError:
             raise TestException(status_code=400, error_key="INVALID_PROMPT_ID_FORMAT")
-        
-        uuid_prompt_id = uuid.UUID(prompt_id)
-        tests = (
-            db.query(Test)
-            .join(test_prompt_association)
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise TestException(status_code=400, error_key="INVALID_CURSOR")
+
+        columns = list(TEST_LIST_COLUMNS)
+        if include_response:
+            columns.append(test_prompt_association.c.llm_response)
+
+        query = (
+            db.query(*columns)
+            .join(test_prompt_association, test_prompt_association.c.test_id == Test.id)
             .filter(test_prompt_association.c.prompt_id == uuid_prompt_id)
-            .all()
         )
-
-        test_responses = []
-        for test in tests:
-            association = (
-                db.query(test_prompt_association)
-                .filter(
-                    test_prompt_association.c.test_id == test.id,
-                    test_prompt_association.c.prompt_id == uuid_prompt_id,
-                )
-                .first()
-            )
-            
-            llm_response = association.llm_response if association else None
-            if test.image:
-                image = base64.b64encode(test.image).decode("utf-8")
-            else:
-                image = None
-            
-            test_response = TestResponse(
-                id=test.id,
-                test_name=test.test_name,
-                user_input=test.user_input,
-                creation_date=test.creation_date,
-                llm_response=llm_response,
-                input_tokens=association.input_tokens,
-                output_tokens=association.output_tokens,
-                total_tokens=association.total_tokens,
-                latency_ms=association.latency_ms,
-                prompt_tokens=association.prompt_tokens,
-                user_input_tokens=association.user_input_tokens,
-                image=image,
+        if created_after is not None:
+            query = query.filter(test_prompt_association.c.creation_date >= created_after)
+        if created_before is not None:
+            query = query.filter(test_prompt_association.c.creation_date < created_before)
+        if llm_id is not None:
+            try:
+                query = query.filter(test_prompt_association.c.llm_id == uuid.UUID(llm_id))
+            except ValueError:
+                raise TestException(status_code=400, error_key="INVALID_LLM_ID_FORMAT")
+
+        if wants_ndjson(request):
+            query = keyset_order(
+                query,
+                test_prompt_association.c.creation_date,
+                test_prompt_association.c.test_id,
+                position,
             )
-            test_responses.append(test_response)
+            return stream_ndjson(db, query, lambda row: _test_response(request, row).model_dump_json())
+
+        rows, next_cursor = keyset_page(
+            query,
+            test_prompt_association.c.creation_date,
+            test_prompt_association.c.test_id,
+            position,
+            page_size(limit),
+            key=lambda row: (row.result_creation_date, row.id),
+        )
+        if next_cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
-        return test_responses
+        return [_test_response(request, row) for row in rows]
+    except TestException as te:
+        raise te
     except ValueError:
         raise TestException(status_code=400, error_key="INVALID_PROMPT_ID_FORMAT")
     except sqlalchemy.exc.SQLAlchemyError as e:
@@ -0,0 +1,77 @@
+import io
+from datetime import date, datetime
+
+from sqlalchemy import Table
+from sqlalchemy.orm import Session
+
+from ..settings.settings import settings
+
+
+def _csv_value(value) -> str:
+    """Format a value for COPY ... CSV, where an unquoted empty field is NULL."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "\\x" + bytes(value).hex()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _with_defaults(table: Table, rows: list) -> tuple:
+    """Fill every row out to the same columns, applying scalar column defaults."""
+    columns = [column for column in table.columns if any(column.name in row for row in rows)]
+    for column in table.columns:
+        if column not in columns and column.default is not None and column.default.is_scalar:
+            columns.append(column)
+
+    def value(row, column):
+        if column.name in row:
+            return row[column.name]
+        if column.default is not None and column.default.is_scalar:
+            return column.default.arg
+        return None
+
+    return [column.name for column in columns], [
+        [value(row, column) for column in columns] for row in rows
+    ]
+
+
+def _copy_rows(db: Session, table: Table, rows: list):
+    column_names, values = _with_defaults(table, rows)
+    buffer = io.StringIO()
+    for row in values:
+        buffer.write(",".join(_csv_value(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    # The raw connection belongs to the session's transaction
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(column_names)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def bulk_insert(db: Session, table: Table, rows: list):
+    """
+    Insert many rows into a table in one round trip where the driver allows.
+
+    Small batches go through a single executemany, which SQLAlchemy sends as
+    multi-row INSERT ... VALUES statements. On PostgreSQL, batches of at least
+    BULK_INSERT_COPY_THRESHOLD rows are streamed with COPY instead. Rows are
+    written inside the session's transaction; the caller commits.
+    """
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql" and len(rows) >= settings.BULK_INSERT_COPY_THRESHOLD:
+        _copy_rows(db, table, rows)
+    else:
+        db.execute(table.insert(), rows)
@@ -6,6 +6,7 @@ class ErrorMessages:
     PROJECT_NOT_FOUND = "Project not found"
     INVALID_PROJECT_ID_FORMAT = "Invalid project ID format"
     DATABASE_ERROR = "Database error"
+    STREAM_INCOMPLETE = "The list ended early because of an error; rows may be missing"
     
     PROJECT_DELETION_ERROR = "An error occurred while deleting the project"
     PROJECT_UPDATE_ERROR = "An error occurred while updating the project"
@@ -23,6 +24,7 @@ class ErrorMessages:
     PROMPT_GET_ERROR = "An error occurred while getting the prompt"
     PROMPT_NOT_FOUND = "Prompt not found"
     INVALID_PROMPT_ID_FORMAT = "Invalid prompt ID format"
+    NOT_ENOUGH_PROMPT_VERSIONS = "At least two prompt versions of the template are needed for a comparison"
     
     LLM_NAME_EXISTS = "An LLM with this name already exists"
     LLM_CREATION_ERROR = "An error occurred while creating the LLM"
@@ -42,6 +44,22 @@ class ErrorMessages:
     TEST_GET_ERROR = "An error occurred while getting the test"
     TEST_NOT_FOUND = "Test not found"
     INVALID_TEST_ID_FORMAT = "Invalid test ID format"
+    INVALID_EXPECTED_PATTERN = "Expected pattern is not a valid regular expression"
+    INVALID_PROMPT_IDS = "One or more prompt IDs are invalid"
+    JOB_NOT_FOUND = "Test job not found"
+    INVALID_JOB_ID_FORMAT = "Invalid test job ID format"
+    INVALID_LLM_IDS = "At least one LLM ID is required"
+    INVALID_SAMPLE_COUNT = "The number of samples is out of range"
+    SAMPLING_NOT_QUEUEABLE = "Sampled tests can't be queued; run them directly"
+    MATRIX_NOT_FOUND = "Test matrix not found"
+    INVALID_MATRIX_ID_FORMAT = "Invalid test matrix ID format"
+
+    DATASET_NOT_FOUND = "Dataset not found"
+    INVALID_DATASET_ID_FORMAT = "Invalid dataset ID format"
+    INVALID_DATASET_FILE = "The dataset file could not be read"
+    DATASET_EMPTY = "The dataset file has no items"
+    DATASET_RUN_NOT_FOUND = "Dataset run not found"
+    INVALID_DATASET_RUN_ID_FORMAT = "Invalid dataset run ID format"
     
     LLM_TOOL_NAME_EXISTS = "An LLM tool with this name already exists"
     LLM_TOOL_CREATION_ERROR = "An error occurred while creating the LLM tool"
@@ -54,7 +72,11 @@ class ErrorMessages:
     
     
     INVALID_PROMPT_TEMPLATE_NAME="Invalid prompt template name"
+    INVALID_PROMPT_TEMPLATE_ID_FORMAT="Invalid prompt template ID format"
     NO_IMAGE_FILE_PROVIDED="No image file provided"
     IMAGE_CONTENT_EMPTY="Image content is empty",
     CONVERSATION_ERROR="An error occurred during the conversation with the LLM"
-    NO_IMAGE_PROVIDED="No image provided"
\ No newline at end of file
+    NO_IMAGE_PROVIDED="No image provided"
+    IMAGE_NOT_FOUND="Image not found"
+    INVALID_IMAGE_HASH="Invalid image hash format"
+    INVALID_CURSOR="Invalid pagination cursor"
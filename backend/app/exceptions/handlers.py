@@ -5,6 +5,7 @@ from ..models.prompt_template import PromptTemplateException
 from ..models.prompt import PromptException
 from ..models.llm import LLMException
 from ..models.test import TestException
+from ..models.dataset import DatasetException
 
 async def project_exception_handler(request: Request, exc: ProjectException):
     return JSONResponse(
@@ -34,4 +35,10 @@ async def test_exception_handler(request: Request, exc: TestException):
     return JSONResponse(
         status_code=exc.status_code,
         content=exc.detail,
-    )
\ No newline at end of file
+    )
+
+async def dataset_exception_handler(request: Request, exc: DatasetException):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content=exc.detail,
+    )
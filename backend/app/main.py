@@ -1,15 +1,27 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from .api import projects, llms, prompt_templates, prompts, tests
+from .api import projects, llms, prompt_templates, prompts, tests, images, analytics, datasets
 from .db.database import engine, Base
-from .exceptions.handlers import project_exception_handler, prompt_template_exception_handler, prompt_exception_handler, llm_exception_handler, test_exception_handler
+from .exceptions.handlers import project_exception_handler, prompt_template_exception_handler, prompt_exception_handler, llm_exception_handler, test_exception_handler, dataset_exception_handler
 from .models.project import ProjectException
 from .models.prompt_template import PromptTemplateException
 from .models.prompt import PromptException
 from .models.llm import LLMException
 from .models.test import TestException
+from .models.dataset import DatasetException
+from .utils.tokenizer.tokenizer import tokenizers
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load tokenizer vocabularies before serving, rather than on a request
+    await run_in_threadpool(tokenizers.preload)
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,6 +29,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 Base.metadata.create_all(bind=engine)
@@ -26,6 +39,9 @@ app.include_router(llms.router, tags=["llms"], prefix="/api/v1")
 app.include_router(prompt_templates.router, tags=["prompt_templates"], prefix="/api/v1")
 app.include_router(prompts.router, tags=["prompts"], prefix="/api/v1")
 app.include_router(tests.router, tags=["tests"], prefix="/api/v1")
+app.include_router(images.router, tags=["images"], prefix="/api/v1")
+app.include_router(analytics.router, tags=["analytics"], prefix="/api/v1")
+app.include_router(datasets.router, tags=["datasets"], prefix="/api/v1")
 
 @app.get("/")
 async def root():
@@ -35,4 +51,5 @@ app.add_exception_handler(ProjectException, project_exception_handler)
 app.add_exception_handler(PromptTemplateException, prompt_template_exception_handler)
 app.add_exception_handler(PromptException, prompt_exception_handler)
 app.add_exception_handler(LLMException, llm_exception_handler)
-app.add_exception_handler(TestException, test_exception_handler)
\ No newline at end of file
+app.add_exception_handler(TestException, test_exception_handler)
+app.add_exception_handler(DatasetException, dataset_exception_handler)
\ No newline at end of file
@@ -0,0 +1,59 @@
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.dialects.postgresql import UUID
+from ..db.database import Base
+import uuid
+from datetime import datetime
+from ..utils.exceptions.errors import get_error_message
+from fastapi import HTTPException
+
+
+class Dataset(Base):
+    __tablename__ = "datasets"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String(255), nullable=False)
+    format = Column(String(10), nullable=False)
+    item_count = Column(Integer, nullable=False, default=0)
+    creation_date = Column(DateTime, default=datetime.utcnow)
+
+
+class DatasetItem(Base):
+    __tablename__ = "dataset_items"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    dataset_id = Column(UUID(as_uuid=True), ForeignKey('datasets.id', ondelete='CASCADE'), nullable=False)
+    position = Column(Integer, nullable=False)
+    user_input = Column(Text, nullable=False)
+    expected_answer = Column(Text)
+    expected_pattern = Column(Text)
+
+    __table_args__ = (
+        Index("ix_dataset_items_dataset_position", "dataset_id", "position"),
+    )
+
+
+class DatasetRun(Base):
+    """
+    Every item of a dataset sent to every selected prompt. Each item becomes a
+    test of the run; its progress is that of the run's job.
+    """
+
+    __tablename__ = "dataset_runs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    dataset_id = Column(UUID(as_uuid=True), ForeignKey('datasets.id', ondelete='CASCADE'), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    prompt_ids = Column(JSON, nullable=False)
+    creation_date = Column(DateTime, default=datetime.utcnow)
+
+
+class DatasetException(HTTPException):
+    def __init__(self, status_code: int, error_key: str, detail: str = None):
+        error_message = get_error_message(error_key)
+        content = {
+            "error_key": error_key,
+            "message": error_message
+        }
+        if detail is not None:
+            content["detail"] = detail
+        super().__init__(status_code=status_code, detail=content)
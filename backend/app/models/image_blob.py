@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger
+from ..db.database import Base
+from datetime import datetime
+
+
+class ImageBlob(Base):
+    __tablename__ = "image_blobs"
+
+    hash = Column(String(64), primary_key=True)
+    content_type = Column(String(100))
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    creation_date = Column(DateTime, default=datetime.utcnow)
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, String, Text, Boolean, func
+from sqlalchemy import Column, String, Text, Boolean, Integer, DateTime, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from ..db.database import Base
 import uuid
+from datetime import datetime
 from ..utils.exceptions.errors import get_error_message
 from fastapi import HTTPException
 
@@ -16,8 +17,13 @@ class LLM(Base):
     secret_access_key = Column(String(255))
     llm_model_id = Column(String(255))
     aws_region = Column(String(100))
+    requests_per_minute = Column(Integer)
+    tokens_per_minute = Column(Integer)
+    creation_date = Column(DateTime, default=datetime.utcnow)
     prompts = relationship("Prompt", back_populates="llm")
 
+    __table_args__ = (Index("ix_llm_creation_date_id", "creation_date", "id"),)
+
 class LLMException(HTTPException):
     def __init__(self, status_code: int, error_key: str, detail: str = None):
         error_message = get_error_message(error_key)
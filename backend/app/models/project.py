@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, Integer
+from sqlalchemy import Column, String, DateTime, Text, Integer, Index
 from sqlalchemy import func
 from ..db.database import Base
 import uuid
@@ -19,6 +19,8 @@ class Project(Base):
     prompt_templates = relationship("PromptTemplate", back_populates="project")
     # llm_tools = relationship("LLMTool", back_populates="project")
 
+    __table_args__ = (Index("ix_projects_creation_date_id", "creation_date", "id"),)
+
 class ProjectException(HTTPException):
     def __init__(self, status_code: int, error_key: str, detail: str = None):
         error_message = get_error_message(error_key)
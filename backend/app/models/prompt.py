@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, Numeric, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, Numeric, ForeignKey, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from ..db.database import Base
@@ -17,6 +17,7 @@ class Prompt(Base):
     notes = Column(Text)
     creation_date = Column(DateTime, default=datetime.utcnow)
     version = Column(Numeric(3, 1), default=0.0)
+    prompt_tokens = Column(Integer)
     llm_id = Column(UUID(as_uuid=True), ForeignKey('llm.id'))
     prompt_template_id = Column(UUID(as_uuid=True), ForeignKey('prompt_template.id'))
 
@@ -24,6 +25,10 @@ class Prompt(Base):
     prompt_template = relationship("PromptTemplate", back_populates="prompts")
     tests = relationship("Test", secondary=test_prompt_association, back_populates="prompts")
 
+    __table_args__ = (
+        Index("ix_prompts_template_creation_date_id", "prompt_template_id", "creation_date", "id"),
+    )
+
 class PromptException(HTTPException):
     def __init__(self, status_code: int, error_key: str, detail: str = None):
         error_message = get_error_message(error_key)
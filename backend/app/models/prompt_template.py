@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from ..db.database import Base
@@ -22,6 +22,10 @@ class PromptTemplate(Base):
     project = relationship("Project", back_populates="prompt_templates")
     prompts = relationship("Prompt", back_populates="prompt_template")
 
+    __table_args__ = (
+        Index("ix_prompt_template_project_creation_date_id", "project_id", "creation_date", "id"),
+    )
+
 class PromptTemplateException(HTTPException):
     def __init__(self, status_code: int, error_key: str, detail: str = None):
         error_message = get_error_message(error_key)
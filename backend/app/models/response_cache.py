@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime, JSON
+from ..db.database import Base
+from datetime import datetime
+
+
+class LLMResponseCache(Base):
+    __tablename__ = "llm_response_cache"
+
+    cache_key = Column(String(64), primary_key=True)
+    llm_model_id = Column(String(255))
+    response = Column(JSON, nullable=False)
+    creation_date = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, ForeignKey, SmallInteger, BigInteger, Index
+from sqlalchemy.dialects.postgresql import UUID
+from ..db.database import Base
+
+
+class ResponseLshBand(Base):
+    """LSH bucket of one band of a result's MinHash signature; results sharing a bucket are near-duplicate candidates."""
+
+    __tablename__ = "response_lsh_bands"
+
+    test_id = Column(UUID(as_uuid=True), ForeignKey('tests.id', ondelete='CASCADE'), primary_key=True)
+    prompt_id = Column(UUID(as_uuid=True), ForeignKey('prompts.id', ondelete='CASCADE'), primary_key=True, index=True)
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index("ix_response_lsh_bands_band_bucket", "band", "bucket"),
+    )
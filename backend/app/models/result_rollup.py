@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Date, ForeignKey, BigInteger, Float, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from ..db.database import Base
+import uuid
+
+# Stands in for results without an LLM, as llm_id is part of the primary key
+UNKNOWN_LLM_ID = uuid.UUID(int=0)
+
+
+class ResultRollup(Base):
+    """Daily totals of the results of a prompt on an LLM, maintained as results are written."""
+
+    __tablename__ = "result_rollups"
+
+    prompt_id = Column(UUID(as_uuid=True), ForeignKey('prompts.id', ondelete='CASCADE'), primary_key=True)
+    llm_id = Column(UUID(as_uuid=True), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    count = Column(BigInteger, nullable=False, default=0)
+    error_count = Column(BigInteger, nullable=False, default=0)
+
+    latency_count = Column(BigInteger, nullable=False, default=0)
+    latency_sum = Column(Float, nullable=False, default=0)
+    latency_sum_squares = Column(Float, nullable=False, default=0)
+    latency_min = Column(Float)
+    latency_max = Column(Float)
+    latency_sketch = Column(JSON)
+
+    tokens_count = Column(BigInteger, nullable=False, default=0)
+    input_tokens_sum = Column(BigInteger, nullable=False, default=0)
+    output_tokens_sum = Column(BigInteger, nullable=False, default=0)
+    total_tokens_sum = Column(BigInteger, nullable=False, default=0)
+    total_tokens_sum_squares = Column(Float, nullable=False, default=0)
+    total_tokens_sketch = Column(JSON)
+
+    tokens_per_second_count = Column(BigInteger, nullable=False, default=0)
+    tokens_per_second_sum = Column(Float, nullable=False, default=0)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, SmallInteger, Integer, Float, Text, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from ..db.database import Base
+
+
+class ResultSample(Base):
+    """One of the repeated calls of a sampled test's prompt; the result itself is the first that succeeded."""
+
+    __tablename__ = "result_samples"
+
+    test_id = Column(UUID(as_uuid=True), ForeignKey('tests.id', ondelete='CASCADE'), primary_key=True)
+    prompt_id = Column(UUID(as_uuid=True), ForeignKey('prompts.id', ondelete='CASCADE'), primary_key=True, index=True)
+    sample = Column(SmallInteger, primary_key=True)
+    llm_id = Column(UUID(as_uuid=True), ForeignKey('llm.id', ondelete='SET NULL'))
+    llm_response = Column(Text)
+    input_tokens = Column(Integer)
+    output_tokens = Column(Integer)
+    total_tokens = Column(Integer)
+    latency_ms = Column(Integer)
+    time_to_first_token_ms = Column(Integer)
+    tokens_per_second = Column(Float)
+    error = Column(Text)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Table, LargeBinary, Integer
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Table, Integer, Float, Boolean, Index, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from ..db.database import Base
@@ -10,13 +10,26 @@ from fastapi import HTTPException
 test_prompt_association = Table('test_prompt_association', Base.metadata,
     Column('test_id', UUID(as_uuid=True), ForeignKey('tests.id')),
     Column('prompt_id', UUID(as_uuid=True), ForeignKey('prompts.id')),
+    Column('llm_id', UUID(as_uuid=True), ForeignKey('llm.id', ondelete='SET NULL')),
+    Column('creation_date', DateTime, default=datetime.utcnow),
     Column('llm_response', Text),
     Column('input_tokens', Integer),
     Column('output_tokens', Integer),
     Column('total_tokens', Integer),
     Column('latency_ms', Integer),
     Column('prompt_tokens', Integer),
-    Column('user_input_tokens', Integer)
+    Column('user_input_tokens', Integer),
+    Column('time_to_first_token_ms', Integer),
+    Column('tokens_per_second', Float),
+    Column('cache_hit', Boolean, default=False),
+    Column('error', Text),
+    Column('exact_match', Boolean),
+    Column('regex_match', Boolean),
+    Column('bleu', Float),
+    Column('rouge_1', Float),
+    Column('rouge_l', Float),
+    Column('minhash', LargeBinary),
+    Index('ix_test_prompt_association_prompt_creation_date', 'prompt_id', 'creation_date', 'test_id'),
 )
 
 class Test(Base):
@@ -24,8 +37,15 @@ class Test(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     test_name = Column(String(255), nullable=False)
-    user_input = Column(Text, nullable=False)
-    image = Column(LargeBinary, nullable=True)
+    user_input = Column(Text)
+    image_hash = Column(String(64), index=True)
+    expected_answer = Column(Text)
+    expected_pattern = Column(Text)
+    dataset_run_id = Column(UUID(as_uuid=True), ForeignKey('dataset_runs.id', ondelete='SET NULL'), index=True)
+    # Matrix runs: one test per LLM, which its prompts run on instead of their own
+    matrix_id = Column(UUID(as_uuid=True), index=True)
+    matrix_name = Column(String(255))
+    llm_id = Column(UUID(as_uuid=True), ForeignKey('llm.id', ondelete='SET NULL'))
     creation_date = Column(DateTime, default=datetime.utcnow)
 
     prompts = relationship("Prompt", secondary=test_prompt_association, back_populates="tests")
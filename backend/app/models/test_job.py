@@ -0,0 +1,32 @@
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, JSON, Index
+from sqlalchemy.dialects.postgresql import UUID
+from ..db.database import Base
+import uuid
+from datetime import datetime
+
+
+class TestJob(Base):
+    """A test, or a dataset run, queued for the background workers."""
+
+    __tablename__ = "test_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    test_id = Column(UUID(as_uuid=True), ForeignKey('tests.id', ondelete='CASCADE'), index=True)
+    dataset_run_id = Column(UUID(as_uuid=True), ForeignKey('dataset_runs.id', ondelete='CASCADE'), index=True)
+    kind = Column(String(20), nullable=False)
+    status = Column(String(20), nullable=False, default="queued")
+    payload = Column(JSON, nullable=False)
+    total = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    locked_by = Column(String(255))
+    locked_until = Column(DateTime)
+    run_after = Column(DateTime, default=datetime.utcnow)
+    error = Column(Text)
+    creation_date = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_test_jobs_status_run_after", "status", "run_after"),
+    )
@@ -0,0 +1,70 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from uuid import UUID
+
+
+class ResultStatistics(BaseModel):
+    prompt_id: UUID
+    version: Optional[float] = None
+    llm_id: Optional[UUID] = None
+    llm_name: Optional[str] = None
+    count: int
+    error_count: int
+    error_rate: float
+    latency_ms_mean: Optional[float] = None
+    latency_ms_stddev: Optional[float] = None
+    latency_ms_min: Optional[float] = None
+    latency_ms_max: Optional[float] = None
+    latency_ms_p50: Optional[float] = None
+    latency_ms_p90: Optional[float] = None
+    latency_ms_p99: Optional[float] = None
+    input_tokens_mean: Optional[float] = None
+    output_tokens_mean: Optional[float] = None
+    total_tokens_mean: Optional[float] = None
+    total_tokens_stddev: Optional[float] = None
+    total_tokens_sum: Optional[int] = None
+    total_tokens_p50: Optional[float] = None
+    total_tokens_p90: Optional[float] = None
+    total_tokens_p99: Optional[float] = None
+    tokens_per_second_mean: Optional[float] = None
+
+
+class InputSimilarity(BaseModel):
+    user_input: Optional[str] = None
+    image_hash: Optional[str] = None
+    left_test_id: UUID
+    right_test_id: UUID
+    cosine: float
+    jaccard: float
+    length_delta: float
+    drift: float
+
+
+class VersionSimilarity(BaseModel):
+    left_prompt_id: UUID
+    left_version: Optional[float] = None
+    right_prompt_id: UUID
+    right_version: Optional[float] = None
+    count: int
+    cosine_mean: Optional[float] = None
+    jaccard_mean: Optional[float] = None
+    length_delta_mean: Optional[float] = None
+    drift_mean: Optional[float] = None
+    drift_max: Optional[float] = None
+    inputs: Optional[List[InputSimilarity]] = None
+
+
+class DuplicateResult(BaseModel):
+    test_id: UUID
+    prompt_id: UUID
+    version: Optional[float] = None
+    user_input: Optional[str] = None
+    llm_response: Optional[str] = None
+
+
+class DuplicateCluster(BaseModel):
+    size: int
+    prompt_count: int
+    input_count: int
+    similarity_min: float
+    members: List[DuplicateResult]
@@ -0,0 +1,38 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+from uuid import UUID
+from datetime import datetime
+
+
+class DatasetResponse(BaseModel):
+    id: UUID
+    name: str
+    format: str
+    item_count: int
+    creation_date: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DatasetRunCreate(BaseModel):
+    name: Optional[str] = None
+    prompt_ids: List[UUID]
+    stream: Optional[bool] = False
+    use_cache: Optional[bool] = None
+
+
+class DatasetRunResponse(BaseModel):
+    id: UUID
+    dataset_id: UUID
+    name: str
+    prompt_ids: List[UUID]
+    creation_date: datetime
+    job_id: UUID
+    status: str
+    total: int
+    completed: int
+    failed: int
+    attempts: int
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, ConfigDict
 from typing import Optional, Any
 import uuid
+from datetime import datetime
 
 
 class LLMCreate(BaseModel):
@@ -10,6 +11,8 @@ class LLMCreate(BaseModel):
     secret_access_key: Optional[str] = None
     llm_model_id: Optional[str] = None
     aws_region: Optional[str] = None
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
 
 
 class LLMUpdate(BaseModel):
@@ -19,6 +22,8 @@ class LLMUpdate(BaseModel):
     secret_access_key: Optional[str] = None
     llm_model_id: Optional[str] = None
     aws_region: Optional[str] = None
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
 
 
 class LLMResponse(BaseModel):
@@ -26,6 +31,9 @@ class LLMResponse(BaseModel):
     name: str
     description: Optional[str]
     llm_model_id: Optional[str]
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    creation_date: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True) 
 
@@ -37,6 +45,7 @@ class ConversationInput(BaseModel):
     max_tokens: Optional[int] = 2000
     temperature: Optional[float] = 0.9
     top_p: Optional[float] = 0.1
+    use_cache: Optional[bool] = None
 
 
 class ImageConversationInput(BaseModel):
@@ -26,6 +26,7 @@ class PromptResponse(BaseModel):
     notes: Optional[str] = None
     creation_date: datetime
     version: Optional[float] = None
+    prompt_tokens: Optional[int] = None
     llm_id: Optional[UUID | str] = None
     llm_model_name: Optional[str] = None
     prompt_template_id: Optional[UUID] = None
@@ -9,11 +9,19 @@ class TestCreate(BaseModel):
     user_input: Optional[str] = None
     prompt_ids: List[UUID]
     input_type: Optional[str] = None
+    stream: Optional[bool] = False
+    use_cache: Optional[bool] = None
+    expected_answer: Optional[str] = None
+    expected_pattern: Optional[str] = None
+    # Calls per prompt; above 1 every sample is stored and summarized
+    samples: Optional[int] = None
     image_input: Optional[Any] = File(None),
     
 class TestUpdate(BaseModel):
     test_name: Optional[str] = None
     user_input: Optional[str] = None
+    expected_answer: Optional[str] = None
+    expected_pattern: Optional[str] = None
 
 class TestResponse(BaseModel):
     id: UUID
@@ -27,7 +35,95 @@ class TestResponse(BaseModel):
     latency_ms: Optional[int] = None
     prompt_tokens: Optional[int] = None
     user_input_tokens: Optional[int] = None
-    image: Any
+    time_to_first_token_ms: Optional[int] = None
+    tokens_per_second: Optional[float] = None
+    cache_hit: Optional[bool] = None
+    error: Optional[str] = None
+    llm_id: Optional[UUID] = None
+    image_hash: Optional[str] = None
+    image_url: Optional[str] = None
+    expected_answer: Optional[str] = None
+    expected_pattern: Optional[str] = None
+    exact_match: Optional[bool] = None
+    regex_match: Optional[bool] = None
+    bleu: Optional[float] = None
+    rouge_1: Optional[float] = None
+    rouge_l: Optional[float] = None
 
     model_config = ConfigDict(from_attributes=True)
 
+
+class TestMatrixCreate(BaseModel):
+    test_name: str
+    user_input: str
+    prompt_ids: List[UUID]
+    llm_ids: List[UUID]
+    stream: Optional[bool] = False
+    use_cache: Optional[bool] = None
+    expected_answer: Optional[str] = None
+    expected_pattern: Optional[str] = None
+
+
+class MatrixLLM(BaseModel):
+    id: UUID
+    name: str
+    llm_model_id: Optional[str] = None
+    aws_region: Optional[str] = None
+
+
+class MatrixCell(BaseModel):
+    test_id: UUID
+    llm_id: UUID
+    llm_response: Optional[str] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    total_tokens: Optional[int] = None
+    latency_ms: Optional[int] = None
+    prompt_tokens: Optional[int] = None
+    time_to_first_token_ms: Optional[int] = None
+    tokens_per_second: Optional[float] = None
+    cache_hit: Optional[bool] = None
+    error: Optional[str] = None
+    exact_match: Optional[bool] = None
+    regex_match: Optional[bool] = None
+    bleu: Optional[float] = None
+    rouge_1: Optional[float] = None
+    rouge_l: Optional[float] = None
+
+
+class MatrixRow(BaseModel):
+    prompt_id: UUID
+    prompt_name: str
+    version: Optional[float] = None
+    # One cell per LLM, in the order of the matrix's llms; None where there is no result
+    cells: List[Optional[MatrixCell]]
+
+
+class TestMatrixResponse(BaseModel):
+    matrix_id: UUID
+    test_name: str
+    user_input: Optional[str] = None
+    creation_date: datetime
+    llms: List[MatrixLLM]
+    rows: List[MatrixRow]
+
+
+class SampleSummary(BaseModel):
+    prompt_id: UUID
+    llm_id: Optional[UUID] = None
+    samples: int
+    error_count: int
+    latency_ms_mean: Optional[float] = None
+    latency_ms_stddev: Optional[float] = None
+    latency_ms_p50: Optional[float] = None
+    latency_ms_p95: Optional[float] = None
+    latency_ms_ci95_low: Optional[float] = None
+    latency_ms_ci95_high: Optional[float] = None
+    output_tokens_mean: Optional[float] = None
+    output_tokens_variance: Optional[float] = None
+    total_tokens_mean: Optional[float] = None
+    total_tokens_variance: Optional[float] = None
+    distinct_responses: Optional[int] = None
+    modal_response_share: Optional[float] = None
+    mean_pairwise_similarity: Optional[float] = None
+    response_length_cv: Optional[float] = None
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from uuid import UUID
+from datetime import datetime
+
+
+class TestJobResponse(BaseModel):
+    id: UUID
+    test_id: Optional[UUID] = None
+    dataset_run_id: Optional[UUID] = None
+    kind: str
+    status: str
+    total: int
+    completed: int
+    attempts: int
+    error: Optional[str] = None
+    creation_date: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
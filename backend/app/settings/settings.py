@@ -9,4 +9,88 @@ class Settings:
         self.AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
         self.AWS_REGION = os.getenv("AWS_REGION")
 
+        # Bedrock runtime client pool
+        self.BEDROCK_MAX_POOL_CONNECTIONS = int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+        self.BEDROCK_CLIENT_IDLE_TTL_SECONDS = int(os.getenv("BEDROCK_CLIENT_IDLE_TTL_SECONDS", "900"))
+        self.BEDROCK_CLIENT_POOL_MAX_SIZE = int(os.getenv("BEDROCK_CLIENT_POOL_MAX_SIZE", "32"))
+        self.BEDROCK_READ_TIMEOUT_SECONDS = int(os.getenv("BEDROCK_READ_TIMEOUT_SECONDS", "120"))
+
+        # Cache of LLM configuration rows
+        self.LLM_CONFIG_CACHE_TTL_SECONDS = int(os.getenv("LLM_CONFIG_CACHE_TTL_SECONDS", "300"))
+
+        # Bedrock invocation executor
+        self.BEDROCK_MAX_WORKERS = int(os.getenv("BEDROCK_MAX_WORKERS", "32"))
+        self.BEDROCK_CALL_TIMEOUT_SECONDS = float(os.getenv("BEDROCK_CALL_TIMEOUT_SECONDS", "180"))
+
+        # Per-LLM rate limiting and throttling retries
+        self.BEDROCK_DEFAULT_REQUESTS_PER_MINUTE = int(os.getenv("BEDROCK_DEFAULT_REQUESTS_PER_MINUTE", "100"))
+        self.BEDROCK_DEFAULT_TOKENS_PER_MINUTE = int(os.getenv("BEDROCK_DEFAULT_TOKENS_PER_MINUTE", "200000"))
+        self.RATE_LIMIT_MIN_FACTOR = float(os.getenv("RATE_LIMIT_MIN_FACTOR", "0.05"))
+        self.RATE_LIMIT_INCREASE_STEP = float(os.getenv("RATE_LIMIT_INCREASE_STEP", "0.05"))
+        self.BEDROCK_MAX_ATTEMPTS = int(os.getenv("BEDROCK_MAX_ATTEMPTS", "6"))
+        self.BEDROCK_RETRY_BASE_DELAY_SECONDS = float(os.getenv("BEDROCK_RETRY_BASE_DELAY_SECONDS", "0.5"))
+        self.BEDROCK_RETRY_MAX_DELAY_SECONDS = float(os.getenv("BEDROCK_RETRY_MAX_DELAY_SECONDS", "20"))
+
+        # Maximum number of prompts of one test invoked at the same time
+        self.TEST_MAX_CONCURRENCY = int(os.getenv("TEST_MAX_CONCURRENCY", "8"))
+
+        # Repeated sampling: most samples per prompt, and concurrent calls per test
+        self.SAMPLE_MAX_COUNT = int(os.getenv("SAMPLE_MAX_COUNT", "50"))
+        self.SAMPLE_MAX_CONCURRENCY = int(os.getenv("SAMPLE_MAX_CONCURRENCY", "16"))
+
+        # Concurrent calls per model and region in a matrix run
+        self.MATRIX_POOL_CONCURRENCY = int(os.getenv("MATRIX_POOL_CONCURRENCY", "4"))
+
+        # Background test jobs: worker lease, retries and polling
+        self.JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+        self.JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        self.JOB_RETRY_DELAY_SECONDS = float(os.getenv("JOB_RETRY_DELAY_SECONDS", "30"))
+        self.JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "2"))
+        self.JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "2"))
+
+        # Dataset runs: concurrent LLM calls per run, pairs run per batch,
+        # and successful results stored per checkpoint
+        self.DATASET_RUN_MAX_CONCURRENCY = int(os.getenv("DATASET_RUN_MAX_CONCURRENCY", "16"))
+        self.DATASET_RUN_BATCH_SIZE = int(os.getenv("DATASET_RUN_BATCH_SIZE", "1000"))
+        self.DATASET_RUN_FLUSH_SIZE = int(os.getenv("DATASET_RUN_FLUSH_SIZE", "100"))
+        # Dataset items inserted per round trip while an upload streams in
+        self.DATASET_UPLOAD_BATCH_SIZE = int(os.getenv("DATASET_UPLOAD_BATCH_SIZE", "500"))
+
+        # Row count from which result inserts use COPY on PostgreSQL
+        self.BULK_INSERT_COPY_THRESHOLD = int(os.getenv("BULK_INSERT_COPY_THRESHOLD", "500"))
+
+        # Tokenizers: memoized counts, and a directory of <family>.json vocabularies
+        self.TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "4096"))
+        self.TOKENIZER_DIR = os.getenv("TOKENIZER_DIR")
+
+        # Near-duplicate detection: MinHash signature length, LSH bands and the
+        # default estimated Jaccard similarity from which results are clustered
+        self.MINHASH_PERMUTATIONS = int(os.getenv("MINHASH_PERMUTATIONS", "128"))
+        self.LSH_BANDS = int(os.getenv("LSH_BANDS", "16"))
+        self.DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.8"))
+
+        # Memoized reference-answer scores
+        self.SCORE_CACHE_SIZE = int(os.getenv("SCORE_CACHE_SIZE", "4096"))
+        # Time an expected pattern may take to match one response
+        self.EXPECTED_PATTERN_TIMEOUT_SECONDS = float(os.getenv("EXPECTED_PATTERN_TIMEOUT_SECONDS", "0.1"))
+
+        # Cache of deterministic LLM responses
+        self.RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+        self.RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+
+        # Content-addressed store of test images
+        self.IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", "data/images")
+        # Whether workers run image jobs, which needs IMAGE_STORE_DIR to be the
+        # API's image store: the same directory, or storage shared across nodes
+        self.WORKER_IMAGE_JOBS = os.getenv("WORKER_IMAGE_JOBS", "true").lower() == "true"
+        # How often workers sweep unreferenced images, and how old a file must be to go
+        self.IMAGE_SWEEP_INTERVAL_SECONDS = float(os.getenv("IMAGE_SWEEP_INTERVAL_SECONDS", "3600"))
+        self.IMAGE_SWEEP_MIN_AGE_SECONDS = float(os.getenv("IMAGE_SWEEP_MIN_AGE_SECONDS", "3600"))
+
+        # Keyset pagination of list endpoints
+        self.PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+        self.PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "1000"))
+        # Rows fetched per round trip when streaming a list as NDJSON
+        self.STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
 settings = Settings()
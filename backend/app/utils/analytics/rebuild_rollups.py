@@ -0,0 +1,53 @@
+"""
+Recompute the result rollups from test_prompt_association.
+
+Run after migrations/011_result_rollups.sql, or whenever the rollups are
+suspected to have drifted from the raw results:
+
+    python -m app.utils.analytics.rebuild_rollups
+"""
+from typing import List, Optional
+
+from ...db.database import SessionLocal
+from ...models.result_rollup import ResultRollup
+from ...models.test import test_prompt_association
+from ...settings.settings import settings
+from ...utils.logger.logger import logger
+from .rollups import ROLLUP_SOURCE_COLUMNS, apply_rollup_deltas, rollup_deltas
+
+
+def rebuild_rollups(db, prompt_ids: Optional[List] = None) -> int:
+    """
+    Recompute rollups from test_prompt_association, for some prompts or all of them.
+
+    Raw results are streamed in batches and folded into deltas, one batch at
+    a time, in the caller's transaction; run it while no tests are being
+    created for those prompts. Returns the number of results read.
+    """
+    rollups = db.query(ResultRollup)
+    source = db.query(*ROLLUP_SOURCE_COLUMNS)
+    if prompt_ids is not None:
+        rollups = rollups.filter(ResultRollup.prompt_id.in_(prompt_ids))
+        source = source.filter(test_prompt_association.c.prompt_id.in_(prompt_ids))
+    rollups.delete(synchronize_session=False)
+
+    read = 0
+    batch = []
+    for row in source.yield_per(settings.STREAM_BATCH_SIZE):
+        batch.append(dict(row._mapping))
+        if len(batch) >= settings.STREAM_BATCH_SIZE:
+            apply_rollup_deltas(db, rollup_deltas(batch))
+            read += len(batch)
+            batch = []
+    apply_rollup_deltas(db, rollup_deltas(batch))
+    return read + len(batch)
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        read = rebuild_rollups(db)
+        db.commit()
+        logger.info(f"Rebuilt result rollups from {read} results")
+    finally:
+        db.close()
@@ -0,0 +1,257 @@
+import math
+from datetime import date, datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ...db.bulk import bulk_insert
+from ...models.llm import LLM
+from ...models.response_lsh_band import ResponseLshBand
+from ...models.prompt import Prompt
+from ...models.result_rollup import ResultRollup, UNKNOWN_LLM_ID
+from ...models.test import test_prompt_association
+from ..similarity.duplicates import index_responses
+from .sketch import QuantileSketch
+
+PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+
+# Additive columns of a rollup
+SUM_COLUMNS = (
+    "count",
+    "error_count",
+    "latency_count",
+    "latency_sum",
+    "latency_sum_squares",
+    "tokens_count",
+    "input_tokens_sum",
+    "output_tokens_sum",
+    "total_tokens_sum",
+    "total_tokens_sum_squares",
+    "tokens_per_second_count",
+    "tokens_per_second_sum",
+)
+
+
+class RollupDelta:
+    """Change to one (prompt_id, llm_id, day) rollup from a batch of results."""
+
+    def __init__(self):
+        self.sums = dict.fromkeys(SUM_COLUMNS, 0)
+        self.latency_min = None
+        self.latency_max = None
+        self.latency_sketch = QuantileSketch()
+        self.total_tokens_sketch = QuantileSketch()
+
+    def add(self, result: dict, sign: int = 1):
+        sums = self.sums
+        sums["count"] += sign
+        if result.get("error") is not None:
+            sums["error_count"] += sign
+
+        latency = result.get("latency_ms")
+        if latency is not None:
+            latency = float(latency)
+            sums["latency_count"] += sign
+            sums["latency_sum"] += sign * latency
+            sums["latency_sum_squares"] += sign * latency * latency
+            self.latency_sketch.add(latency, sign)
+            if sign > 0:
+                self.latency_min = latency if self.latency_min is None else min(self.latency_min, latency)
+                self.latency_max = latency if self.latency_max is None else max(self.latency_max, latency)
+
+        total_tokens = result.get("total_tokens")
+        if total_tokens is not None:
+            sums["tokens_count"] += sign
+            sums["input_tokens_sum"] += sign * (result.get("input_tokens") or 0)
+            sums["output_tokens_sum"] += sign * (result.get("output_tokens") or 0)
+            sums["total_tokens_sum"] += sign * total_tokens
+            sums["total_tokens_sum_squares"] += sign * float(total_tokens) ** 2
+            self.total_tokens_sketch.add(total_tokens, sign)
+
+        tokens_per_second = result.get("tokens_per_second")
+        if tokens_per_second is not None:
+            sums["tokens_per_second_count"] += sign
+            sums["tokens_per_second_sum"] += sign * tokens_per_second
+
+
+def _day(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    return value or datetime.utcnow().date()
+
+
+def rollup_deltas(results: Iterable[dict], sign: int = 1) -> dict:
+    """Group result rows into deltas keyed by (prompt_id, llm_id, day)."""
+    deltas = {}
+    for result in results:
+        key = (result["prompt_id"], result.get("llm_id") or UNKNOWN_LLM_ID, _day(result.get("creation_date")))
+        deltas.setdefault(key, RollupDelta()).add(result, sign)
+    return deltas
+
+
+def _insert_missing(db, keys):
+    rows = [{"prompt_id": prompt_id, "llm_id": llm_id, "day": day} for prompt_id, llm_id, day in keys]
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        db.execute(postgresql.insert(ResultRollup).on_conflict_do_nothing(), rows)
+    elif dialect == "sqlite":
+        db.execute(sqlite.insert(ResultRollup).on_conflict_do_nothing(), rows)
+    else:
+        existing = set(
+            db.query(ResultRollup.prompt_id, ResultRollup.llm_id, ResultRollup.day)
+            .filter(tuple_(ResultRollup.prompt_id, ResultRollup.llm_id, ResultRollup.day).in_(keys))
+        )
+        for row in rows:
+            if (row["prompt_id"], row["llm_id"], row["day"]) not in existing:
+                db.add(ResultRollup(**row))
+        db.flush()
+
+
+def apply_rollup_deltas(db, deltas: dict):
+    """
+    Merge deltas into the rollup table in the caller's transaction.
+
+    Affected rows are created if needed, then locked in key order so that
+    concurrent writers to the same rollups queue up instead of deadlocking.
+    """
+    if not deltas:
+        return
+    keys = sorted(deltas, key=lambda key: (str(key[0]), str(key[1]), key[2]))
+    _insert_missing(db, keys)
+    rollups = (
+        db.query(ResultRollup)
+        .filter(tuple_(ResultRollup.prompt_id, ResultRollup.llm_id, ResultRollup.day).in_(keys))
+        .order_by(ResultRollup.prompt_id, ResultRollup.llm_id, ResultRollup.day)
+        .with_for_update()
+        .all()
+    )
+    for rollup in rollups:
+        delta = deltas[(rollup.prompt_id, rollup.llm_id, rollup.day)]
+        for column, value in delta.sums.items():
+            setattr(rollup, column, (getattr(rollup, column) or 0) + value)
+        if delta.latency_min is not None:
+            rollup.latency_min = delta.latency_min if rollup.latency_min is None else min(rollup.latency_min, delta.latency_min)
+            rollup.latency_max = delta.latency_max if rollup.latency_max is None else max(rollup.latency_max, delta.latency_max)
+        for column in ("latency_sketch", "total_tokens_sketch"):
+            sketch = QuantileSketch.from_dict(getattr(rollup, column))
+            sketch.merge(getattr(delta, column))
+            setattr(rollup, column, sketch.to_dict())
+    db.flush()
+
+
+def record_results(db, rows: List[dict]):
+    """
+    Insert test results, their near-duplicate index entries and their rollup
+    changes, in one transaction the caller commits.
+    """
+    bands = index_responses(rows)
+    bulk_insert(db, test_prompt_association, rows)
+    bulk_insert(db, ResponseLshBand.__table__, bands)
+    apply_rollup_deltas(db, rollup_deltas(rows))
+
+
+def remove_results(db, rows: List[dict]):
+    """
+    Take deleted results back out of the rollups.
+
+    Counts, sums and sketches are exact; min and max latency can't be
+    reverted and keep their values until the rollups are rebuilt.
+    """
+    apply_rollup_deltas(db, rollup_deltas(rows, sign=-1))
+
+
+ROLLUP_SOURCE_COLUMNS = (
+    test_prompt_association.c.prompt_id,
+    test_prompt_association.c.llm_id,
+    test_prompt_association.c.creation_date,
+    test_prompt_association.c.latency_ms,
+    test_prompt_association.c.input_tokens,
+    test_prompt_association.c.output_tokens,
+    test_prompt_association.c.total_tokens,
+    test_prompt_association.c.tokens_per_second,
+    test_prompt_association.c.error,
+)
+
+
+def _mean(total, count) -> Optional[float]:
+    return total / count if count else None
+
+
+def _stddev(total, sum_squares, count) -> Optional[float]:
+    if count < 2:
+        return None
+    variance = (sum_squares - total * total / count) / (count - 1)
+    return math.sqrt(max(variance, 0.0))
+
+
+def rollup_statistics(db, filters: List) -> List[dict]:
+    """
+    Result statistics per prompt version and LLM, read from the daily rollups only.
+
+    Daily rows are merged in memory: counts and sums add up, and the sketches
+    merge into percentiles within their relative accuracy.
+    """
+    rows = (
+        db.query(ResultRollup, Prompt.version, LLM.name)
+        .join(Prompt, Prompt.id == ResultRollup.prompt_id)
+        .outerjoin(LLM, LLM.id == ResultRollup.llm_id)
+        .filter(*filters)
+        .all()
+    )
+
+    groups = {}
+    for rollup, version, llm_name in rows:
+        key = (rollup.prompt_id, rollup.llm_id)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                "prompt_id": rollup.prompt_id,
+                "version": version,
+                "llm_id": None if rollup.llm_id == UNKNOWN_LLM_ID else rollup.llm_id,
+                "llm_name": llm_name,
+                "sums": dict.fromkeys(SUM_COLUMNS, 0),
+                "latency_min": None,
+                "latency_max": None,
+                "latency_sketch": QuantileSketch(),
+                "total_tokens_sketch": QuantileSketch(),
+            }
+        for column in SUM_COLUMNS:
+            group["sums"][column] += getattr(rollup, column) or 0
+        if rollup.latency_min is not None:
+            group["latency_min"] = rollup.latency_min if group["latency_min"] is None else min(group["latency_min"], rollup.latency_min)
+            group["latency_max"] = rollup.latency_max if group["latency_max"] is None else max(group["latency_max"], rollup.latency_max)
+        group["latency_sketch"].merge(QuantileSketch.from_dict(rollup.latency_sketch))
+        group["total_tokens_sketch"].merge(QuantileSketch.from_dict(rollup.total_tokens_sketch))
+
+    statistics = []
+    for group in groups.values():
+        sums = group["sums"]
+        if sums["count"] <= 0:
+            continue
+        values = {
+            "prompt_id": group["prompt_id"],
+            "version": group["version"],
+            "llm_id": group["llm_id"],
+            "llm_name": group["llm_name"],
+            "count": sums["count"],
+            "error_count": sums["error_count"],
+            "error_rate": sums["error_count"] / sums["count"],
+            "latency_ms_mean": _mean(sums["latency_sum"], sums["latency_count"]),
+            "latency_ms_stddev": _stddev(sums["latency_sum"], sums["latency_sum_squares"], sums["latency_count"]),
+            "latency_ms_min": group["latency_min"],
+            "latency_ms_max": group["latency_max"],
+            "input_tokens_mean": _mean(sums["input_tokens_sum"], sums["tokens_count"]),
+            "output_tokens_mean": _mean(sums["output_tokens_sum"], sums["tokens_count"]),
+            "total_tokens_mean": _mean(sums["total_tokens_sum"], sums["tokens_count"]),
+            "total_tokens_stddev": _stddev(sums["total_tokens_sum"], sums["total_tokens_sum_squares"], sums["tokens_count"]),
+            "total_tokens_sum": sums["total_tokens_sum"] if sums["tokens_count"] else None,
+            "tokens_per_second_mean": _mean(sums["tokens_per_second_sum"], sums["tokens_per_second_count"]),
+        }
+        for name, fraction in PERCENTILES:
+            values[f"latency_ms_{name}"] = group["latency_sketch"].quantile(fraction)
+            values[f"total_tokens_{name}"] = group["total_tokens_sketch"].quantile(fraction)
+        statistics.append(values)
+
+    statistics.sort(key=lambda values: (-(values["version"] or 0), values["llm_name"] or ""))
+    return statistics
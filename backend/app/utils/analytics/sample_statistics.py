@@ -0,0 +1,110 @@
+from typing import List
+
+import numpy as np
+from scipy import stats
+
+from ...models.result_sample import ResultSample
+from ..similarity.response_similarity import ResponseCorpus
+
+# Two-sided confidence level of the interval around the mean latency
+CONFIDENCE = 0.95
+
+
+def _values(samples, column: str) -> np.ndarray:
+    values = [getattr(sample, column) for sample in samples]
+    return np.array([value for value in values if value is not None], dtype=np.float64)
+
+
+def _mean(values: np.ndarray):
+    return float(values.mean()) if values.size else None
+
+
+def _variance(values: np.ndarray):
+    """Sample variance; undefined for fewer than two values."""
+    return float(values.var(ddof=1)) if values.size > 1 else None
+
+
+def _stability(responses: List[str]) -> dict:
+    """
+    How consistent a prompt's responses are across samples.
+
+    `modal_response_share` is the share of samples giving the most common
+    response, compared after trimming and case folding.
+    `mean_pairwise_similarity` is the mean TF-IDF cosine over all pairs of
+    samples, and `response_length_cv` is the coefficient of variation of
+    their token counts.
+    """
+    if not responses:
+        return {}
+    normalized = np.array([" ".join(response.split()).casefold() for response in responses])
+    _, counts = np.unique(normalized, return_counts=True)
+    summary = {
+        "distinct_responses": int(counts.size),
+        "modal_response_share": float(counts.max() / normalized.size),
+    }
+    if len(responses) > 1:
+        corpus = ResponseCorpus(responses)
+        left, right = np.triu_indices(len(responses), k=1)
+        summary["mean_pairwise_similarity"] = float(corpus.pair_scores(left, right)["cosine"].mean())
+        lengths = corpus.lengths.astype(np.float64)
+        mean_length = lengths.mean()
+        summary["response_length_cv"] = float(lengths.std(ddof=1) / mean_length) if mean_length else 0.0
+    return summary
+
+
+def summarize_samples(samples: List[ResultSample]) -> dict:
+    """
+    Statistics of the samples of one prompt of a test.
+
+    Failed samples only count towards `error_count`. The confidence interval
+    of the mean latency uses Student's t distribution, so it stays honest for
+    the handful of samples a test usually takes.
+    """
+    successful = [sample for sample in samples if sample.error is None]
+    latency = _values(successful, "latency_ms")
+    output_tokens = _values(successful, "output_tokens")
+    total_tokens = _values(successful, "total_tokens")
+
+    summary = {
+        "samples": len(samples),
+        "error_count": len(samples) - len(successful),
+        "latency_ms_mean": _mean(latency),
+        "latency_ms_stddev": None,
+        "latency_ms_p50": None,
+        "latency_ms_p95": None,
+        "latency_ms_ci95_low": None,
+        "latency_ms_ci95_high": None,
+        "output_tokens_mean": _mean(output_tokens),
+        "output_tokens_variance": _variance(output_tokens),
+        "total_tokens_mean": _mean(total_tokens),
+        "total_tokens_variance": _variance(total_tokens),
+    }
+    if latency.size:
+        summary["latency_ms_p50"], summary["latency_ms_p95"] = (
+            float(value) for value in np.percentile(latency, [50, 95])
+        )
+    if latency.size > 1:
+        stddev = latency.std(ddof=1)
+        margin = stats.t.ppf((1 + CONFIDENCE) / 2, latency.size - 1) * stddev / np.sqrt(latency.size)
+        summary["latency_ms_stddev"] = float(stddev)
+        summary["latency_ms_ci95_low"] = float(latency.mean() - margin)
+        summary["latency_ms_ci95_high"] = float(latency.mean() + margin)
+    summary.update(_stability([sample.llm_response or "" for sample in successful]))
+    return summary
+
+
+def sample_summaries(db, test_id) -> List[dict]:
+    """Sample statistics of each prompt of a test, for the prompts it sampled."""
+    samples = (
+        db.query(ResultSample)
+        .filter(ResultSample.test_id == test_id)
+        .order_by(ResultSample.prompt_id, ResultSample.sample)
+        .all()
+    )
+    by_prompt = {}
+    for sample in samples:
+        by_prompt.setdefault(sample.prompt_id, []).append(sample)
+    return [
+        {"prompt_id": prompt_id, "llm_id": prompt_samples[0].llm_id, **summarize_samples(prompt_samples)}
+        for prompt_id, prompt_samples in by_prompt.items()
+    ]
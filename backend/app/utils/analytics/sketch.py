@@ -0,0 +1,100 @@
+import math
+from typing import Dict, Iterable, Optional
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch over non-negative values (DDSketch style).
+
+    Values fall into logarithmic buckets whose bounds grow by a factor gamma,
+    so any quantile is returned within the relative accuracy. Sketches of
+    disjoint data merge exactly by adding bucket counts, which is what lets
+    per-day rollups be combined into any date range.
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY, buckets: Dict[int, int] = None, zero_count: int = 0):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = dict(buckets or {})
+        self.zero_count = zero_count
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.buckets.values())
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        # Midpoint of the bucket (gamma^(i-1), gamma^i], in relative terms
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1):
+        """Add a value; a negative count removes previously added values."""
+        if value <= 0:
+            self.zero_count += count
+            return
+        index = self._index(value)
+        remaining = self.buckets.get(index, 0) + count
+        if remaining > 0:
+            self.buckets[index] = remaining
+        else:
+            self.buckets.pop(index, None)
+
+    def update(self, values: Iterable[Optional[float]]):
+        for value in values:
+            if value is not None:
+                self.add(float(value))
+
+    def merge(self, other: "QuantileSketch"):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Sketches with different accuracies can't be merged")
+        self.zero_count += other.zero_count
+        for index, count in other.buckets.items():
+            remaining = self.buckets.get(index, 0) + count
+            if remaining > 0:
+                self.buckets[index] = remaining
+            else:
+                self.buckets.pop(index, None)
+
+    def _value_at_rank(self, rank: int) -> float:
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return self._value(index)
+        return self._value(max(self.buckets))
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Quantile interpolated between the two nearest ranks, like percentile_cont."""
+        count = self.count
+        if count <= 0:
+            return None
+        position = fraction * (count - 1)
+        lower = math.floor(position)
+        low_value = self._value_at_rank(lower)
+        if position == lower:
+            return low_value
+        return low_value + (self._value_at_rank(lower + 1) - low_value) * (position - lower)
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "zero_count": self.zero_count,
+            "buckets": {str(index): count for index, count in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "QuantileSketch":
+        if not data:
+            return cls()
+        return cls(
+            relative_accuracy=data.get("relative_accuracy", DEFAULT_RELATIVE_ACCURACY),
+            buckets={int(index): count for index, count in data.get("buckets", {}).items()},
+            zero_count=data.get("zero_count", 0),
+        )
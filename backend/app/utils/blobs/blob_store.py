@@ -0,0 +1,192 @@
+import hashlib
+import os
+import re
+import time
+import uuid
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ...models.image_blob import ImageBlob
+from ...settings.settings import settings
+from ...utils.logger.logger import logger
+
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+BLOB_NAME = re.compile(r"[0-9a-f]{64}")
+
+
+def sniff_content_type(data: bytes) -> str:
+    """Content type of an image from its magic bytes."""
+    for signature, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+class LocalBlobStore:
+    """Files named by the SHA-256 of their content, sharded by hash prefix under a root directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @staticmethod
+    def hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def path(self, blob_hash: str) -> str:
+        return os.path.join(self.root, blob_hash[:2], blob_hash[2:4], blob_hash)
+
+    def exists(self, blob_hash: str) -> bool:
+        return os.path.isfile(self.path(blob_hash))
+
+    def write(self, data: bytes) -> str:
+        """
+        Store data once. Writing content that is already present only touches
+        the file, so a sweep running meanwhile sees it as recently written.
+        """
+        blob_hash = self.hash(data)
+        path = self.path(blob_hash)
+        try:
+            os.utime(path)
+            return blob_hash
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, path)
+        return blob_hash
+
+    def read(self, blob_hash: str) -> bytes:
+        with open(self.path(blob_hash), "rb") as f:
+            return f.read()
+
+    def remove(self, blob_hash: str):
+        try:
+            os.remove(self.path(blob_hash))
+        except FileNotFoundError:
+            pass
+
+
+class ImageStore:
+    """
+    Deduplicated test images.
+
+    Bytes live in a content-addressed blob store; the image_blobs table counts
+    the tests referencing each hash. Releasing the last reference leaves the
+    file in place: `sweep` removes files nothing references any more.
+    """
+
+    def __init__(self, blobs: LocalBlobStore):
+        self.blobs = blobs
+
+    def add(self, db, data: bytes, content_type: str = None) -> str:
+        """Store an image and take a reference to it in the caller's transaction."""
+        blob_hash = self.blobs.write(data)
+        row = {
+            "hash": blob_hash,
+            "content_type": content_type or sniff_content_type(data),
+            "size": len(data),
+            "ref_count": 1,
+        }
+
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = (postgresql if dialect == "postgresql" else sqlite).insert(ImageBlob)
+            db.execute(
+                insert.values(**row).on_conflict_do_update(
+                    index_elements=[ImageBlob.hash],
+                    set_={"ref_count": ImageBlob.ref_count + 1},
+                )
+            )
+        else:
+            blob = db.query(ImageBlob).filter(ImageBlob.hash == blob_hash).with_for_update().first()
+            if blob is None:
+                db.add(ImageBlob(**row))
+            else:
+                blob.ref_count += 1
+            db.flush()
+        return blob_hash
+
+    def release(self, db, blob_hash: str):
+        """Drop a reference in the caller's transaction; the file is left to `sweep`."""
+        if not blob_hash:
+            return
+        db.query(ImageBlob).filter(ImageBlob.hash == blob_hash).update(
+            {ImageBlob.ref_count: ImageBlob.ref_count - 1}, synchronize_session=False
+        )
+
+    def get(self, db, blob_hash: str):
+        return db.query(ImageBlob).filter(ImageBlob.hash == blob_hash).first()
+
+    def read(self, blob_hash: str) -> bytes:
+        return self.blobs.read(blob_hash)
+
+    def _referenced(self, db, blob_hash: str) -> bool:
+        return db.query(ImageBlob.hash).filter(ImageBlob.hash == blob_hash, ImageBlob.ref_count > 0).first() is not None
+
+    def sweep(self, db, min_age_seconds: float = None) -> int:
+        """
+        Remove blobs no test references: rows whose count dropped to zero, and
+        files without a referenced row, such as those of rolled back uploads.
+
+        Files written or touched in the last min_age_seconds are kept, as their
+        upload may not have committed yet. A file is moved aside before it is
+        deleted and its row checked again, so an `add` racing the sweep either
+        touches the file in time to keep it or writes it anew.
+        """
+        if min_age_seconds is None:
+            min_age_seconds = settings.IMAGE_SWEEP_MIN_AGE_SECONDS
+        # Re-checked per row by the DELETE, so a reference taken meanwhile survives
+        db.query(ImageBlob).filter(ImageBlob.ref_count <= 0).delete(synchronize_session=False)
+        db.commit()
+
+        cutoff = time.time() - min_age_seconds
+        removed = 0
+        for directory, _, files in os.walk(self.blobs.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                    if not BLOB_NAME.fullmatch(name):
+                        # Leftover of an interrupted write or sweep
+                        os.remove(path)
+                        removed += 1
+                        continue
+                    if self._referenced(db, name):
+                        continue
+                    swept_path = f"{path}.{uuid.uuid4().hex}.swept"
+                    os.rename(path, swept_path)
+                except FileNotFoundError:
+                    continue
+                if os.path.getmtime(swept_path) >= cutoff or self._referenced(db, name):
+                    os.replace(swept_path, path)
+                    continue
+                os.remove(swept_path)
+                removed += 1
+        db.commit()
+        if removed:
+            logger.info(f"Removed {removed} unreferenced image blobs")
+        return removed
+
+
+image_store = ImageStore(LocalBlobStore(settings.IMAGE_STORE_DIR))
+
+
+if __name__ == "__main__":
+    from ...db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        image_store.sweep(db)
+    finally:
+        db.close()
@@ -0,0 +1,47 @@
+"""
+Move image bytes of existing tests into the image store.
+
+Run after migrations/006_image_blob_store.sql and before
+migrations/007_drop_test_image_bytes.sql:
+
+    python -m app.utils.blobs.migrate_test_images
+"""
+from sqlalchemy import text
+
+from ...db.database import SessionLocal
+from ...utils.logger.logger import logger
+from .blob_store import image_store
+
+BATCH_SIZE = 100
+
+
+def migrate_test_images(db, batch_size: int = BATCH_SIZE) -> int:
+    """Store tests.image in batches, setting image_hash and clearing the bytes. Safe to re-run."""
+    migrated = 0
+    while True:
+        rows = db.execute(
+            text(
+                "SELECT id, image FROM tests "
+                "WHERE image IS NOT NULL AND image_hash IS NULL LIMIT :limit"
+            ),
+            {"limit": batch_size},
+        ).fetchall()
+        if not rows:
+            return migrated
+        for test_id, image in rows:
+            image_hash = image_store.add(db, bytes(image))
+            db.execute(
+                text("UPDATE tests SET image_hash = :image_hash, image = NULL WHERE id = :id"),
+                {"image_hash": image_hash, "id": test_id},
+            )
+        db.commit()
+        migrated += len(rows)
+        logger.info(f"Moved {migrated} test images to the image store")
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        migrate_test_images(db)
+    finally:
+        db.close()
@@ -0,0 +1,196 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, List, Optional
+
+import regex
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from ..scoring.reference_scoring import validate_pattern
+
+FORMATS = ("csv", "jsonl")
+# Record keys accepted for the input of an item
+INPUT_KEYS = ("user_input", "input")
+
+
+class DatasetFileError(ValueError):
+    """The uploaded file isn't a valid dataset; the message says where."""
+
+
+class MultipartFile:
+    """
+    The bytes of one file field of a multipart body, as they arrive.
+
+    Nothing is spooled: data is handed on chunk by chunk. Other, small fields
+    are collected in `fields`, complete once the body has been read.
+    """
+
+    def __init__(self, content_type: str, field_name: str = "file"):
+        _, params = parse_options_header(content_type)
+        if b"boundary" not in params:
+            raise DatasetFileError("Expected a multipart/form-data body")
+        self.field_name = field_name
+        self.filename = None
+        self.found = False
+        self.fields = {}
+        self._boundary = params[b"boundary"]
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._part_name = None
+        self._part_data = b""
+        self._file_data = []
+
+    def _on_part_begin(self):
+        self._disposition = b""
+        self._part_name = None
+        self._part_data = b""
+
+    def _on_header_field(self, data, start, end):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        self._part_name = options.get(b"name", b"").decode("utf-8", "replace")
+        if self._part_name == self.field_name and not self.found:
+            self.found = True
+            self.filename = options.get(b"filename", b"").decode("utf-8", "replace") or None
+
+    def _on_part_data(self, data, start, end):
+        if self._part_name == self.field_name:
+            self._file_data.append(data[start:end])
+        else:
+            self._part_data += data[start:end]
+
+    def _on_part_end(self):
+        if self._part_name != self.field_name:
+            self.fields[self._part_name] = self._part_data.decode("utf-8", "replace")
+
+    async def chunks(self, stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        parser = MultipartParser(self._boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+        async for chunk in stream:
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise DatasetFileError(f"Malformed multipart body: {e}")
+            for data in self._file_data:
+                yield data
+            self._file_data.clear()
+        parser.finalize()
+        if not self.found:
+            raise DatasetFileError(f"Missing the '{self.field_name}' file field")
+
+
+def detect_format(requested: Optional[str], filename: Optional[str]) -> str:
+    dataset_format = (requested or "").lower()
+    if not dataset_format and filename:
+        extension = filename.rsplit(".", 1)[-1].lower()
+        dataset_format = {"ndjson": "jsonl"}.get(extension, extension)
+    if dataset_format not in FORMATS:
+        raise DatasetFileError(f"Unsupported dataset format '{dataset_format}'; use csv or jsonl")
+    return dataset_format
+
+
+def _item(record: dict, line: int) -> dict:
+    user_input = next((record[key] for key in INPUT_KEYS if record.get(key) is not None), None)
+    if not isinstance(user_input, str):
+        raise DatasetFileError(f"Line {line}: expected a 'user_input' string")
+    item = {"user_input": user_input}
+    for key in ("expected_answer", "expected_pattern"):
+        value = record.get(key)
+        item[key] = None if value in (None, "") else str(value)
+    try:
+        validate_pattern(item["expected_pattern"])
+    except regex.error as e:
+        raise DatasetFileError(f"Line {line}: invalid expected_pattern: {e}")
+    return item
+
+
+class DatasetRecords:
+    """
+    Incremental parser of CSV or JSONL dataset files into items.
+
+    Bytes are fed as they arrive and complete records come out; only the
+    current partial line is held. CSV needs a header row naming the columns,
+    and a record only ends at a newline outside quotes.
+    """
+
+    def __init__(self, dataset_format: str):
+        self.format = dataset_format
+        self.line = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._pending = ""
+        self._record = ""
+        self._record_line = 0
+        self._header = None
+
+    def feed(self, data: bytes) -> List[dict]:
+        try:
+            text = self._decoder.decode(data)
+        except UnicodeDecodeError:
+            raise DatasetFileError(f"Line {self.line + 1}: not valid UTF-8")
+        *lines, self._pending = (self._pending + text).split("\n")
+        return [item for item in (self._line(line) for line in lines) if item is not None]
+
+    def close(self) -> List[dict]:
+        items = self.feed(b"")
+        try:
+            pending = self._pending + self._decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            raise DatasetFileError(f"Line {self.line + 1}: not valid UTF-8")
+        self._pending = ""
+        if pending:
+            item = self._line(pending)
+            if item is not None:
+                items.append(item)
+        if self._record:
+            raise DatasetFileError(f"Line {self._record_line}: unterminated quoted field")
+        return items
+
+    def _line(self, line: str) -> Optional[dict]:
+        self.line += 1
+        if self.format == "jsonl":
+            if not line.strip():
+                return None
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise DatasetFileError(f"Line {self.line}: {e}")
+            if not isinstance(record, dict):
+                raise DatasetFileError(f"Line {self.line}: expected a JSON object")
+            return _item(record, self.line)
+
+        if not self._record:
+            self._record_line = self.line
+        self._record += line + "\n"
+        # Quotes are escaped by doubling, so an odd count means a quoted field continues
+        if self._record.count('"') % 2:
+            return None
+        record, self._record = self._record, ""
+        if not record.strip():
+            return None
+        [values] = list(csv.reader([record.rstrip("\r\n")]))
+        if self._header is None:
+            self._header = [value.strip() for value in values]
+            if not set(INPUT_KEYS) & set(self._header):
+                raise DatasetFileError("Line 1: the header needs a 'user_input' column")
+            return None
+        return _item(dict(zip(self._header, values)), self._record_line)
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, or_, update
+
+from ...models.test_job import TestJob
+from ...settings.settings import settings
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def enqueue(db, test, kind: str, payload: dict, total: int, dataset_run=None) -> TestJob:
+    """Add a job for a test or a dataset run; it becomes visible to workers when the caller commits."""
+    job = TestJob(
+        test_id=test.id if test is not None else None,
+        dataset_run_id=dataset_run.id if dataset_run is not None else None,
+        kind=kind, payload=payload, total=total, status=QUEUED, run_after=datetime.utcnow(),
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+
+def claim_job(db, worker_id: str, lease_seconds: int = None, skip_kinds=()) -> Optional[TestJob]:
+    """
+    Take the oldest runnable job and lease it to a worker, committing the claim.
+
+    Runnable means queued and due, or running with an expired lease, i.e. its
+    worker died, and not of one of `skip_kinds`. SKIP LOCKED lets any number
+    of workers poll at once without blocking on, or taking, the same job.
+    """
+    lease_seconds = lease_seconds or settings.JOB_LEASE_SECONDS
+    now = datetime.utcnow()
+    query = db.query(TestJob).filter(or_(
+        and_(TestJob.status == QUEUED, TestJob.run_after <= now),
+        and_(TestJob.status == RUNNING, TestJob.locked_until < now),
+    ))
+    if skip_kinds:
+        query = query.filter(TestJob.kind.notin_(skip_kinds))
+    job = (
+        query
+        .order_by(TestJob.creation_date)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        db.rollback()
+        return None
+    job.status = RUNNING
+    job.locked_by = worker_id
+    job.locked_until = now + timedelta(seconds=lease_seconds)
+    job.attempts += 1
+    job.started_at = job.started_at or now
+    db.commit()
+    return job
+
+
+def extend_lease(db, job_id, worker_id: str, completed: int = 0, lease_seconds: int = None) -> bool:
+    """
+    Renew a worker's lease on a running job, adding to its completed count.
+
+    Runs in the caller's transaction. Returns False if the lease was lost to
+    another worker, in which case the caller must roll back.
+    """
+    lease_seconds = lease_seconds or settings.JOB_LEASE_SECONDS
+    result = db.execute(
+        update(TestJob)
+        .where(TestJob.id == job_id, TestJob.locked_by == worker_id, TestJob.status == RUNNING)
+        .values(
+            locked_until=datetime.utcnow() + timedelta(seconds=lease_seconds),
+            completed=TestJob.completed + completed,
+        )
+    )
+    return result.rowcount == 1
+
+
+def retry_later(db, job: TestJob, error: str):
+    """Put a job back in the queue after a backoff; its checkpoints are kept."""
+    delay = settings.JOB_RETRY_DELAY_SECONDS * 2 ** max(job.attempts - 1, 0)
+    job.status = QUEUED
+    job.locked_by = None
+    job.locked_until = None
+    job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+    job.error = error
+
+
+def finish(db, job: TestJob, status: str, error: Optional[str] = None):
+    job.status = status
+    job.locked_by = None
+    job.locked_until = None
+    job.error = error
+    job.finished_at = datetime.utcnow()
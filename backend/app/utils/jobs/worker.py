@@ -0,0 +1,342 @@
+"""
+Run queued test jobs.
+
+Start any number of workers, on any number of nodes, against the same
+database:
+
+    python -m app.utils.jobs.worker
+
+Image jobs read the test's image from IMAGE_STORE_DIR, so a worker on
+another node than the API needs that directory on shared storage, or
+WORKER_IMAGE_JOBS=false to leave image jobs to workers that have it.
+"""
+import asyncio
+import os
+import socket
+import uuid
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from ...db.database import SessionLocal
+from ...models.prompt import Prompt
+from ...models.test import Test, test_prompt_association
+from ...models.test_job import TestJob
+from ...settings.settings import settings
+from ...utils.logger.logger import logger
+from ..analytics.rollups import record_results
+from ..blobs.blob_store import image_store
+from ..llm.response_cache import response_cache
+from ..runs.runner import ensure_prompt_tokens, load_prompt_llms, run_image_prompts, run_text_pairs, run_text_prompts
+from ..scoring.reference_scoring import score_results
+from .queue import FAILED, SUCCEEDED, claim_job, extend_lease, finish, retry_later
+
+
+class LeaseLost(Exception):
+    """Another worker took the job over after this worker's lease expired."""
+
+
+def _load_run(db, test_id, prompt_ids):
+    """
+    The test and the prompts it still has to run, detached from the session.
+
+    Prompts with a stored result were checkpointed by an earlier attempt and
+    are skipped. Detached objects are not expired by the commits of later
+    checkpoints, so the runner can read them while those commits happen.
+    """
+    test = db.get(Test, test_id)
+    if test is None:
+        return None, []
+    done = {
+        prompt_id
+        for (prompt_id,) in db.query(test_prompt_association.c.prompt_id)
+        .filter(test_prompt_association.c.test_id == test_id)
+    }
+    prompts = [
+        prompt
+        for prompt in db.query(Prompt).filter(Prompt.id.in_(prompt_ids)).all()
+        if prompt.id not in done
+    ]
+    return test, prompts
+
+
+def _load_dataset_run(db, dataset_run_id, prompt_ids):
+    """
+    The tests of a dataset run and the (test, prompt) pairs it still has to
+    run, skipping pairs checkpointed by an earlier attempt.
+    """
+    tests = db.query(Test).filter(Test.dataset_run_id == dataset_run_id).order_by(Test.id).all()
+    prompts = db.query(Prompt).filter(Prompt.id.in_(prompt_ids)).all()
+    done = set(
+        db.query(test_prompt_association.c.test_id, test_prompt_association.c.prompt_id)
+        .join(Test, Test.id == test_prompt_association.c.test_id)
+        .filter(Test.dataset_run_id == dataset_run_id)
+    )
+    pairs = [
+        (test, prompt)
+        for test in tests
+        for prompt in prompts
+        if (test.id, prompt.id) not in done
+    ]
+    return tests, prompts, pairs
+
+
+def _detach(db, instances):
+    db.flush()
+    for instance in instances:
+        db.expunge(instance)
+    db.commit()
+
+
+def _checkpoint(db, job_id, worker_id: str, tests: dict, entries: list):
+    """
+    Store successful results, given as (row, cache entry) pairs, and renew
+    the lease, in one transaction.
+    """
+    if not extend_lease(db, job_id, worker_id, completed=len(entries)):
+        db.rollback()
+        raise LeaseLost()
+    rows_by_test = {}
+    for row, _ in entries:
+        rows_by_test.setdefault(row["test_id"], []).append(row)
+    for test_id, rows in rows_by_test.items():
+        score_results(rows, tests[test_id].expected_answer, tests[test_id].expected_pattern)
+    cache_entries = [cache_entry for _, cache_entry in entries if cache_entry is not None]
+    if cache_entries:
+        response_cache.put_many(db, cache_entries)
+    record_results(db, [row for row, _ in entries])
+    db.commit()
+
+
+def _heartbeat_once(db, job_id, worker_id: str):
+    if not extend_lease(db, job_id, worker_id):
+        db.rollback()
+        raise LeaseLost()
+    db.commit()
+
+
+def _complete(db, job_id, worker_id: str, failures: list):
+    """
+    Settle a job after a pass over its remaining prompts.
+
+    Failed prompts are retried on a later attempt; on the last attempt they
+    are stored as failed results and the job ends, failed only if its test,
+    or every test of its dataset run, has no successful result at all.
+    """
+    job = db.query(TestJob).filter(TestJob.id == job_id).with_for_update().one()
+    if job.locked_by != worker_id:
+        db.rollback()
+        raise LeaseLost()
+    if failures and job.attempts < settings.JOB_MAX_ATTEMPTS:
+        retry_later(db, job, failures[0]["error"])
+    else:
+        if failures:
+            record_results(db, failures)
+            job.completed += len(failures)
+        successes = db.query(test_prompt_association.c.test_id).filter(test_prompt_association.c.error.is_(None))
+        if job.dataset_run_id is not None:
+            successes = successes.join(Test, Test.id == test_prompt_association.c.test_id).filter(
+                Test.dataset_run_id == job.dataset_run_id
+            )
+        else:
+            successes = successes.filter(test_prompt_association.c.test_id == job.test_id)
+        succeeded = successes.first() is not None
+        finish(db, job, SUCCEEDED if succeeded else FAILED, failures[0]["error"] if failures else None)
+    db.commit()
+
+
+def _abandon(db, job_id, worker_id: str, error: str):
+    """Retry or fail a job whose run raised, unless another worker holds it by now."""
+    db.rollback()
+    job = db.query(TestJob).filter(TestJob.id == job_id).with_for_update().one_or_none()
+    if job is None or job.locked_by != worker_id:
+        db.rollback()
+        return
+    if job.attempts < settings.JOB_MAX_ATTEMPTS:
+        retry_later(db, job, error)
+    else:
+        finish(db, job, FAILED, error)
+    db.commit()
+
+
+async def _run_test(db, job_id, worker_id: str, test_id, kind: str, payload: dict, lock: asyncio.Lock) -> list:
+    """Run the prompts of a test job that have no result yet, checkpointing each one as it succeeds."""
+    tests = {}
+
+    async def checkpoint(row, cache_entry):
+        # Failed calls are retried by the next attempt rather than stored now
+        if row["error"] is None:
+            async with lock:
+                await run_in_threadpool(_checkpoint, db, job_id, worker_id, tests, [(row, cache_entry)])
+
+    prompt_ids = [uuid.UUID(prompt_id) for prompt_id in payload["prompt_ids"]]
+    # The heartbeat shares the session, so every use of it holds the lock
+    async with lock:
+        test, prompts = await run_in_threadpool(_load_run, db, test_id, prompt_ids)
+        if test is None:
+            raise LookupError(f"Test {test_id} no longer exists")
+        tests[test.id] = test
+        if not prompts:
+            return []
+
+        llms = await load_prompt_llms(db, prompts)
+        await run_in_threadpool(ensure_prompt_tokens, prompts, llms)
+        await run_in_threadpool(_detach, db, [test, *prompts])
+    if kind == "image":
+        image = await run_in_threadpool(image_store.read, test.image_hash)
+        rows = await run_image_prompts(test, prompts, llms, image, on_result=checkpoint)
+    else:
+        rows, _ = await run_text_prompts(
+            db, test, prompts, llms,
+            stream=payload.get("stream", False),
+            use_cache=payload.get("use_cache"),
+            on_result=checkpoint,
+            lock=lock,
+        )
+    return [row for row in rows if row["error"] is not None]
+
+
+async def _run_dataset(db, job_id, worker_id: str, dataset_run_id, payload: dict, lock: asyncio.Lock) -> list:
+    """
+    Run the pending pairs of a dataset run under one DATASET_RUN_MAX_CONCURRENCY
+    budget, DATASET_RUN_BATCH_SIZE pairs at a time.
+
+    Successful results are stored DATASET_RUN_FLUSH_SIZE at a time, each
+    batch a checkpoint that shows as progress. Returns the failed results.
+    """
+    prompt_ids = [uuid.UUID(prompt_id) for prompt_id in payload["prompt_ids"]]
+    # The heartbeat shares the session, so every use of it holds the lock
+    async with lock:
+        tests, prompts, pairs = await run_in_threadpool(_load_dataset_run, db, dataset_run_id, prompt_ids)
+        if not pairs:
+            return []
+        tests_by_id = {test.id: test for test in tests}
+
+        llms = await load_prompt_llms(db, prompts)
+        await run_in_threadpool(ensure_prompt_tokens, prompts, llms)
+        await run_in_threadpool(_detach, db, [*tests, *prompts])
+
+    pending = []
+    failures = []
+
+    async def flush():
+        entries = pending[:]
+        pending.clear()
+        if entries:
+            async with lock:
+                await run_in_threadpool(_checkpoint, db, job_id, worker_id, tests_by_id, entries)
+
+    async def collect(row, cache_entry):
+        if row["error"] is not None:
+            failures.append(row)
+            return
+        pending.append((row, cache_entry))
+        if len(pending) >= settings.DATASET_RUN_FLUSH_SIZE:
+            await flush()
+
+    for start in range(0, len(pairs), settings.DATASET_RUN_BATCH_SIZE):
+        batch = pairs[start:start + settings.DATASET_RUN_BATCH_SIZE]
+        await run_text_pairs(
+            db, batch, llms,
+            stream=payload.get("stream", False),
+            use_cache=payload.get("use_cache"),
+            on_result=collect,
+            concurrency=settings.DATASET_RUN_MAX_CONCURRENCY,
+            lock=lock,
+        )
+        await flush()
+    return failures
+
+
+async def run_job(db, job: TestJob, worker_id: str):
+    """Run what a claimed job has left to do, checkpointing results as they succeed."""
+    job_id, test_id, dataset_run_id = job.id, job.test_id, job.dataset_run_id
+    kind, payload = job.kind, dict(job.payload)
+    lock = asyncio.Lock()
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+            async with lock:
+                await run_in_threadpool(_heartbeat_once, db, job_id, worker_id)
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    try:
+        if kind == "dataset":
+            failures = await _run_dataset(db, job_id, worker_id, dataset_run_id, payload, lock)
+        else:
+            failures = await _run_test(db, job_id, worker_id, test_id, kind, payload, lock)
+
+        async with lock:
+            await run_in_threadpool(_complete, db, job_id, worker_id, failures)
+    except LeaseLost:
+        async with lock:
+            await run_in_threadpool(db.rollback)
+        logger.warning(f"Lost the lease on job {job_id}; another worker resumes it")
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {type(e).__name__}: {e}")
+        async with lock:
+            await run_in_threadpool(_abandon, db, job_id, worker_id, f"{type(e).__name__}: {e}")
+    finally:
+        heartbeat_task.cancel()
+
+
+def check_image_store():
+    """Fail fast if this worker would run image jobs without the image store."""
+    if settings.WORKER_IMAGE_JOBS and not os.path.isdir(image_store.blobs.root):
+        raise RuntimeError(
+            f"Image store {os.path.abspath(image_store.blobs.root)} not found. Point IMAGE_STORE_DIR "
+            "at the API's image store, or set WORKER_IMAGE_JOBS=false to only run text jobs."
+        )
+
+
+async def run_next_job(db, worker_id: str) -> Optional[uuid.UUID]:
+    """Claim and run one job; returns its id, or None if no job was runnable."""
+    skip_kinds = () if settings.WORKER_IMAGE_JOBS else ("image",)
+    job = await run_in_threadpool(claim_job, db, worker_id, skip_kinds=skip_kinds)
+    if job is None:
+        return None
+    job_id = job.id
+    await run_job(db, job, worker_id)
+    return job_id
+
+
+async def sweep_images(session_factory=SessionLocal):
+    """Sweep unreferenced images every IMAGE_SWEEP_INTERVAL_SECONDS, with a session of its own."""
+    while True:
+        await asyncio.sleep(settings.IMAGE_SWEEP_INTERVAL_SECONDS)
+        db = session_factory()
+        try:
+            await run_in_threadpool(image_store.sweep, db)
+        except Exception as e:
+            logger.error(f"Image sweep failed: {e}")
+        finally:
+            db.close()
+
+
+async def work(session_factory=SessionLocal, worker_id: Optional[str] = None):
+    """
+    Poll for jobs forever, running up to JOB_WORKER_CONCURRENCY at a time,
+    each with its own session, and sweep unreferenced images meanwhile.
+    """
+    check_image_store()
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+    async def slot(number: int):
+        db = session_factory()
+        try:
+            while True:
+                if await run_next_job(db, f"{worker_id}:{number}") is None:
+                    await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+        finally:
+            db.close()
+
+    logger.info(f"Worker {worker_id} polling for test jobs")
+    await asyncio.gather(
+        sweep_images(session_factory),
+        *(slot(number) for number in range(settings.JOB_WORKER_CONCURRENCY)),
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(work())
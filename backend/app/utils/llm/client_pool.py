@@ -0,0 +1,121 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import boto3
+from botocore.config import Config
+
+from ...settings.settings import settings
+
+
+class BedrockClientPool:
+    """
+    Registry of warm, reusable bedrock-runtime clients.
+
+    Creating a boto3 client loads the botocore service model and opens new
+    TLS connections, so clients are built once per credential set and shared
+    between requests. botocore clients are thread-safe once created.
+    """
+
+    def __init__(self, max_pool_connections: int, idle_ttl_seconds: int, max_size: int, read_timeout: int = 60):
+        """
+        Parameters:
+            max_pool_connections (int): Size of the urllib3 connection pool of each client.
+            read_timeout (int): Socket read timeout in seconds, bounding how long a call can block a worker.
+            idle_ttl_seconds (int): Clients unused for longer than this are evicted.
+            max_size (int): Maximum number of clients kept; least recently used go first.
+        """
+        self.max_pool_connections = max_pool_connections
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_size = max_size
+        self.read_timeout = read_timeout
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _credentials_key(llm):
+        secret = llm.secret_access_key or ""
+        return (
+            llm.access_key,
+            hashlib.sha256(secret.encode("utf-8")).hexdigest(),
+            llm.aws_region,
+        )
+
+    def _key(self, llm):
+        return self._credentials_key(llm) + (self.max_pool_connections, self.read_timeout)
+
+    def _build_client(self, llm):
+        session = boto3.session.Session(
+            aws_access_key_id=llm.access_key,
+            aws_secret_access_key=llm.secret_access_key,
+            region_name=llm.aws_region,
+        )
+        return session.client(
+            service_name="bedrock-runtime",
+            config=Config(
+                max_pool_connections=self.max_pool_connections,
+                read_timeout=self.read_timeout,
+                # Throttling is retried by the invoker, which also adapts the send rate
+                retries={"total_max_attempts": 1},
+            ),
+        )
+
+    def _evict_idle(self, now: float):
+        expired = [
+            key for key, (_, last_used) in self._clients.items()
+            if now - last_used > self.idle_ttl_seconds
+        ]
+        for key in expired:
+            del self._clients[key]
+
+    def get_client(self, llm):
+        """
+        Return a pooled bedrock-runtime client for the credentials of an LLM,
+        building one if none is cached yet.
+        """
+        key = self._key(llm)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.get(key)
+            if entry is not None:
+                self._clients[key] = (entry[0], now)
+                self._clients.move_to_end(key)
+                return entry[0]
+
+        # Build outside the lock so a cold start doesn't block warm lookups
+        client = self._build_client(llm)
+
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                client = entry[0]
+            self._clients[key] = (client, now)
+            self._clients.move_to_end(key)
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+        return client
+
+    def invalidate(self, llm):
+        """Drop every client built from the credentials of an LLM."""
+        credentials_key = self._credentials_key(llm)
+        with self._lock:
+            for key in [k for k in self._clients if k[:3] == credentials_key]:
+                del self._clients[key]
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._clients)
+
+
+bedrock_clients = BedrockClientPool(
+    max_pool_connections=settings.BEDROCK_MAX_POOL_CONNECTIONS,
+    idle_ttl_seconds=settings.BEDROCK_CLIENT_IDLE_TTL_SECONDS,
+    max_size=settings.BEDROCK_CLIENT_POOL_MAX_SIZE,
+    read_timeout=settings.BEDROCK_READ_TIMEOUT_SECONDS,
+)
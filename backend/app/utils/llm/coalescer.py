@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+
+class RequestCoalescer:
+    """
+    Single-flight deduplication of identical in-flight calls.
+
+    The first caller for a key starts the call; callers arriving while it is
+    still running await the same task and share its result or error. Waiters
+    are shielded from each other, so one cancelled caller doesn't cancel the
+    call for the rest.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key, factory):
+        """Return the result of `factory()`, sharing it with concurrent callers of the same key."""
+        # Tasks belong to one event loop, so flights are tracked per loop
+        flight_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            task = self._in_flight.get(flight_key)
+            if task is not None:
+                self.coalesced += 1
+            else:
+                self.calls += 1
+                task = asyncio.ensure_future(factory())
+                self._in_flight[flight_key] = task
+                task.add_done_callback(lambda done: self._forget(flight_key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, flight_key, task):
+        with self._lock:
+            if self._in_flight.get(flight_key) is task:
+                del self._in_flight[flight_key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls = 0
+            self.coalesced = 0
+
+
+converse_coalescer = RequestCoalescer()
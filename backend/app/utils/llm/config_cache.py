@@ -0,0 +1,87 @@
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from ...models.llm import LLM
+from ...settings.settings import settings
+
+
+@dataclass(frozen=True)
+class LLMConfig:
+    """Immutable snapshot of the LLM columns needed to invoke a model."""
+
+    id: uuid.UUID
+    name: str
+    llm_model_id: Optional[str]
+    aws_region: Optional[str]
+    access_key: Optional[str]
+    secret_access_key: Optional[str]
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+
+    @classmethod
+    def from_model(cls, llm: LLM) -> "LLMConfig":
+        return cls(
+            id=llm.id,
+            name=llm.name,
+            llm_model_id=llm.llm_model_id,
+            aws_region=llm.aws_region,
+            access_key=llm.access_key,
+            secret_access_key=llm.secret_access_key,
+            requests_per_minute=llm.requests_per_minute,
+            tokens_per_minute=llm.tokens_per_minute,
+        )
+
+
+class LLMConfigCache:
+    """
+    In-process cache of LLM configuration keyed by id.
+
+    The LLM endpoints write through it on create and update and evict on
+    delete. A TTL bounds how long another worker's edits can go unseen.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._configs = {}
+        self._lock = threading.Lock()
+
+    def put(self, llm: LLM) -> LLMConfig:
+        config = LLMConfig.from_model(llm)
+        with self._lock:
+            self._configs[config.id] = (config, time.monotonic() + self.ttl_seconds)
+        return config
+
+    def invalidate(self, llm_id):
+        with self._lock:
+            self._configs.pop(llm_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._configs.clear()
+
+    def get_many(self, db, llm_ids) -> dict:
+        """Return configs for the given ids, loading any misses in one query."""
+        now = time.monotonic()
+        found = {}
+        missing = set()
+        with self._lock:
+            for llm_id in set(llm_ids):
+                entry = self._configs.get(llm_id)
+                if entry is not None and entry[1] > now:
+                    found[llm_id] = entry[0]
+                else:
+                    missing.add(llm_id)
+
+        if missing:
+            for llm in db.query(LLM).filter(LLM.id.in_(missing)).all():
+                found[llm.id] = self.put(llm)
+        return found
+
+    def get(self, db, llm_id) -> Optional[LLMConfig]:
+        return self.get_many(db, [llm_id]).get(llm_id)
+
+
+llm_configs = LLMConfigCache(ttl_seconds=settings.LLM_CONFIG_CACHE_TTL_SECONDS)
@@ -0,0 +1,272 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ConnectionClosedError, EndpointConnectionError
+
+from ...settings.settings import settings
+from .client_pool import bedrock_clients
+from .coalescer import converse_coalescer
+from .rate_limiter import backoff_delay, estimate_request_tokens, is_throttling_error, rate_limiters
+from .response_cache import request_key
+
+# Bounded pool for the blocking botocore calls, kept apart from the default
+# threadpool so slow model calls can't starve sync endpoints.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.BEDROCK_MAX_WORKERS,
+    thread_name_prefix="bedrock",
+)
+
+
+async def run_blocking(fn, *args, timeout: float = None, **kwargs):
+    """
+    Run a blocking callable on the Bedrock executor without blocking the event loop.
+
+    Cancelling the awaiting task, or hitting the timeout, cancels the call if it
+    hasn't started yet; a call already on the wire is bounded by the client's
+    read timeout.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+    return await asyncio.wait_for(future, timeout=timeout)
+
+
+async def gather_bounded(coroutines, limit: int, keys=None) -> list:
+    """
+    Await coroutines concurrently, at most `limit` at a time, returning results in order.
+
+    Given a key per coroutine, the limit applies per key instead, so a slow or
+    throttled key only holds up its own coroutines. If one fails the others
+    are cancelled and the first error is raised.
+    """
+    coroutines = list(coroutines)
+    keys = [None] * len(coroutines) if keys is None else list(keys)
+    semaphores = {key: asyncio.Semaphore(max(1, limit)) for key in set(keys)}
+
+    async def bounded(coroutine, key):
+        async with semaphores[key]:
+            return await coroutine
+
+    tasks = [asyncio.ensure_future(bounded(coroutine, key)) for coroutine, key in zip(coroutines, keys)]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def pool_key(llm) -> tuple:
+    """Calls to the same model in the same region share a concurrency pool."""
+    return (llm.aws_region, llm.llm_model_id)
+
+
+def build_text_request(llm, conversation_input) -> dict:
+    return {
+        "modelId": llm.llm_model_id,
+        "messages": [
+            {
+                "role": "user",
+                "content": [{"text": conversation_input.user_input}],
+            }
+        ],
+        "system": [{"text": conversation_input.prompt}],
+        "inferenceConfig": {
+            "temperature": conversation_input.temperature,
+            "maxTokens": conversation_input.max_tokens,
+            "topP": conversation_input.top_p,
+        },
+    }
+
+
+def build_image_request(llm, conversation_input) -> dict:
+    return {
+        "modelId": llm.llm_model_id,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {"text": conversation_input.prompt},
+                    {"image": {"format": "jpeg", "source": {"bytes": conversation_input.image}}},
+                ],
+            }
+        ],
+        "inferenceConfig": {
+            "temperature": conversation_input.temperature,
+            "maxTokens": conversation_input.max_tokens,
+            "topP": conversation_input.top_p,
+        },
+    }
+
+
+def _is_retryable(error: Exception) -> bool:
+    return is_throttling_error(error) or isinstance(
+        error, (EndpointConnectionError, ConnectionClosedError)
+    )
+
+
+async def _call_with_retries(llm, operation: str, request: dict, on_attempt=None):
+    """
+    Call a bedrock-runtime operation within the LLM's rate limits.
+
+    Throttled calls are retried with exponential backoff and jitter, and slow
+    the LLM's limiter down; successful calls let it speed back up. `on_attempt`
+    is called right before each attempt is sent, after any rate limit wait.
+    """
+    timeout = settings.BEDROCK_CALL_TIMEOUT_SECONDS
+    limiter = rate_limiters.get(llm)
+    reserved_tokens = estimate_request_tokens(request)
+    bedrock = await run_blocking(bedrock_clients.get_client, llm, timeout=timeout)
+
+    for attempt in range(settings.BEDROCK_MAX_ATTEMPTS):
+        await limiter.acquire(reserved_tokens)
+        if on_attempt is not None:
+            on_attempt()
+        try:
+            response = await run_blocking(getattr(bedrock, operation), timeout=timeout, **request)
+        except Exception as e:
+            if not _is_retryable(e) or attempt == settings.BEDROCK_MAX_ATTEMPTS - 1:
+                raise
+            if is_throttling_error(e):
+                limiter.record_throttle()
+            await asyncio.sleep(backoff_delay(attempt))
+            continue
+        used_tokens = response.get("usage", {}).get("totalTokens")
+        limiter.record_success(reserved_tokens, used_tokens)
+        return response
+
+
+async def converse(llm, request: dict, coalesce: bool = True) -> dict:
+    """
+    Send a Converse request for an LLM through its pooled client.
+
+    Identical requests to the same LLM that are in flight at the same time
+    share one Bedrock call unless `coalesce` is off, e.g. when sampling.
+    """
+    if not coalesce:
+        return await _call_with_retries(llm, "converse", request)
+    key = (llm.id, request_key(request))
+    return await converse_coalescer.run(
+        key, lambda: _call_with_retries(llm, "converse", request)
+    )
+
+
+class StreamTimer:
+    """
+    Collects a ConverseStream into a Converse-shaped response while timing it.
+
+    Time to first token is measured from the start of the request to the first
+    text delta, tokens per second over the generation after that first token.
+    `converse_stream` restarts the timer as each attempt is sent, so rate limit
+    waits and retry backoff aren't counted.
+    """
+
+    def __init__(self):
+        self.start()
+        self.first_token_at = None
+        self.finished_at = None
+        self.chunks = []
+        self.usage = {}
+        self.metrics = {}
+        self.stop_reason = None
+
+    def observe(self, event: dict):
+        if "contentBlockDelta" in event:
+            text = event["contentBlockDelta"].get("delta", {}).get("text")
+            if text:
+                if self.first_token_at is None:
+                    self.first_token_at = time.perf_counter()
+                self.chunks.append(text)
+        elif "messageStop" in event:
+            self.stop_reason = event["messageStop"].get("stopReason")
+        elif "metadata" in event:
+            self.usage = event["metadata"].get("usage", {})
+            self.metrics = event["metadata"].get("metrics", {})
+            self.finished_at = time.perf_counter()
+
+    def start(self):
+        self.started_at = time.perf_counter()
+
+    @property
+    def time_to_first_token_ms(self):
+        if self.first_token_at is None:
+            return None
+        return int((self.first_token_at - self.started_at) * 1000)
+
+    @property
+    def tokens_per_second(self):
+        output_tokens = self.usage.get("outputTokens")
+        if self.first_token_at is None or not output_tokens:
+            return None
+        generation_seconds = (self.finished_at or time.perf_counter()) - self.first_token_at
+        if generation_seconds <= 0:
+            return None
+        return round(output_tokens / generation_seconds, 2)
+
+    def summary(self) -> dict:
+        return {
+            "latencyMs": self.metrics.get("latencyMs"),
+            "timeToFirstTokenMs": self.time_to_first_token_ms,
+            "tokensPerSecond": self.tokens_per_second,
+        }
+
+    def response(self) -> dict:
+        return {
+            "output": {
+                "message": {"role": "assistant", "content": [{"text": "".join(self.chunks)}]}
+            },
+            "stopReason": self.stop_reason,
+            "usage": self.usage,
+            "metrics": self.summary(),
+        }
+
+
+async def converse_stream(llm, request: dict, timer: StreamTimer = None):
+    """
+    Send a ConverseStream request and yield its events as they arrive.
+
+    The event stream is read on the Bedrock executor and handed over to the
+    event loop through a queue. Closing the generator early, e.g. when the
+    client disconnects, closes the underlying stream.
+    """
+    response = await _call_with_retries(
+        llm, "converse_stream", request, on_attempt=timer.start if timer is not None else None
+    )
+    stream = response["stream"]
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    finished = object()
+
+    def pump():
+        try:
+            for event in stream:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+    loop.run_in_executor(_executor, pump)
+    try:
+        while True:
+            item = await queue.get()
+            if item is finished:
+                return
+            if isinstance(item, Exception):
+                raise item
+            if timer is not None:
+                timer.observe(item)
+            yield item
+    finally:
+        stream.close()
+
+
+async def converse_streamed(llm, request: dict) -> dict:
+    """Run a request through ConverseStream and return the collected, timed response."""
+    timer = StreamTimer()
+    async for _ in converse_stream(llm, request, timer):
+        pass
+    return timer.response()
@@ -0,0 +1,158 @@
+import asyncio
+import random
+import threading
+import time
+
+from ...settings.settings import settings
+
+# Bedrock error codes that mean "slow down" rather than "this request is wrong"
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+
+
+def is_throttling_error(error: Exception) -> bool:
+    response = getattr(error, "response", None) or {}
+    return response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given zero-based retry attempt."""
+    ceiling = min(
+        settings.BEDROCK_RETRY_MAX_DELAY_SECONDS,
+        settings.BEDROCK_RETRY_BASE_DELAY_SECONDS * (2 ** attempt),
+    )
+    return random.uniform(0, ceiling)
+
+
+def estimate_request_tokens(request: dict) -> int:
+    """
+    Tokens to reserve for a Converse request before sending it.
+
+    Bedrock charges the quota for the input plus maxTokens up front, so the
+    estimate does the same; input is approximated at four characters a token.
+    """
+    characters = 0
+    for block in request.get("system", []):
+        characters += len(block.get("text", ""))
+    for message in request.get("messages", []):
+        for block in message.get("content", []):
+            characters += len(block.get("text", ""))
+    max_tokens = request.get("inferenceConfig", {}).get("maxTokens") or 0
+    return characters // 4 + 1 + max_tokens
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute` units a minute, holding at most a minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.tokens = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float, factor: float):
+        capacity = self.per_minute * factor
+        elapsed = now - self.updated_at
+        self.tokens = min(capacity, self.tokens + elapsed * capacity / 60)
+        self.updated_at = now
+
+    def try_take(self, amount: float, factor: float, now: float) -> float:
+        """Take `amount` if available and return 0, otherwise return the seconds to wait."""
+        self._refill(now, factor)
+        capacity = self.per_minute * factor
+        # Requests larger than the bucket go through once it is full
+        needed = min(amount, capacity)
+        if self.tokens >= needed:
+            self.tokens -= amount
+            return 0.0
+        return (needed - self.tokens) * 60 / capacity
+
+    def give_back(self, amount: float):
+        self.tokens = min(self.per_minute, self.tokens + amount)
+
+
+class AdaptiveRateLimiter:
+    """
+    Request and token budgets of one LLM.
+
+    The configured per-minute limits are scaled by a rate factor that is halved
+    whenever Bedrock throttles and grows back additively with each success, so
+    the limiter settles just below the model's real quota.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.rate_factor = 1.0
+        self._lock = threading.Lock()
+
+    @property
+    def limits(self):
+        return (self.requests.per_minute, self.tokens.per_minute)
+
+    def _try_acquire(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            wait = self.requests.try_take(1, self.rate_factor, now)
+            if wait:
+                return wait
+            wait = self.tokens.try_take(tokens, self.rate_factor, now)
+            if wait:
+                self.requests.give_back(1)
+            return wait
+
+    async def acquire(self, tokens: int):
+        """Wait until one request and `tokens` tokens fit in the budget, then take them."""
+        while True:
+            wait = self._try_acquire(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def record_success(self, reserved_tokens: int, used_tokens: int = None):
+        with self._lock:
+            if used_tokens is not None and used_tokens < reserved_tokens:
+                self.tokens.give_back(reserved_tokens - used_tokens)
+            self.rate_factor = min(1.0, self.rate_factor + settings.RATE_LIMIT_INCREASE_STEP)
+
+    def record_throttle(self):
+        with self._lock:
+            self.rate_factor = max(settings.RATE_LIMIT_MIN_FACTOR, self.rate_factor / 2)
+
+
+class RateLimiterRegistry:
+    """One limiter per LLM, rebuilt when its configured limits change."""
+
+    def __init__(self):
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _limits(llm):
+        return (
+            getattr(llm, "requests_per_minute", None) or settings.BEDROCK_DEFAULT_REQUESTS_PER_MINUTE,
+            getattr(llm, "tokens_per_minute", None) or settings.BEDROCK_DEFAULT_TOKENS_PER_MINUTE,
+        )
+
+    def get(self, llm) -> AdaptiveRateLimiter:
+        limits = self._limits(llm)
+        with self._lock:
+            limiter = self._limiters.get(llm.id)
+            if limiter is None or limiter.limits != limits:
+                limiter = AdaptiveRateLimiter(*limits)
+                self._limiters[llm.id] = limiter
+            return limiter
+
+    def invalidate(self, llm_id):
+        with self._lock:
+            self._limiters.pop(llm_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._limiters.clear()
+
+
+rate_limiters = RateLimiterRegistry()
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ...models.response_cache import LLMResponseCache
+from ...settings.settings import settings
+
+
+def request_key(request: dict) -> str:
+    """
+    Content hash of a Converse request.
+
+    Covers the model id, system prompt, messages and inference config, so any
+    change to the prompt, input or sampling parameters yields a new key.
+    """
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_cache_enabled(use_cache, temperature) -> bool:
+    """Caching is opt-in; when not chosen explicitly it is on only for greedy decoding."""
+    if use_cache is not None:
+        return use_cache
+    return temperature == 0
+
+
+class ResponseCache:
+    """
+    Two-tier cache of Converse responses.
+
+    An in-process LRU with TTL sits in front of the llm_response_cache table,
+    so a hit in another worker or after a restart still skips Bedrock.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_local(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            response, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def _put_local(self, key: str, response: dict, ttl_seconds: float):
+        with self._lock:
+            self._entries[key] = (response, time.monotonic() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_many(self, db, keys) -> dict:
+        """Look keys up in memory, then in the database in a single query."""
+        found = {}
+        missing = []
+        for key in set(keys):
+            response = self._get_local(key)
+            if response is not None:
+                found[key] = response
+            else:
+                missing.append(key)
+
+        if missing:
+            now = datetime.utcnow()
+            rows = (
+                db.query(LLMResponseCache)
+                .filter(
+                    LLMResponseCache.cache_key.in_(missing),
+                    LLMResponseCache.expires_at > now,
+                )
+                .all()
+            )
+            for row in rows:
+                found[row.cache_key] = row.response
+                self._put_local(row.cache_key, row.response, (row.expires_at - now).total_seconds())
+        return found
+
+    def get(self, db, key: str):
+        return self.get_many(db, [key]).get(key)
+
+    def put_many(self, db, entries):
+        """
+        Store (key, llm_model_id, response) entries in memory and add them to the
+        session; the caller commits. Keys written concurrently elsewhere are kept.
+        """
+        if not entries:
+            return
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        rows = {}
+        for key, llm_model_id, response in entries:
+            response = {k: v for k, v in response.items() if k != "ResponseMetadata"}
+            self._put_local(key, response, self.ttl_seconds)
+            rows[key] = {
+                "cache_key": key,
+                "llm_model_id": llm_model_id,
+                "response": response,
+                "creation_date": now,
+                "expires_at": expires_at,
+            }
+        rows = list(rows.values())
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            statement = postgresql.insert(LLMResponseCache).on_conflict_do_nothing()
+        elif dialect == "sqlite":
+            statement = sqlite.insert(LLMResponseCache).on_conflict_do_nothing()
+        else:
+            existing = {row.cache_key for row in db.query(LLMResponseCache.cache_key).filter(
+                LLMResponseCache.cache_key.in_([row["cache_key"] for row in rows])
+            )}
+            rows = [row for row in rows if row["cache_key"] not in existing]
+            statement = LLMResponseCache.__table__.insert()
+        if rows:
+            db.execute(statement, rows)
+
+    def put(self, db, key: str, llm_model_id: str, response: dict):
+        self.put_many(db, [(key, llm_model_id, response)])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache(
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,67 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import tuple_
+
+from ...settings.settings import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(creation_date: datetime, row_id) -> str:
+    """Opaque cursor for the keyset position (creation_date, id)."""
+    payload = json.dumps([creation_date.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, uuid.UUID]]:
+    """Keyset position of a cursor; raises ValueError for cursors this API didn't issue."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        creation_date, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(creation_date), uuid.UUID(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def page_size(limit: Optional[int]) -> int:
+    """Requested page size, capped at PAGE_SIZE_MAX."""
+    if limit is None or limit < 1:
+        return settings.PAGE_SIZE_DEFAULT
+    return min(limit, settings.PAGE_SIZE_MAX)
+
+
+def keyset_order(query, creation_column, id_column, position: Optional[Tuple[datetime, uuid.UUID]]):
+    """Order a query newest first on (creation_date, id), starting after a keyset position."""
+    if position is not None:
+        query = query.filter(tuple_(creation_column, id_column) < tuple_(*position))
+    return query.order_by(creation_column.desc(), id_column.desc())
+
+
+def keyset_page(
+    query,
+    creation_column,
+    id_column,
+    position: Optional[Tuple[datetime, uuid.UUID]],
+    limit: int,
+    key: Callable = lambda row: (row.creation_date, row.id),
+):
+    """
+    One page of a query, newest first, after a keyset position.
+
+    Rows are ordered by (creation_date, id) descending and compared as a row
+    value, so with a matching index each page is a single index range scan
+    however deep it is. Returns the rows and the cursor of the next page, or
+    None on the last page.
+    """
+    query = keyset_order(query, creation_column, id_column, position)
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
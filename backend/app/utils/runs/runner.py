@@ -0,0 +1,353 @@
+import asyncio
+from contextlib import nullcontext
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from ...models.llm import LLMException
+from ...models.prompt import Prompt
+from ...models.test import Test
+from ...schemas.llm import ConversationInput, ImageConversationInput
+from ...settings.settings import settings
+from ..llm import invoker
+from ..llm.config_cache import llm_configs
+from ..llm.response_cache import is_cache_enabled, request_key, response_cache
+from ..tokenizer.tokenizer import count_tokens_batch
+
+MAX_ERROR_LENGTH = 1000
+
+# Called as each prompt finishes, with its result row and, for a fresh
+# cacheable response, the (cache key, model id, response) to cache
+ResultCallback = Callable[[dict, Optional[tuple]], Awaitable[None]]
+
+
+async def load_llms(db, llm_ids) -> dict:
+    """Look up LLM configs, keyed by id; every one of them must exist."""
+    llm_ids = set(llm_ids)
+    llms_by_id = await run_in_threadpool(llm_configs.get_many, db, llm_ids)
+    if len(llms_by_id) != len(llm_ids):
+        raise LLMException(status_code=404, error_key="LLM_NOT_FOUND")
+    return llms_by_id
+
+
+async def load_prompt_llms(db, prompts: List[Prompt]) -> dict:
+    """Look up the LLM configs of a set of prompts, keyed by id."""
+    return await load_llms(db, {prompt.llm_id for prompt in prompts})
+
+
+def pair_llm_id(test: Test, prompt: Prompt):
+    """The LLM a prompt runs on for a test: the test's own in a matrix run, else the prompt's."""
+    return test.llm_id or prompt.llm_id
+
+
+def ensure_prompt_tokens(prompts: List[Prompt], llms: dict):
+    """Fill in token counts of prompts written before they were stored on the row, one batch per model."""
+    missing = {}
+    for prompt in prompts:
+        if prompt.prompt_tokens is None:
+            missing.setdefault(llms[prompt.llm_id].llm_model_id, []).append(prompt)
+    for llm_model_id, model_prompts in missing.items():
+        counts = count_tokens_batch([prompt.prompt for prompt in model_prompts], llm_model_id)
+        for prompt, count in zip(model_prompts, counts):
+            prompt.prompt_tokens = count
+
+
+def count_input_tokens(text: str, llms: dict) -> dict:
+    """Token count of a test input for each model it is sent to."""
+    return {
+        llm_model_id: count_tokens_batch([text], llm_model_id)[0]
+        for llm_model_id in {llm.llm_model_id for llm in llms.values()}
+    }
+
+
+def failed_result(test: Test, prompt: Prompt, llm, error: Exception) -> dict:
+    """Result of a prompt whose LLM call failed; kept so it counts towards the error rate."""
+    return {
+        "test_id": test.id,
+        "prompt_id": prompt.id,
+        "llm_id": llm.id,
+        "creation_date": test.creation_date,
+        "llm_response": None,
+        "input_tokens": None,
+        "output_tokens": None,
+        "total_tokens": None,
+        "latency_ms": None,
+        "prompt_tokens": prompt.prompt_tokens,
+        "user_input_tokens": None,
+        "time_to_first_token_ms": None,
+        "tokens_per_second": None,
+        "cache_hit": False,
+        "error": f"{type(error).__name__}: {error}"[:MAX_ERROR_LENGTH],
+    }
+
+
+def _result(test: Test, prompt: Prompt, llm, llm_response: dict, **columns) -> dict:
+    return {
+        "test_id": test.id,
+        "prompt_id": prompt.id,
+        "llm_id": llm.id,
+        "creation_date": test.creation_date,
+        "llm_response": llm_response["output"]["message"]["content"][0]["text"],
+        "input_tokens": llm_response["usage"]["inputTokens"],
+        "output_tokens": llm_response["usage"]["outputTokens"],
+        "total_tokens": llm_response["usage"]["totalTokens"],
+        "latency_ms": llm_response["metrics"]["latencyMs"],
+        "prompt_tokens": prompt.prompt_tokens,
+        "user_input_tokens": None,
+        "time_to_first_token_ms": None,
+        "tokens_per_second": None,
+        "cache_hit": False,
+        "error": None,
+        **columns,
+    }
+
+
+async def run_text_prompts(
+    db,
+    test: Test,
+    prompts: List[Prompt],
+    llms: dict,
+    stream: bool = False,
+    use_cache: Optional[bool] = None,
+    on_result: Optional[ResultCallback] = None,
+    lock: Optional[asyncio.Lock] = None,
+) -> Tuple[List[dict], List[tuple]]:
+    """
+    Send a text test's input to each prompt, at most TEST_MAX_CONCURRENCY at a time.
+
+    Cached responses are reused where caching applies. A failed call becomes
+    a failed result rather than failing the run. Returns the result rows and
+    the fresh responses to cache; nothing is written to the database.
+    """
+    return await run_text_pairs(
+        db, [(test, prompt) for prompt in prompts], llms,
+        stream=stream, use_cache=use_cache, on_result=on_result, lock=lock,
+    )
+
+
+def _pair_token_counts(pairs, pair_llms, llms) -> tuple:
+    """
+    Token counts of each test's input for every model, and of each pair's
+    prompt for the model it runs on. Tokenizing blocks; run off the loop.
+    """
+    user_input_tokens = {}
+    for test, _ in pairs:
+        if test.id not in user_input_tokens:
+            user_input_tokens[test.id] = count_input_tokens(test.user_input, llms)
+    # Prompts count their tokens for their own model
+    prompt_tokens = [
+        prompt.prompt_tokens if llm.id == prompt.llm_id
+        else count_tokens_batch([prompt.prompt], llm.llm_model_id)[0]
+        for (_, prompt), llm in zip(pairs, pair_llms)
+    ]
+    return user_input_tokens, prompt_tokens
+
+
+async def run_text_pairs(
+    db,
+    pairs: List[Tuple[Test, Prompt]],
+    llms: dict,
+    stream: bool = False,
+    use_cache: Optional[bool] = None,
+    on_result: Optional[ResultCallback] = None,
+    concurrency: Optional[int] = None,
+    pool_concurrency: Optional[int] = None,
+    lock: Optional[asyncio.Lock] = None,
+) -> Tuple[List[dict], List[tuple]]:
+    """
+    Send the input of each test to its prompt, pair by pair, at most
+    `concurrency` (TEST_MAX_CONCURRENCY by default) at a time.
+
+    The budget is shared by all pairs, whichever test they belong to, unless
+    `pool_concurrency` gives each model and region a budget of its own.
+    Cached responses of every pair are looked up in a single query, holding
+    `lock` if given, for callers that share the session with another task.
+    """
+    pair_llms = [llms[pair_llm_id(test, prompt)] for test, prompt in pairs]
+    user_input_tokens, prompt_tokens = await run_in_threadpool(_pair_token_counts, pairs, pair_llms, llms)
+    conversation_inputs = [
+        ConversationInput(
+            llm_id=llm.id,
+            user_input=test.user_input,
+            prompt=prompt.prompt,
+        )
+        for (test, prompt), llm in zip(pairs, pair_llms)
+    ]
+    requests = [
+        invoker.build_text_request(llm, conversation_input)
+        for llm, conversation_input in zip(pair_llms, conversation_inputs)
+    ]
+    cache_keys = [request_key(request) for request in requests]
+
+    cached = {}
+    caching = any(
+        is_cache_enabled(use_cache, conversation_input.temperature)
+        for conversation_input in conversation_inputs
+    )
+    if caching:
+        async with lock or nullcontext():
+            cached = await run_in_threadpool(response_cache.get_many, db, cache_keys)
+
+    fresh_responses = []
+
+    async def run_pair(test, prompt, llm, request, cache_key, pair_prompt_tokens):
+        cache_hit = cache_key in cached
+        cache_entry = None
+        try:
+            if cache_hit:
+                llm_response = cached[cache_key]
+            elif stream:
+                llm_response = await invoker.converse_streamed(llm, request)
+            else:
+                llm_response = await invoker.converse(llm, request)
+        except Exception as e:
+            row = failed_result(test, prompt, llm, e)
+        else:
+            if caching and not cache_hit:
+                cache_entry = (cache_key, llm.llm_model_id, llm_response)
+                fresh_responses.append(cache_entry)
+            row = _result(
+                test, prompt, llm, llm_response,
+                user_input_tokens=user_input_tokens[test.id][llm.llm_model_id],
+                prompt_tokens=pair_prompt_tokens,
+                time_to_first_token_ms=llm_response["metrics"].get("timeToFirstTokenMs"),
+                tokens_per_second=llm_response["metrics"].get("tokensPerSecond"),
+                cache_hit=cache_hit,
+            )
+        if on_result is not None:
+            await on_result(row, cache_entry)
+        return row
+
+    coroutines = [
+        run_pair(*pair, llm, request, cache_key, pair_prompt_tokens)
+        for pair, llm, request, cache_key, pair_prompt_tokens in zip(pairs, pair_llms, requests, cache_keys, prompt_tokens)
+    ]
+    if pool_concurrency is not None:
+        rows = await invoker.gather_bounded(
+            coroutines, pool_concurrency, keys=[invoker.pool_key(llm) for llm in pair_llms]
+        )
+    else:
+        rows = await invoker.gather_bounded(coroutines, concurrency or settings.TEST_MAX_CONCURRENCY)
+    return rows, fresh_responses
+
+
+async def run_image_prompts(
+    test: Test,
+    prompts: List[Prompt],
+    llms: dict,
+    image: bytes,
+    on_result: Optional[ResultCallback] = None,
+) -> List[dict]:
+    """Send a test image to each prompt, at most TEST_MAX_CONCURRENCY at a time; returns the result rows."""
+
+    async def run_prompt(prompt):
+        llm = llms[prompt.llm_id]
+        img_conversation_input = ImageConversationInput(
+            llm_id=prompt.llm_id,
+            image=image,
+            prompt=prompt.prompt,
+        )
+        try:
+            llm_response = await invoker.converse(
+                llm, invoker.build_image_request(llm, img_conversation_input)
+            )
+        except Exception as e:
+            row = failed_result(test, prompt, llm, e)
+        else:
+            row = _result(test, prompt, llm, llm_response)
+        if on_result is not None:
+            await on_result(row, None)
+        return row
+
+    return await invoker.gather_bounded(
+        [run_prompt(prompt) for prompt in prompts],
+        settings.TEST_MAX_CONCURRENCY,
+    )
+
+
+def _sample(test: Test, prompt: Prompt, llm, index: int, llm_response: Optional[dict], error: Optional[Exception]) -> dict:
+    row = {
+        "test_id": test.id,
+        "prompt_id": prompt.id,
+        "sample": index,
+        "llm_id": llm.id,
+        "llm_response": None,
+        "input_tokens": None,
+        "output_tokens": None,
+        "total_tokens": None,
+        "latency_ms": None,
+        "time_to_first_token_ms": None,
+        "tokens_per_second": None,
+        "error": None,
+    }
+    if error is not None:
+        row["error"] = f"{type(error).__name__}: {error}"[:MAX_ERROR_LENGTH]
+    else:
+        row.update(
+            llm_response=llm_response["output"]["message"]["content"][0]["text"],
+            input_tokens=llm_response["usage"]["inputTokens"],
+            output_tokens=llm_response["usage"]["outputTokens"],
+            total_tokens=llm_response["usage"]["totalTokens"],
+            latency_ms=llm_response["metrics"]["latencyMs"],
+            time_to_first_token_ms=llm_response["metrics"].get("timeToFirstTokenMs"),
+            tokens_per_second=llm_response["metrics"].get("tokensPerSecond"),
+        )
+    return row
+
+
+async def run_text_samples(
+    db,
+    test: Test,
+    prompts: List[Prompt],
+    llms: dict,
+    samples: int,
+    stream: bool = False,
+) -> Tuple[List[dict], List[dict]]:
+    """
+    Send a text test's input to each prompt `samples` times, at most
+    SAMPLE_MAX_CONCURRENCY calls at a time.
+
+    Responses are neither cached nor coalesced, so every sample is a call of
+    its own. Each prompt's result is its first successful sample, or a failed
+    result if none succeeded. Returns the result rows and every sample.
+    """
+    user_input_tokens = await run_in_threadpool(count_input_tokens, test.user_input, llms)
+
+    async def run_sample(prompt, index):
+        llm = llms[pair_llm_id(test, prompt)]
+        request = invoker.build_text_request(
+            llm, ConversationInput(llm_id=llm.id, user_input=test.user_input, prompt=prompt.prompt)
+        )
+        try:
+            if stream:
+                llm_response = await invoker.converse_streamed(llm, request)
+            else:
+                llm_response = await invoker.converse(llm, request, coalesce=False)
+        except Exception as e:
+            return prompt, llm, None, e
+        return prompt, llm, llm_response, None
+
+    outcomes = await invoker.gather_bounded(
+        [run_sample(prompt, index) for prompt in prompts for index in range(samples)],
+        settings.SAMPLE_MAX_CONCURRENCY,
+    )
+
+    rows = {}
+    sample_rows = []
+    errors = {}
+    for position, (prompt, llm, llm_response, error) in enumerate(outcomes):
+        sample_rows.append(_sample(test, prompt, llm, position % samples, llm_response, error))
+        if error is not None:
+            errors.setdefault(prompt.id, (llm, error))
+        elif prompt.id not in rows:
+            rows[prompt.id] = _result(
+                test, prompt, llm, llm_response,
+                user_input_tokens=user_input_tokens[llm.llm_model_id],
+                time_to_first_token_ms=llm_response["metrics"].get("timeToFirstTokenMs"),
+                tokens_per_second=llm_response["metrics"].get("tokensPerSecond"),
+            )
+    for prompt in prompts:
+        if prompt.id not in rows:
+            llm, error = errors[prompt.id]
+            rows[prompt.id] = failed_result(test, prompt, llm, error)
+    return [rows[prompt.id] for prompt in prompts], sample_rows
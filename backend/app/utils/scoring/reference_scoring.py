@@ -0,0 +1,189 @@
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from typing import List, Optional
+
+import regex
+from nltk.tokenize import wordpunct_tokenize
+from nltk.translate.bleu_score import SmoothingFunction, sentence_bleu
+from sqlalchemy import bindparam, update
+
+from ...models.test import test_prompt_association
+from ...settings.settings import settings
+from ...utils.logger.logger import logger
+
+# Result columns written by the scoring stage
+SCORE_COLUMNS = ("exact_match", "regex_match", "bleu", "rouge_1", "rouge_l")
+
+_smoothing = SmoothingFunction().method1
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse whitespace, for exact-match comparison."""
+    return " ".join((text or "").lower().split())
+
+
+def tokenize(text: str) -> List[str]:
+    return wordpunct_tokenize(normalize(text))
+
+
+def validate_pattern(pattern: Optional[str]):
+    """Raise regex.error if an expected pattern doesn't compile."""
+    if pattern:
+        regex.compile(pattern)
+
+
+def pattern_matches(pattern, response: str) -> Optional[bool]:
+    """
+    Whether a user-supplied pattern matches a response, or None if matching
+    takes longer than EXPECTED_PATTERN_TIMEOUT_SECONDS.
+
+    The `regex` module's timeout bounds catastrophic backtracking, which would
+    otherwise hold a worker thread for as long as the pattern takes.
+    """
+    try:
+        return pattern.search(response, timeout=settings.EXPECTED_PATTERN_TIMEOUT_SECONDS) is not None
+    except TimeoutError:
+        logger.warning(f"Expected pattern timed out: {pattern.pattern[:100]}")
+        return None
+
+
+def _f1(overlap: int, candidate_length: int, reference_length: int) -> float:
+    if not overlap:
+        return 0.0
+    precision = overlap / candidate_length
+    recall = overlap / reference_length
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_1(reference: List[str], candidate: List[str]) -> float:
+    """ROUGE-1 F1: unigram overlap of candidate and reference."""
+    overlap = sum((Counter(reference) & Counter(candidate)).values())
+    return _f1(overlap, len(candidate), len(reference))
+
+
+def rouge_l(reference: List[str], candidate: List[str]) -> float:
+    """ROUGE-L F1: longest common subsequence of candidate and reference."""
+    if not reference or not candidate:
+        return 0.0
+    previous = [0] * (len(candidate) + 1)
+    for reference_token in reference:
+        current = [0]
+        for j, candidate_token in enumerate(candidate):
+            if reference_token == candidate_token:
+                current.append(previous[j] + 1)
+            else:
+                current.append(max(previous[j + 1], current[j]))
+        previous = current
+    return _f1(previous[-1], len(candidate), len(reference))
+
+
+def bleu(reference: List[str], candidate: List[str]) -> float:
+    if not reference or not candidate:
+        return 0.0
+    return float(sentence_bleu([reference], candidate, smoothing_function=_smoothing))
+
+
+class ScoreCache:
+    """LRU of reference scores keyed by SHA-256s of the response, the expected answer and the pattern."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(response: str, expected_answer: Optional[str], expected_pattern: Optional[str]) -> tuple:
+        return tuple(
+            None if text is None else hashlib.sha256(text.encode("utf-8")).hexdigest()
+            for text in (response, expected_answer, expected_pattern)
+        )
+
+    def get(self, key: tuple):
+        with self._lock:
+            scores = self._scores.get(key)
+            if scores is not None:
+                self._scores.move_to_end(key)
+            return scores
+
+    def put(self, key: tuple, scores: dict):
+        with self._lock:
+            self._scores[key] = scores
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._scores.clear()
+
+
+reference_scores = ScoreCache(max_entries=settings.SCORE_CACHE_SIZE)
+
+
+def score_responses(
+    responses: List[Optional[str]],
+    expected_answer: Optional[str],
+    expected_pattern: Optional[str],
+) -> List[dict]:
+    """
+    Score many responses against one expected answer and pattern.
+
+    The reference is tokenized and the pattern compiled once for the batch;
+    each distinct response is scored once and served from the LRU after
+    that. Scores without a reference, or for a missing response, are None,
+    as is the pattern match of a response the pattern timed out on.
+    """
+    empty = dict.fromkeys(SCORE_COLUMNS)
+    if expected_answer is None and not expected_pattern:
+        return [dict(empty) for _ in responses]
+
+    reference = tokenize(expected_answer) if expected_answer is not None else None
+    normalized_reference = normalize(expected_answer) if expected_answer is not None else None
+    pattern = regex.compile(expected_pattern) if expected_pattern else None
+
+    scored = {}
+    for response in {response for response in responses if response is not None}:
+        key = reference_scores.key(response, expected_answer, expected_pattern)
+        scores = reference_scores.get(key)
+        if scores is None:
+            scores = dict(empty)
+            if reference is not None:
+                candidate = tokenize(response)
+                scores["exact_match"] = normalize(response) == normalized_reference
+                scores["bleu"] = bleu(reference, candidate)
+                scores["rouge_1"] = rouge_1(reference, candidate)
+                scores["rouge_l"] = rouge_l(reference, candidate)
+            if pattern is not None:
+                scores["regex_match"] = pattern_matches(pattern, response)
+            reference_scores.put(key, scores)
+        scored[response] = scores
+    return [dict(scored.get(response, empty)) for response in responses]
+
+
+def score_results(rows: List[dict], expected_answer: Optional[str], expected_pattern: Optional[str]):
+    """Set the score columns of result rows of one test, in place."""
+    scores = score_responses([row.get("llm_response") for row in rows], expected_answer, expected_pattern)
+    for row, row_scores in zip(rows, scores):
+        row.update(row_scores)
+
+
+def rescore_test(db, test):
+    """Recompute the scores of a test's stored results after its expected answer or pattern changed."""
+    results = test_prompt_association.c
+    rows = [
+        dict(row._mapping)
+        for row in db.query(results.prompt_id, results.llm_response).filter(results.test_id == test.id)
+    ]
+    if not rows:
+        return
+    score_results(rows, test.expected_answer, test.expected_pattern)
+    db.execute(
+        update(test_prompt_association)
+        .where(results.test_id == test.id, results.prompt_id == bindparam("result_prompt_id"))
+        .values({column: bindparam(column) for column in SCORE_COLUMNS}),
+        [
+            {"result_prompt_id": row["prompt_id"], **{column: row[column] for column in SCORE_COLUMNS}}
+            for row in rows
+        ],
+    )
@@ -0,0 +1,58 @@
+"""
+Compute MinHash signatures and LSH buckets of results stored before they were indexed.
+
+Run after migrations/013_response_minhash.sql:
+
+    python -m app.utils.similarity.backfill_minhashes
+"""
+from sqlalchemy import bindparam, update
+
+from ...db.bulk import bulk_insert
+from ...db.database import SessionLocal
+from ...models.response_lsh_band import ResponseLshBand
+from ...models.test import test_prompt_association
+from ...utils.logger.logger import logger
+from .duplicates import index_responses
+
+BATCH_SIZE = 500
+
+results = test_prompt_association.c
+
+
+def backfill_minhashes(db, batch_size: int = BATCH_SIZE) -> int:
+    """Index results with a response but no signature, a batch per transaction. Safe to re-run."""
+    indexed = 0
+    while True:
+        rows = [
+            dict(row._mapping)
+            for row in db.query(results.test_id, results.prompt_id, results.llm_response)
+            .filter(results.llm_response.isnot(None), results.minhash.is_(None))
+            .limit(batch_size)
+        ]
+        if not rows:
+            return indexed
+        bands = index_responses(rows)
+        # Responses without any words get an empty signature so they aren't picked up again
+        for row in rows:
+            row["minhash"] = row["minhash"] or b""
+        db.execute(
+            update(test_prompt_association)
+            .where(results.test_id == bindparam("result_test_id"), results.prompt_id == bindparam("result_prompt_id"))
+            .values(minhash=bindparam("result_minhash")),
+            [
+                {"result_test_id": row["test_id"], "result_prompt_id": row["prompt_id"], "result_minhash": row["minhash"]}
+                for row in rows
+            ],
+        )
+        bulk_insert(db, ResponseLshBand.__table__, bands)
+        db.commit()
+        indexed += len(rows)
+        logger.info(f"Indexed {indexed} responses for near-duplicate detection")
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        backfill_minhashes(db)
+    finally:
+        db.close()
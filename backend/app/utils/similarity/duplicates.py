@@ -0,0 +1,125 @@
+import itertools
+from typing import List
+
+from sqlalchemy import func
+
+from ...models.prompt import Prompt
+from ...models.response_lsh_band import ResponseLshBand
+from ...models.test import Test, test_prompt_association
+from ...settings.settings import settings
+from .minhash import band_buckets, estimated_similarity, from_bytes, minhasher, to_bytes
+
+results = test_prompt_association.c
+
+
+def index_responses(rows: List[dict]) -> List[dict]:
+    """Set the MinHash signature of result rows, in place, and return their LSH band rows."""
+    bands = []
+    for row in rows:
+        signature = minhasher.signature(row.get("llm_response"))
+        row["minhash"] = to_bytes(signature)
+        if signature is None:
+            continue
+        bands.extend(
+            {"test_id": row["test_id"], "prompt_id": row["prompt_id"], "band": band, "bucket": bucket}
+            for band, bucket in enumerate(band_buckets(signature, settings.LSH_BANDS))
+        )
+    return bands
+
+
+class _DisjointSets:
+    def __init__(self):
+        self.parents = {}
+
+    def find(self, item):
+        parent = self.parents.setdefault(item, item)
+        if parent != item:
+            parent = self.parents[item] = self.find(parent)
+        return parent
+
+    def union(self, left, right):
+        self.parents[self.find(left)] = self.find(right)
+
+
+def duplicate_clusters(db, template_id, threshold: float) -> List[dict]:
+    """
+    Clusters of near-duplicate responses among the results of a template's prompts.
+
+    Only results sharing an LSH bucket with another result of the template
+    are read, so the cost follows the number of candidates rather than the
+    number of result pairs. Candidates are confirmed against their bucket's
+    first member by estimated Jaccard similarity before being joined.
+    """
+    template_prompts = db.query(Prompt.id).filter(Prompt.prompt_template_id == template_id).scalar_subquery()
+    bands = ResponseLshBand
+    shared_buckets = (
+        db.query(bands.band, bands.bucket)
+        .filter(bands.prompt_id.in_(template_prompts))
+        .group_by(bands.band, bands.bucket)
+        .having(func.count() > 1)
+        .subquery()
+    )
+    candidates = (
+        db.query(bands.band, bands.bucket, bands.test_id, bands.prompt_id)
+        .join(shared_buckets, (bands.band == shared_buckets.c.band) & (bands.bucket == shared_buckets.c.bucket))
+        .filter(bands.prompt_id.in_(template_prompts))
+        .order_by(bands.band, bands.bucket, bands.test_id, bands.prompt_id)
+        .all()
+    )
+    if not candidates:
+        return []
+
+    keys = {(row.test_id, row.prompt_id) for row in candidates}
+    members = {
+        (row.test_id, row.prompt_id): row
+        for row in db.query(
+            results.test_id,
+            results.prompt_id,
+            results.minhash,
+            results.llm_response,
+            Test.user_input,
+            Prompt.version,
+        )
+        .join(Test, Test.id == results.test_id)
+        .join(Prompt, Prompt.id == results.prompt_id)
+        .filter(Prompt.prompt_template_id == template_id, results.test_id.in_({key[0] for key in keys}))
+        if (row.test_id, row.prompt_id) in keys and row.minhash is not None
+    }
+    signatures = {key: from_bytes(row.minhash) for key, row in members.items()}
+
+    sets = _DisjointSets()
+    for _, bucket in itertools.groupby(candidates, key=lambda row: (row.band, row.bucket)):
+        bucket_keys = [(row.test_id, row.prompt_id) for row in bucket if (row.test_id, row.prompt_id) in signatures]
+        first = bucket_keys[0] if bucket_keys else None
+        for key in bucket_keys[1:]:
+            if estimated_similarity(signatures[first], signatures[key]) >= threshold:
+                sets.union(key, first)
+
+    grouped = {}
+    for key in sets.parents:
+        grouped.setdefault(sets.find(key), []).append(key)
+
+    clusters = []
+    for cluster_keys in grouped.values():
+        if len(cluster_keys) < 2:
+            continue
+        cluster_keys.sort(key=lambda key: (members[key].version or 0, str(key[0])))
+        representative = signatures[cluster_keys[0]]
+        clusters.append({
+            "size": len(cluster_keys),
+            "prompt_count": len({key[1] for key in cluster_keys}),
+            "input_count": len({members[key].user_input for key in cluster_keys}),
+            "similarity_min": min(estimated_similarity(representative, signatures[key]) for key in cluster_keys[1:]),
+            "members": [
+                {
+                    "test_id": key[0],
+                    "prompt_id": key[1],
+                    "version": members[key].version,
+                    "user_input": members[key].user_input,
+                    "llm_response": members[key].llm_response,
+                }
+                for key in cluster_keys
+            ],
+        })
+    clusters.sort(key=lambda cluster: -cluster["size"])
+    return clusters
@@ -0,0 +1,77 @@
+import hashlib
+import zlib
+from typing import List, Optional
+
+import numpy as np
+
+from ...settings.settings import settings
+from .response_similarity import tokenize
+
+# Mersenne prime for the universal hash family; 32-bit shingle hashes times
+# coefficients below it stay within uint64
+PRIME = (1 << 31) - 1
+SHINGLE_SIZE = 3
+
+
+class MinHasher:
+    """
+    MinHash signatures of responses over word 3-gram shingles.
+
+    Permutations are fixed by the seed, so signatures stored at different
+    times stay comparable as long as the settings don't change.
+    """
+
+    def __init__(self, permutations: int, seed: int = 1):
+        generator = np.random.default_rng(seed)
+        self.permutations = permutations
+        self.a = generator.integers(1, PRIME, permutations, dtype=np.uint64)
+        self.b = generator.integers(0, PRIME, permutations, dtype=np.uint64)
+
+    @staticmethod
+    def shingles(text: str) -> np.ndarray:
+        tokens = tokenize(text)
+        size = min(SHINGLE_SIZE, len(tokens))
+        grams = {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)} if size else set()
+        return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text: Optional[str]) -> Optional[np.ndarray]:
+        """Minimum of every hash permutation over the shingles, or None for an empty response."""
+        shingles = self.shingles(text or "")
+        if not shingles.size:
+            return None
+        hashed = (np.outer(self.a, shingles) + self.b[:, None]) % PRIME
+        return hashed.min(axis=1).astype(np.uint32)
+
+
+def to_bytes(signature: Optional[np.ndarray]) -> Optional[bytes]:
+    return None if signature is None else signature.astype("<u4").tobytes()
+
+
+def from_bytes(data) -> np.ndarray:
+    return np.frombuffer(bytes(data), dtype="<u4")
+
+
+def band_buckets(signature: np.ndarray, bands: int) -> List[int]:
+    """
+    LSH bucket of each band of a signature, as signed 64-bit integers.
+
+    Two responses share a bucket in some band with probability
+    1 - (1 - s^r)^b for Jaccard similarity s and r rows per band.
+    """
+    rows = len(signature) // bands
+    return [
+        int.from_bytes(
+            hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8).digest(),
+            "big",
+            signed=True,
+        )
+        for band in range(bands)
+    ]
+
+
+def estimated_similarity(left: np.ndarray, right: np.ndarray) -> float:
+    """Fraction of equal signature positions, an estimate of the shingles' Jaccard similarity."""
+    return float(np.mean(left == right))
+
+
+minhasher = MinHasher(settings.MINHASH_PERMUTATIONS)
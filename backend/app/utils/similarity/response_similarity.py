@@ -0,0 +1,156 @@
+import itertools
+import re
+from datetime import datetime
+from typing import List, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from ...models.test import Test, test_prompt_association
+from ...settings.settings import settings
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+results = test_prompt_association.c
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+class ResponseCorpus:
+    """
+    Term matrices of a set of responses, built once and scored pair by pair.
+
+    Rows are responses and columns terms: `tfidf` holds L2-normalized TF-IDF
+    weights and `terms` marks which terms occur, so every similarity below is
+    a sparse row-wise product rather than a loop over response pairs.
+    """
+
+    def __init__(self, texts: Sequence[str]):
+        tokenized = [tokenize(text) for text in texts]
+        vocabulary = {}
+        columns = np.fromiter(
+            (vocabulary.setdefault(token, len(vocabulary)) for tokens in tokenized for token in tokens),
+            dtype=np.int64,
+        )
+        lengths = np.fromiter((len(tokens) for tokens in tokenized), dtype=np.int64, count=len(tokenized))
+        shape = (len(texts), max(len(vocabulary), 1))
+        # Duplicate (row, term) entries are summed into term counts
+        counts = sparse.csr_matrix(
+            (np.ones(columns.size), (np.repeat(np.arange(len(texts)), lengths), columns)),
+            shape=shape,
+        )
+        counts.sum_duplicates()
+
+        self.lengths = np.asarray(counts.sum(axis=1)).ravel()
+        self.distinct_terms = np.diff(counts.indptr).astype(np.float64)
+        self.terms = counts.copy()
+        self.terms.data[:] = 1.0
+
+        # Smoothed inverse document frequency, as scikit-learn's TfidfTransformer
+        document_frequency = np.bincount(counts.indices, minlength=shape[1])
+        idf = np.log((1 + shape[0]) / (1 + document_frequency)) + 1
+        tfidf = counts @ sparse.diags(idf)
+        norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1)).ravel())
+        inverse_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        self.tfidf = sparse.csr_matrix(sparse.diags(inverse_norms) @ tfidf)
+
+    def pair_scores(self, left: np.ndarray, right: np.ndarray) -> dict:
+        """
+        Similarity of response left[i] to response right[i], for every i.
+
+        `length_delta` is the change in token count relative to the left
+        response; two empty responses count as identical.
+        """
+        both_empty = (self.lengths[left] == 0) & (self.lengths[right] == 0)
+
+        cosine = np.asarray(self.tfidf[left].multiply(self.tfidf[right]).sum(axis=1)).ravel()
+        cosine = np.where(both_empty, 1.0, np.clip(cosine, 0.0, 1.0))
+
+        shared = np.asarray(self.terms[left].multiply(self.terms[right]).sum(axis=1)).ravel()
+        union = self.distinct_terms[left] + self.distinct_terms[right] - shared
+        jaccard = np.divide(shared, union, out=np.ones_like(shared), where=union > 0)
+
+        length_delta = (self.lengths[right] - self.lengths[left]) / np.maximum(self.lengths[left], 1)
+        return {"cosine": cosine, "jaccard": jaccard, "length_delta": length_delta, "drift": 1.0 - cosine}
+
+
+def _latest_responses(db, prompt_ids) -> dict:
+    """
+    The latest successful response of each prompt to each input.
+
+    Inputs are matched by user input and image rather than by test, so a new
+    prompt version run on the same input in a new test still lines up.
+    """
+    query = (
+        db.query(results.prompt_id, results.test_id, Test.user_input, Test.image_hash, results.llm_response)
+        .join(Test, Test.id == results.test_id)
+        .filter(
+            results.prompt_id.in_(prompt_ids),
+            results.error.is_(None),
+            results.llm_response.isnot(None),
+        )
+        .order_by(results.creation_date, results.test_id)
+        .yield_per(settings.STREAM_BATCH_SIZE)
+    )
+    responses = {prompt_id: {} for prompt_id in prompt_ids}
+    for row in query:
+        responses[row.prompt_id][(row.user_input or "", row.image_hash or "")] = row
+    return responses
+
+
+def _mean(values: np.ndarray):
+    return float(values.mean()) if values.size else None
+
+
+def compare_prompt_versions(db, prompts: Sequence, include_inputs: bool = False) -> List[dict]:
+    """
+    Pairwise drift between the responses of prompt versions on their shared inputs.
+
+    Every pair of the given prompts is compared, older version first. All
+    responses share one corpus, so TF-IDF weights are comparable across pairs.
+    """
+    prompts = sorted(prompts, key=lambda prompt: (prompt.version or 0, prompt.creation_date or datetime.min))
+    responses = _latest_responses(db, [prompt.id for prompt in prompts])
+
+    rows = {}
+    texts = []
+    for prompt_id, by_input in responses.items():
+        for input_key, response in by_input.items():
+            rows[(prompt_id, input_key)] = len(texts)
+            texts.append(response.llm_response)
+    corpus = ResponseCorpus(texts)
+
+    comparisons = []
+    for left, right in itertools.combinations(prompts, 2):
+        shared = sorted(responses[left.id].keys() & responses[right.id].keys())
+        scores = corpus.pair_scores(
+            np.asarray([rows[(left.id, key)] for key in shared], dtype=np.int64),
+            np.asarray([rows[(right.id, key)] for key in shared], dtype=np.int64),
+        )
+        comparison = {
+            "left_prompt_id": left.id,
+            "left_version": left.version,
+            "right_prompt_id": right.id,
+            "right_version": right.version,
+            "count": len(shared),
+            "cosine_mean": _mean(scores["cosine"]),
+            "jaccard_mean": _mean(scores["jaccard"]),
+            "length_delta_mean": _mean(scores["length_delta"]),
+            "drift_mean": _mean(scores["drift"]),
+            "drift_max": float(scores["drift"].max()) if shared else None,
+        }
+        if include_inputs:
+            comparison["inputs"] = [
+                {
+                    "user_input": responses[left.id][key].user_input,
+                    "image_hash": responses[left.id][key].image_hash,
+                    "left_test_id": responses[left.id][key].test_id,
+                    "right_test_id": responses[right.id][key].test_id,
+                    **{name: float(values[i]) for name, values in scores.items()},
+                }
+                for i, key in enumerate(shared)
+            ]
+        comparisons.append(comparison)
+    return comparisons
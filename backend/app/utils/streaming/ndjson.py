@@ -0,0 +1,59 @@
+import json
+from typing import Callable
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from ...exceptions.error_messages import ErrorMessages
+from ...settings.settings import settings
+from ...utils.logger.logger import logger
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Lines are flushed to the socket once this many bytes are buffered
+FLUSH_BYTES = 64 * 1024
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Whether the client asked for newline-delimited JSON in its Accept header."""
+    accept = request.headers.get("accept", "")
+    return any(
+        media_range.split(";")[0].strip() == NDJSON_MEDIA_TYPE
+        for media_range in accept.split(",")
+    )
+
+
+def stream_ndjson(db, query, serialize: Callable[..., str]) -> StreamingResponse:
+    """
+    Stream every row of a query as one JSON document per line.
+
+    Rows are fetched STREAM_BATCH_SIZE at a time from a server-side cursor and
+    written out as they arrive, so memory stays flat whatever the result size.
+    The request's session has been closed by the time the body is sent; it is
+    reopened for the stream and closed again when the stream ends. An error
+    part way through can no longer change the status, so the stream ends with
+    an `{"error": ...}` line instead of looking complete.
+    """
+
+    def lines():
+        buffer = []
+        buffered = 0
+        try:
+            for row in query.yield_per(settings.STREAM_BATCH_SIZE):
+                line = serialize(row) + "\n"
+                buffer.append(line)
+                buffered += len(line)
+                if buffered >= FLUSH_BYTES:
+                    yield "".join(buffer)
+                    buffer, buffered = [], 0
+            if buffer:
+                yield "".join(buffer)
+        except Exception as e:
+            logger.error(f"NDJSON stream ended early: {e}")
+            buffer.append(json.dumps({
+                "error": {"error_key": "STREAM_INCOMPLETE", "message": ErrorMessages.STREAM_INCOMPLETE}
+            }) + "\n")
+            yield "".join(buffer)
+        finally:
+            db.close()
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
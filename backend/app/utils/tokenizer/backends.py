@@ -0,0 +1,81 @@
+import importlib.util
+import os
+from abc import ABC, abstractmethod
+from typing import List
+
+import gpt3_tokenizer
+
+
+class TokenizerBackend(ABC):
+    """Counts tokens for a batch of texts. Vocabularies are loaded by `load`, on first use."""
+
+    name = "base"
+
+    def load(self):
+        """Load the vocabulary; raise if this backend isn't available here."""
+
+    @abstractmethod
+    def count_batch(self, texts: List[str]) -> List[int]:
+        """Token count of each text."""
+
+
+class HuggingFaceTokenizer(TokenizerBackend):
+    """Native (Rust) tokenizer from a tokenizer.json file, encoding batches in parallel."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = f"tokenizers:{os.path.basename(path)}"
+        self._tokenizer = None
+
+    def load(self):
+        if not self.path or not os.path.isfile(self.path):
+            raise FileNotFoundError(self.path)
+        from tokenizers import Tokenizer
+
+        self._tokenizer = Tokenizer.from_file(self.path)
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        encodings = self._tokenizer.encode_batch(texts, add_special_tokens=False)
+        return [len(encoding.ids) for encoding in encodings]
+
+
+class TiktokenTokenizer(TokenizerBackend):
+    """Native BPE from tiktoken; the vocabulary is downloaded once into tiktoken's cache."""
+
+    def __init__(self, encoding_name: str):
+        self.encoding_name = encoding_name
+        self.name = f"tiktoken:{encoding_name}"
+        self._encoding = None
+
+    def load(self):
+        import tiktoken
+
+        self._encoding = tiktoken.get_encoding(self.encoding_name)
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        return [len(tokens) for tokens in self._encoding.encode_ordinary_batch(texts)]
+
+
+class GPT3Tokenizer(TokenizerBackend):
+    """Pure-Python GPT-3 BPE, always available; the last resort of models of no known family."""
+
+    name = "gpt3_tokenizer"
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        return [gpt3_tokenizer.count_tokens(text) for text in texts]
+
+
+def bundled_anthropic_vocabulary() -> str:
+    """Path of the Claude tokenizer.json shipped with litellm, if installed."""
+    spec = importlib.util.find_spec("litellm")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    package_dir = list(spec.submodule_search_locations)[0]
+    for relative_path in (
+        "litellm_core_utils/tokenizers/anthropic_tokenizer.json",
+        "llms/tokenizers/anthropic_tokenizer.json",
+    ):
+        path = os.path.join(package_dir, relative_path)
+        if os.path.isfile(path):
+            return path
+    return None
@@ -0,0 +1,184 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from ...settings.settings import settings
+from ...utils.logger.logger import logger
+from .backends import (
+    GPT3Tokenizer,
+    HuggingFaceTokenizer,
+    TiktokenTokenizer,
+    TokenizerBackend,
+    bundled_anthropic_vocabulary,
+)
+
+DEFAULT_FAMILY = "default"
+
+# Bedrock model id prefixes, e.g. "anthropic.claude-3-haiku-...", "meta.llama3-..."
+MODEL_FAMILIES = ("anthropic", "amazon", "meta", "mistral", "cohere", "ai21")
+
+
+def model_family(llm_model_id: str = None) -> str:
+    """Map a Bedrock model id, including cross-region profile ids like "us.anthropic...", to a family."""
+    if not llm_model_id:
+        return DEFAULT_FAMILY
+    for part in llm_model_id.lower().split(".")[:2]:
+        if part in MODEL_FAMILIES:
+            return part
+    return DEFAULT_FAMILY
+
+
+def _local_vocabulary(family: str):
+    if not settings.TOKENIZER_DIR:
+        return []
+    return [HuggingFaceTokenizer(os.path.join(settings.TOKENIZER_DIR, f"{family}.json"))]
+
+
+def _candidates(family: str) -> List[TokenizerBackend]:
+    """
+    Backends to try for a family, most accurate first.
+
+    Only vocabularies of the family itself qualify: a family without one
+    has no tokenizer, and its counts are None rather than another model's
+    count passed off as exact. Models of no known family keep the GPT-3
+    counts prompts have always been stored with.
+    """
+    candidates = _local_vocabulary(family)
+    if family == "anthropic":
+        candidates.append(HuggingFaceTokenizer(bundled_anthropic_vocabulary()))
+    if family == DEFAULT_FAMILY:
+        # Same vocabulary as gpt3_tokenizer, natively implemented
+        candidates.append(TiktokenTokenizer("r50k_base"))
+        candidates.append(GPT3Tokenizer())
+    return candidates
+
+
+class TokenizerRegistry:
+    """
+    Resolves and loads one tokenizer backend per model family.
+
+    Vocabularies may have to be downloaded, so `preload` loads every family
+    at startup; a family loaded on first use only blocks callers of that
+    family, never the others.
+    """
+
+    def __init__(self):
+        self._backends = {}
+        self._family_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, family: str) -> Optional[TokenizerBackend]:
+        """The family's tokenizer, or None if no vocabulary of the family is available."""
+        if family in self._backends:
+            return self._backends[family]
+        with self._lock:
+            family_lock = self._family_locks.setdefault(family, threading.Lock())
+        with family_lock:
+            if family not in self._backends:
+                self._backends[family] = self._load(family)
+            return self._backends[family]
+
+    def preload(self):
+        """Load the tokenizer of every known family."""
+        for family in (*MODEL_FAMILIES, DEFAULT_FAMILY):
+            self.get(family)
+
+    @staticmethod
+    def _load(family: str) -> Optional[TokenizerBackend]:
+        for candidate in _candidates(family):
+            try:
+                candidate.load()
+            except Exception as e:
+                logger.debug(f"Tokenizer {candidate.name} unavailable for {family}: {e}")
+                continue
+            logger.info(f"Using tokenizer {candidate.name} for {family} models")
+            return candidate
+        logger.warning(f"No tokenizer for {family} models; their token counts are left empty")
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._backends.clear()
+
+
+tokenizers = TokenizerRegistry()
+
+
+class TokenCountCache:
+    """LRU of token counts keyed by model family and a SHA-256 of the text."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(family: str, text: str) -> tuple:
+        return (family, hashlib.sha256(text.encode("utf-8")).hexdigest())
+
+    def get(self, key: tuple):
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+            return count
+
+    def put(self, key: tuple, count: int):
+        with self._lock:
+            self._counts[key] = count
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+token_counts = TokenCountCache(max_entries=settings.TOKEN_COUNT_CACHE_SIZE)
+
+
+def count_tokens_batch(texts: List[str], llm_model_id: str = None) -> List[Optional[int]]:
+    """
+    Count the tokens of many texts with the tokenizer of a model's family.
+
+    Texts already counted are served from the LRU; the rest are tokenized
+    together in a single backend call. Counts are None for a family without
+    a tokenizer.
+    """
+    family = model_family(llm_model_id)
+    backend = tokenizers.get(family)
+    if backend is None:
+        return [0 if not text else None for text in texts]
+    counts = [0] * len(texts)
+    pending = {}
+    for index, text in enumerate(texts):
+        if not text:
+            continue
+        key = token_counts.key(family, text)
+        count = token_counts.get(key)
+        if count is not None:
+            counts[index] = count
+        else:
+            pending.setdefault(key, (text, []))[1].append(index)
+
+    if pending:
+        keys = list(pending)
+        fresh = backend.count_batch([pending[key][0] for key in keys])
+        for key, count in zip(keys, fresh):
+            token_counts.put(key, count)
+            for index in pending[key][1]:
+                counts[index] = count
+    return counts
+
+
+def count_tokens(text: str, llm_model_id: str = None) -> Optional[int]:
+    """Count the tokens of a text with the tokenizer of a model's family."""
+    return count_tokens_batch([text], llm_model_id)[0]
+
+
+if __name__ == "__main__":
+    # Fetch every vocabulary into the tokenizer caches, e.g. while building an image
+    tokenizers.preload()
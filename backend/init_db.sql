@@ -17,6 +17,7 @@ DROP TABLE IF EXISTS prompt_template;
 DROP TABLE IF EXISTS prompts;
 DROP TABLE IF EXISTS tests;
 DROP TABLE IF EXISTS test_prompt_association;
+DROP TABLE IF EXISTS llm_response_cache;
 
 -- Create the projects table
 CREATE TABLE projects (
@@ -27,6 +28,8 @@ CREATE TABLE projects (
     description TEXT
 );
 
+CREATE INDEX ix_projects_creation_date_id ON projects (creation_date, id);
+
 -- Create the llm table
 CREATE TABLE llm (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -35,9 +38,14 @@ CREATE TABLE llm (
     access_key VARCHAR(255),
     secret_access_key VARCHAR(255),
     aws_region VARCHAR(100),
-    llm_model_id VARCHAR(255)
+    llm_model_id VARCHAR(255),
+    requests_per_minute INTEGER,
+    tokens_per_minute INTEGER,
+    creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX ix_llm_creation_date_id ON llm (creation_date, id);
+
 -- Create the prompt_template table
 CREATE TABLE prompt_template (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -52,6 +60,8 @@ CREATE TABLE prompt_template (
         REFERENCES projects(id)
 );
 
+CREATE INDEX ix_prompt_template_project_creation_date_id ON prompt_template (project_id, creation_date, id);
+
 -- Create the prompts table
 CREATE TABLE prompts (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -60,6 +70,7 @@ CREATE TABLE prompts (
     notes TEXT,
     creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     version NUMERIC(3, 1) DEFAULT 0.0,
+    prompt_tokens INTEGER,
     llm_id UUID,
     prompt_template_id UUID,
     CONSTRAINT fk_llm
@@ -70,13 +81,66 @@ CREATE TABLE prompts (
         REFERENCES prompt_template(id)
 );
 
+CREATE INDEX ix_prompts_template_creation_date_id ON prompts (prompt_template_id, creation_date, id);
+
+-- Create the datasets table
+CREATE TABLE datasets (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    name VARCHAR(255) NOT NULL,
+    format VARCHAR(10) NOT NULL,
+    item_count INTEGER NOT NULL DEFAULT 0,
+    creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create the dataset_items table
+CREATE TABLE dataset_items (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    dataset_id UUID NOT NULL REFERENCES datasets(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    user_input TEXT NOT NULL,
+    expected_answer TEXT,
+    expected_pattern TEXT
+);
+
+CREATE INDEX ix_dataset_items_dataset_position ON dataset_items (dataset_id, position);
+
+-- Create the dataset_runs table
+CREATE TABLE dataset_runs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    dataset_id UUID NOT NULL REFERENCES datasets(id) ON DELETE CASCADE,
+    name VARCHAR(255) NOT NULL,
+    prompt_ids JSON NOT NULL,
+    creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX ix_dataset_runs_dataset_id ON dataset_runs (dataset_id);
+
 -- Create the tests table
 CREATE TABLE tests (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     test_name VARCHAR(255) NOT NULL,
     user_input TEXT,
     creation_date TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    image BYTEA
+    image_hash VARCHAR(64),
+    expected_answer TEXT,
+    expected_pattern TEXT,
+    dataset_run_id UUID REFERENCES dataset_runs(id) ON DELETE SET NULL,
+    matrix_id UUID,
+    matrix_name VARCHAR(255),
+    llm_id UUID REFERENCES llm(id) ON DELETE SET NULL
+);
+
+CREATE INDEX ix_tests_image_hash ON tests (image_hash);
+CREATE INDEX ix_tests_dataset_run_id ON tests (dataset_run_id);
+CREATE INDEX ix_tests_matrix_id ON tests (matrix_id);
+
+-- Create the image_blobs table
+CREATE TABLE image_blobs (
+    hash VARCHAR(64) PRIMARY KEY,
+    content_type VARCHAR(100),
+    size BIGINT NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create the test_prompt_association table
@@ -84,11 +148,115 @@ CREATE TABLE test_prompt_association (
     test_id UUID REFERENCES tests(id) ON DELETE CASCADE,
     prompt_id UUID REFERENCES prompts(id) ON DELETE CASCADE,
     PRIMARY KEY (test_id, prompt_id),
+    llm_id UUID REFERENCES llm(id) ON DELETE SET NULL,
+    creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     llm_response TEXT,
     input_tokens INTEGER,
     output_tokens INTEGER,
     total_tokens INTEGER,
     latency_ms NUMERIC,
     prompt_tokens INTEGER,
-    user_input_tokens INTEGER
-);
\ No newline at end of file
+    user_input_tokens INTEGER,
+    time_to_first_token_ms INTEGER,
+    tokens_per_second REAL,
+    cache_hit BOOLEAN DEFAULT FALSE,
+    error TEXT,
+    exact_match BOOLEAN,
+    regex_match BOOLEAN,
+    bleu REAL,
+    rouge_1 REAL,
+    rouge_l REAL,
+    minhash BYTEA
+);
+
+CREATE INDEX ix_test_prompt_association_prompt_creation_date ON test_prompt_association (prompt_id, creation_date, test_id);
+
+-- Create the result_samples table
+CREATE TABLE result_samples (
+    test_id UUID REFERENCES tests(id) ON DELETE CASCADE,
+    prompt_id UUID REFERENCES prompts(id) ON DELETE CASCADE,
+    sample SMALLINT,
+    PRIMARY KEY (test_id, prompt_id, sample),
+    llm_id UUID REFERENCES llm(id) ON DELETE SET NULL,
+    llm_response TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    total_tokens INTEGER,
+    latency_ms INTEGER,
+    time_to_first_token_ms INTEGER,
+    tokens_per_second REAL,
+    error TEXT
+);
+
+CREATE INDEX ix_result_samples_prompt_id ON result_samples (prompt_id);
+
+-- Create the test_jobs table
+CREATE TABLE test_jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    test_id UUID REFERENCES tests(id) ON DELETE CASCADE,
+    dataset_run_id UUID REFERENCES dataset_runs(id) ON DELETE CASCADE,
+    kind VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    payload JSON NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    locked_by VARCHAR(255),
+    locked_until TIMESTAMP,
+    run_after TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    error TEXT,
+    creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX ix_test_jobs_test_id ON test_jobs (test_id);
+CREATE INDEX ix_test_jobs_dataset_run_id ON test_jobs (dataset_run_id);
+CREATE INDEX ix_test_jobs_status_run_after ON test_jobs (status, run_after);
+
+-- Create the response_lsh_bands table
+CREATE TABLE response_lsh_bands (
+    test_id UUID REFERENCES tests(id) ON DELETE CASCADE,
+    prompt_id UUID REFERENCES prompts(id) ON DELETE CASCADE,
+    band SMALLINT,
+    bucket BIGINT NOT NULL,
+    PRIMARY KEY (test_id, prompt_id, band)
+);
+
+CREATE INDEX ix_response_lsh_bands_band_bucket ON response_lsh_bands (band, bucket);
+CREATE INDEX ix_response_lsh_bands_prompt_id ON response_lsh_bands (prompt_id);
+
+-- Create the result_rollups table
+CREATE TABLE result_rollups (
+    prompt_id UUID REFERENCES prompts(id) ON DELETE CASCADE,
+    llm_id UUID,
+    day DATE,
+    PRIMARY KEY (prompt_id, llm_id, day),
+    count BIGINT NOT NULL DEFAULT 0,
+    error_count BIGINT NOT NULL DEFAULT 0,
+    latency_count BIGINT NOT NULL DEFAULT 0,
+    latency_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    latency_sum_squares DOUBLE PRECISION NOT NULL DEFAULT 0,
+    latency_min DOUBLE PRECISION,
+    latency_max DOUBLE PRECISION,
+    latency_sketch JSON,
+    tokens_count BIGINT NOT NULL DEFAULT 0,
+    input_tokens_sum BIGINT NOT NULL DEFAULT 0,
+    output_tokens_sum BIGINT NOT NULL DEFAULT 0,
+    total_tokens_sum BIGINT NOT NULL DEFAULT 0,
+    total_tokens_sum_squares DOUBLE PRECISION NOT NULL DEFAULT 0,
+    total_tokens_sketch JSON,
+    tokens_per_second_count BIGINT NOT NULL DEFAULT 0,
+    tokens_per_second_sum DOUBLE PRECISION NOT NULL DEFAULT 0
+);
+
+-- Create the llm_response_cache table
+CREATE TABLE llm_response_cache (
+    cache_key VARCHAR(64) PRIMARY KEY,
+    llm_model_id VARCHAR(255),
+    response JSON NOT NULL,
+    creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX ix_llm_response_cache_expires_at ON llm_response_cache (expires_at);
\ No newline at end of file
@@ -0,0 +1,3 @@
+-- Time to first token and generation throughput of streamed test runs
+ALTER TABLE test_prompt_association ADD COLUMN IF NOT EXISTS time_to_first_token_ms INTEGER;
+ALTER TABLE test_prompt_association ADD COLUMN IF NOT EXISTS tokens_per_second REAL;
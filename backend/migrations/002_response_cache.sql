@@ -0,0 +1,12 @@
+-- Persistent tier of the LLM response cache
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key VARCHAR(64) PRIMARY KEY,
+    llm_model_id VARCHAR(255),
+    response JSON NOT NULL,
+    creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_llm_response_cache_expires_at ON llm_response_cache (expires_at);
+
+ALTER TABLE test_prompt_association ADD COLUMN IF NOT EXISTS cache_hit BOOLEAN DEFAULT FALSE;
@@ -0,0 +1,3 @@
+-- Per-LLM Bedrock quotas used by the adaptive rate limiter
+ALTER TABLE llm ADD COLUMN IF NOT EXISTS requests_per_minute INTEGER;
+ALTER TABLE llm ADD COLUMN IF NOT EXISTS tokens_per_minute INTEGER;
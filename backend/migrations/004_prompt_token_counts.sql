@@ -0,0 +1,3 @@
+-- Token count of the prompt text, computed when a prompt is written.
+-- Rows created before this migration are filled in the first time they are tested.
+ALTER TABLE prompts ADD COLUMN IF NOT EXISTS prompt_tokens INTEGER;
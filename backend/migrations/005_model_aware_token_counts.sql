@@ -0,0 +1,3 @@
+-- Prompt token counts are now computed with the tokenizer of the prompt's model.
+-- Clear counts made with the GPT-3 vocabulary; they are recomputed the next time a prompt is tested.
+UPDATE prompts SET prompt_tokens = NULL WHERE prompt_tokens IS NOT NULL;
@@ -0,0 +1,13 @@
+-- Test images move to a content-addressed store; tests keep only the SHA-256 of the image.
+-- After applying, run `python -m app.utils.blobs.migrate_test_images` to move existing
+-- images, then apply 007 to drop the old column.
+CREATE TABLE IF NOT EXISTS image_blobs (
+    hash VARCHAR(64) PRIMARY KEY,
+    content_type VARCHAR(100),
+    size BIGINT NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE tests ADD COLUMN IF NOT EXISTS image_hash VARCHAR(64);
+CREATE INDEX IF NOT EXISTS ix_tests_image_hash ON tests (image_hash);
@@ -0,0 +1,2 @@
+-- Apply once `python -m app.utils.blobs.migrate_test_images` has moved every image.
+ALTER TABLE tests DROP COLUMN IF EXISTS image;
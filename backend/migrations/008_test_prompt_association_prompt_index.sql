@@ -0,0 +1,2 @@
+-- Tests are listed per prompt; the (test_id, prompt_id) primary key can't serve that lookup.
+CREATE INDEX IF NOT EXISTS ix_test_prompt_association_prompt_id ON test_prompt_association (prompt_id);
@@ -0,0 +1,34 @@
+-- Keyset pagination of list endpoints on (creation_date, id), newest first.
+
+ALTER TABLE llm ADD COLUMN IF NOT EXISTS creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+-- Results record the LLM that produced them and when, so a prompt's results
+-- can be paged and filtered from test_prompt_association alone.
+ALTER TABLE test_prompt_association ADD COLUMN IF NOT EXISTS llm_id UUID REFERENCES llm(id) ON DELETE SET NULL;
+ALTER TABLE test_prompt_association ADD COLUMN IF NOT EXISTS creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+UPDATE test_prompt_association a
+SET llm_id = p.llm_id
+FROM prompts p
+WHERE p.id = a.prompt_id AND a.llm_id IS NULL;
+
+UPDATE test_prompt_association a
+SET creation_date = t.creation_date
+FROM tests t
+WHERE t.id = a.test_id;
+
+-- Rows without a creation date would never appear in a page
+UPDATE projects SET creation_date = TIMESTAMP 'epoch' WHERE creation_date IS NULL;
+UPDATE prompt_template SET creation_date = TIMESTAMP 'epoch' WHERE creation_date IS NULL;
+UPDATE prompts SET creation_date = TIMESTAMP 'epoch' WHERE creation_date IS NULL;
+UPDATE test_prompt_association SET creation_date = TIMESTAMP 'epoch' WHERE creation_date IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_projects_creation_date_id ON projects (creation_date, id);
+CREATE INDEX IF NOT EXISTS ix_llm_creation_date_id ON llm (creation_date, id);
+CREATE INDEX IF NOT EXISTS ix_prompt_template_project_creation_date_id ON prompt_template (project_id, creation_date, id);
+CREATE INDEX IF NOT EXISTS ix_prompts_template_creation_date_id ON prompts (prompt_template_id, creation_date, id);
+CREATE INDEX IF NOT EXISTS ix_test_prompt_association_prompt_creation_date
+    ON test_prompt_association (prompt_id, creation_date, test_id);
+
+-- Superseded by the index above
+DROP INDEX IF EXISTS ix_test_prompt_association_prompt_id;
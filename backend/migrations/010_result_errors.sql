@@ -0,0 +1,2 @@
+-- Failed LLM calls are recorded with their error, so analytics can report an error rate.
+ALTER TABLE test_prompt_association ADD COLUMN IF NOT EXISTS error TEXT;
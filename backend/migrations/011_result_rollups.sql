@@ -0,0 +1,25 @@
+-- Daily rollups of test results, which the analytics endpoints read instead of raw results.
+-- After applying, run `python -m app.utils.analytics.rebuild_rollups` to fill them from
+-- existing results; new results are added as tests are created.
+CREATE TABLE IF NOT EXISTS result_rollups (
+    prompt_id UUID REFERENCES prompts(id) ON DELETE CASCADE,
+    llm_id UUID,
+    day DATE,
+    PRIMARY KEY (prompt_id, llm_id, day),
+    count BIGINT NOT NULL DEFAULT 0,
+    error_count BIGINT NOT NULL DEFAULT 0,
+    latency_count BIGINT NOT NULL DEFAULT 0,
+    latency_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    latency_sum_squares DOUBLE PRECISION NOT NULL DEFAULT 0,
+    latency_min DOUBLE PRECISION,
+    latency_max DOUBLE PRECISION,
+    latency_sketch JSON,
+    tokens_count BIGINT NOT NULL DEFAULT 0,
+    input_tokens_sum BIGINT NOT NULL DEFAULT 0,
+    output_tokens_sum BIGINT NOT NULL DEFAULT 0,
+    total_tokens_sum BIGINT NOT NULL DEFAULT 0,
+    total_tokens_sum_squares DOUBLE PRECISION NOT NULL DEFAULT 0,
+    total_tokens_sketch JSON,
+    tokens_per_second_count BIGINT NOT NULL DEFAULT 0,
+    tokens_per_second_sum DOUBLE PRECISION NOT NULL DEFAULT 0
+);
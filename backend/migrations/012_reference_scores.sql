@@ -0,0 +1,9 @@
+-- Tests can carry an expected answer and pattern; results store their scores against them.
+ALTER TABLE tests ADD COLUMN IF NOT EXISTS expected_answer TEXT;
+ALTER TABLE tests ADD COLUMN IF NOT EXISTS expected_pattern TEXT;
+
+ALTER TABLE test_prompt_association ADD COLUMN IF NOT EXISTS exact_match BOOLEAN;
+ALTER TABLE test_prompt_association ADD COLUMN IF NOT EXISTS regex_match BOOLEAN;
+ALTER TABLE test_prompt_association ADD COLUMN IF NOT EXISTS bleu REAL;
+ALTER TABLE test_prompt_association ADD COLUMN IF NOT EXISTS rouge_1 REAL;
+ALTER TABLE test_prompt_association ADD COLUMN IF NOT EXISTS rouge_l REAL;
@@ -0,0 +1,15 @@
+-- MinHash signatures of responses and their LSH buckets, for near-duplicate detection.
+-- After applying, run `python -m app.utils.similarity.backfill_minhashes` to index
+-- existing results.
+ALTER TABLE test_prompt_association ADD COLUMN IF NOT EXISTS minhash BYTEA;
+
+CREATE TABLE IF NOT EXISTS response_lsh_bands (
+    test_id UUID REFERENCES tests(id) ON DELETE CASCADE,
+    prompt_id UUID REFERENCES prompts(id) ON DELETE CASCADE,
+    band SMALLINT,
+    bucket BIGINT NOT NULL,
+    PRIMARY KEY (test_id, prompt_id, band)
+);
+
+CREATE INDEX IF NOT EXISTS ix_response_lsh_bands_band_bucket ON response_lsh_bands (band, bucket);
+CREATE INDEX IF NOT EXISTS ix_response_lsh_bands_prompt_id ON response_lsh_bands (prompt_id);
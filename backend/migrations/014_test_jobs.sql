@@ -0,0 +1,21 @@
+-- Queue of test runs executed by background workers (python -m app.utils.jobs.worker).
+CREATE TABLE IF NOT EXISTS test_jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    test_id UUID NOT NULL REFERENCES tests(id) ON DELETE CASCADE,
+    kind VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    payload JSON NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    locked_by VARCHAR(255),
+    locked_until TIMESTAMP,
+    run_after TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    error TEXT,
+    creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_test_jobs_test_id ON test_jobs (test_id);
+CREATE INDEX IF NOT EXISTS ix_test_jobs_status_run_after ON test_jobs (status, run_after);
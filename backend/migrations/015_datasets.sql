@@ -0,0 +1,38 @@
+-- Uploaded datasets of test inputs, and runs of a dataset against a set of prompts.
+CREATE TABLE IF NOT EXISTS datasets (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    name VARCHAR(255) NOT NULL,
+    format VARCHAR(10) NOT NULL,
+    item_count INTEGER NOT NULL DEFAULT 0,
+    creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS dataset_items (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    dataset_id UUID NOT NULL REFERENCES datasets(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    user_input TEXT NOT NULL,
+    expected_answer TEXT,
+    expected_pattern TEXT
+);
+
+CREATE INDEX IF NOT EXISTS ix_dataset_items_dataset_position ON dataset_items (dataset_id, position);
+
+CREATE TABLE IF NOT EXISTS dataset_runs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    dataset_id UUID NOT NULL REFERENCES datasets(id) ON DELETE CASCADE,
+    name VARCHAR(255) NOT NULL,
+    prompt_ids JSON NOT NULL,
+    creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_dataset_runs_dataset_id ON dataset_runs (dataset_id);
+
+-- Each item of a run is a test of its own
+ALTER TABLE tests ADD COLUMN IF NOT EXISTS dataset_run_id UUID REFERENCES dataset_runs(id) ON DELETE SET NULL;
+CREATE INDEX IF NOT EXISTS ix_tests_dataset_run_id ON tests (dataset_run_id);
+
+-- A whole run is one job
+ALTER TABLE test_jobs ALTER COLUMN test_id DROP NOT NULL;
+ALTER TABLE test_jobs ADD COLUMN IF NOT EXISTS dataset_run_id UUID REFERENCES dataset_runs(id) ON DELETE CASCADE;
+CREATE INDEX IF NOT EXISTS ix_test_jobs_dataset_run_id ON test_jobs (dataset_run_id);
@@ -0,0 +1,5 @@
+-- Matrix runs: one test per LLM, grouped by matrix_id, whose prompts run on the test's LLM.
+ALTER TABLE tests ADD COLUMN IF NOT EXISTS matrix_id UUID;
+ALTER TABLE tests ADD COLUMN IF NOT EXISTS matrix_name VARCHAR(255);
+ALTER TABLE tests ADD COLUMN IF NOT EXISTS llm_id UUID REFERENCES llm(id) ON DELETE SET NULL;
+CREATE INDEX IF NOT EXISTS ix_tests_matrix_id ON tests (matrix_id);
@@ -0,0 +1,18 @@
+-- Every call of a test run with repeated sampling (POST /test/text with samples > 1).
+CREATE TABLE IF NOT EXISTS result_samples (
+    test_id UUID REFERENCES tests(id) ON DELETE CASCADE,
+    prompt_id UUID REFERENCES prompts(id) ON DELETE CASCADE,
+    sample SMALLINT,
+    PRIMARY KEY (test_id, prompt_id, sample),
+    llm_id UUID REFERENCES llm(id) ON DELETE SET NULL,
+    llm_response TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    total_tokens INTEGER,
+    latency_ms INTEGER,
+    time_to_first_token_ms INTEGER,
+    tokens_per_second REAL,
+    error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS ix_result_samples_prompt_id ON result_samples (prompt_id);
@@ -39,4 +39,66 @@ def client(test_db):
     app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides.clear()
+
+class FakeBedrockClient:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+
+    def converse(self, **request):
+        import time
+        self.calls.append(request)
+        if self.delay:
+            time.sleep(self.delay)
+        text = request["messages"][0]["content"][0]["text"]
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": f"echo: {text}"}]}},
+            "usage": {"inputTokens": 10, "outputTokens": 5, "totalTokens": 15},
+            "metrics": {"latencyMs": 100},
+        }
+
+
+    def converse_stream(self, **request):
+        self.calls.append(request)
+        text = request["messages"][0]["content"][0]["text"]
+        return {"stream": FakeEventStream([
+            {"messageStart": {"role": "assistant"}},
+            {"contentBlockDelta": {"delta": {"text": "echo: "}, "contentBlockIndex": 0}},
+            {"contentBlockDelta": {"delta": {"text": text}, "contentBlockIndex": 0}},
+            {"contentBlockStop": {"contentBlockIndex": 0}},
+            {"messageStop": {"stopReason": "end_turn"}},
+            {"metadata": {
+                "usage": {"inputTokens": 10, "outputTokens": 5, "totalTokens": 15},
+                "metrics": {"latencyMs": 100},
+            }},
+        ])}
+
+
+class FakeEventStream:
+    def __init__(self, events):
+        self.events = events
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(scope="function")
+def fake_bedrock(monkeypatch):
+    from app.utils.llm.client_pool import bedrock_clients
+
+    fake_client = FakeBedrockClient()
+    monkeypatch.setattr(bedrock_clients, "get_client", lambda llm: fake_client)
+    return fake_client
+
+
+@pytest.fixture(scope="function")
+def image_store_root(tmp_path, monkeypatch):
+    from app.utils.blobs.blob_store import image_store
+
+    monkeypatch.setattr(image_store.blobs, "root", str(tmp_path))
+    return tmp_path
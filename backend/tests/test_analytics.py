@@ -0,0 +1,161 @@
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.llm import LLM
+from app.models.prompt import Prompt
+from app.models.test import Test
+from app.models.result_rollup import ResultRollup
+from app.utils.analytics.rebuild_rollups import rebuild_rollups
+from app.utils.analytics.rollups import record_results
+from app.utils.analytics.sketch import QuantileSketch
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def template_results(test_db):
+    """Two versions of a template; version 2 runs on two LLMs, and one call failed."""
+    template_id = uuid.uuid4()
+    claude = LLM(id=uuid.uuid4(), name="Claude")
+    llama = LLM(id=uuid.uuid4(), name="Llama")
+    v1 = Prompt(id=uuid.uuid4(), name="v1", prompt="", version=1, llm_id=claude.id, prompt_template_id=template_id)
+    v2 = Prompt(id=uuid.uuid4(), name="v2", prompt="", version=2, llm_id=claude.id, prompt_template_id=template_id)
+    results = [
+        (v1, claude, 100, None), (v1, claude, 200, None), (v1, claude, 300, None), (v1, claude, 400, None),
+        (v2, claude, 50, None), (v2, claude, None, "ThrottlingException: slow down"),
+        (v2, llama, 80, None),
+    ]
+    tests = [Test(id=uuid.uuid4(), test_name=f"Test {i}", user_input="") for i in range(len(results))]
+    test_db.add_all([claude, llama, v1, v2, *tests])
+    test_db.flush()
+    record_results(test_db, [
+        {
+            "test_id": test.id,
+            "prompt_id": prompt.id,
+            "llm_id": llm.id,
+            "creation_date": START + timedelta(days=i),
+            "latency_ms": latency,
+            "input_tokens": None if error else 10,
+            "output_tokens": None if error else 20,
+            "total_tokens": None if error else 30,
+            "error": error,
+        }
+        for i, (test, (prompt, llm, latency, error)) in enumerate(zip(tests, results))
+    ])
+    test_db.commit()
+    return str(template_id), str(v1.id), str(v2.id)
+
+
+def test_prompt_template_analytics(client, template_results):
+    template_id, v1_id, v2_id = template_results
+
+    response = client.get(f"/api/v1/prompt-template/{template_id}/analytics")
+
+    assert response.status_code == 200
+    groups = {(group["version"], group["llm_name"]): group for group in response.json()}
+    assert set(groups) == {(1.0, "Claude"), (2.0, "Claude"), (2.0, "Llama")}
+
+    v1 = groups[(1.0, "Claude")]
+    assert v1["prompt_id"] == v1_id
+    assert (v1["count"], v1["error_count"], v1["error_rate"]) == (4, 0, 0.0)
+    assert v1["latency_ms_mean"] == pytest.approx(250)
+    assert v1["latency_ms_stddev"] == pytest.approx(129.0994, rel=1e-4)
+    assert v1["latency_ms_p50"] == pytest.approx(250, rel=0.02)
+    assert v1["latency_ms_p90"] == pytest.approx(370, rel=0.02)
+    assert v1["latency_ms_p99"] == pytest.approx(397, rel=0.02)
+    assert v1["total_tokens_sum"] == 120
+    assert v1["total_tokens_p50"] == pytest.approx(30, rel=0.02)
+
+    v2 = groups[(2.0, "Claude")]
+    assert (v2["count"], v2["error_count"], v2["error_rate"]) == (2, 1, 0.5)
+    assert v2["latency_ms_p50"] == pytest.approx(50, rel=0.02)
+    assert v2["total_tokens_mean"] == pytest.approx(30)
+
+
+def test_prompt_analytics_groups_by_llm(client, template_results):
+    _, _, v2_id = template_results
+
+    response = client.get(f"/api/v1/prompt/{v2_id}/analytics")
+
+    assert [(group["llm_name"], group["count"]) for group in response.json()] == [("Claude", 2), ("Llama", 1)]
+
+
+def test_analytics_date_range(client, template_results):
+    template_id, _, _ = template_results
+
+    response = client.get(
+        f"/api/v1/prompt-template/{template_id}/analytics?created_after=2024-01-02T00:00:00&created_before=2024-01-04T00:00:00"
+    )
+
+    assert [(group["version"], group["count"]) for group in response.json()] == [(1.0, 2)]
+
+
+def test_analytics_invalid_ids(client):
+    response = client.get("/api/v1/prompt-template/nope/analytics")
+    assert response.status_code == 400
+    assert "INVALID_PROMPT_TEMPLATE_ID_FORMAT" in str(response.json())
+
+    response = client.get("/api/v1/prompt/nope/analytics")
+    assert response.status_code == 400
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    values = [1.5 ** (i % 40) + i for i in range(2000)]
+    sketch = QuantileSketch()
+    sketch.update(values)
+
+    for fraction in (0.5, 0.9, 0.99):
+        assert sketch.quantile(fraction) == pytest.approx(np.percentile(values, fraction * 100), rel=0.02)
+
+
+def test_sketches_merge_and_round_trip():
+    left, right, both = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    left.update(range(1, 500))
+    right.update([0, *range(500, 1000)])
+    both.update(range(0, 1000))
+
+    merged = QuantileSketch.from_dict(left.to_dict())
+    merged.merge(QuantileSketch.from_dict(right.to_dict()))
+
+    assert merged.count == both.count == 1000
+    assert merged.to_dict() == both.to_dict()
+
+
+def test_rebuild_rollups_from_raw_results(test_db, template_results):
+    def snapshot():
+        return sorted(
+            (str(rollup.prompt_id), rollup.day, rollup.count, rollup.latency_sum, rollup.latency_sketch)
+            for rollup in test_db.query(ResultRollup)
+        )
+
+    written = snapshot()
+    test_db.query(ResultRollup).delete()
+    test_db.commit()
+
+    assert rebuild_rollups(test_db) == 7
+    test_db.commit()
+    assert snapshot() == written
+
+
+def test_create_and_delete_test_update_rollups(client, test_db, fake_bedrock):
+    llm = LLM(id=uuid.uuid4(), name="Claude", llm_model_id="anthropic.claude-v2")
+    prompt = Prompt(id=uuid.uuid4(), name="rolled", prompt="Hi", version=1, llm_id=llm.id)
+    test_db.add_all([llm, prompt])
+    test_db.commit()
+    prompt_id = str(prompt.id)
+
+    response = client.post(
+        "/api/v1/test/text",
+        json={"test_name": "rolled", "user_input": "Hello", "prompt_ids": [prompt_id]}
+    )
+    assert response.status_code == 200
+    test_id = response.json()["id"]
+
+    groups = client.get(f"/api/v1/prompt/{prompt_id}/analytics").json()
+    assert [(group["count"], group["latency_ms_mean"]) for group in groups] == [(1, 100.0)]
+
+    client.delete(f"/api/v1/test/{test_id}/prompt/{prompt_id}")
+    assert client.get(f"/api/v1/prompt/{prompt_id}/analytics").json() == []
@@ -0,0 +1,63 @@
+import pytest
+from types import SimpleNamespace
+from uuid import uuid4
+from app.models.llm import LLM
+from app.utils.llm.client_pool import BedrockClientPool, bedrock_clients
+
+
+def make_llm(access_key="test-access-key", secret="test-secret-key", region="us-west-2"):
+    return SimpleNamespace(access_key=access_key, secret_access_key=secret, aws_region=region)
+
+@pytest.fixture
+def pool():
+    return BedrockClientPool(max_pool_connections=10, idle_ttl_seconds=900, max_size=2)
+
+def test_client_is_reused_for_same_credentials(pool):
+    first = pool.get_client(make_llm())
+    second = pool.get_client(make_llm())
+    assert first is second
+    assert len(pool) == 1
+
+def test_client_uses_configured_pool_size(pool):
+    client = pool.get_client(make_llm())
+    assert client.meta.config.max_pool_connections == 10
+
+def test_changed_secret_builds_new_client(pool):
+    first = pool.get_client(make_llm())
+    second = pool.get_client(make_llm(secret="rotated-secret"))
+    assert first is not second
+
+def test_invalidate_rebuilds_client(pool):
+    llm = make_llm()
+    first = pool.get_client(llm)
+    pool.invalidate(llm)
+    assert len(pool) == 0
+    assert pool.get_client(llm) is not first
+
+def test_least_recently_used_client_is_evicted(pool):
+    pool.get_client(make_llm(region="us-east-1"))
+    pool.get_client(make_llm(region="us-west-2"))
+    pool.get_client(make_llm(region="eu-west-1"))
+    assert len(pool) == 2
+
+def test_idle_clients_are_evicted():
+    pool = BedrockClientPool(max_pool_connections=10, idle_ttl_seconds=-1, max_size=2)
+    first = pool.get_client(make_llm())
+    assert pool.get_client(make_llm()) is not first
+
+def test_update_llm_invalidates_pooled_client(client, test_db):
+    llm = LLM(
+        id=uuid4(),
+        name="pooled-llm",
+        access_key="test-access-key",
+        secret_access_key="test-secret-key",
+        aws_region="us-west-2",
+        llm_model_id="anthropic.claude-v2"
+    )
+    test_db.add(llm)
+    test_db.commit()
+    old_client = bedrock_clients.get_client(llm)
+
+    response = client.put(f"/api/v1/llm/{llm.id}", json={"secret_access_key": "new-secret"})
+    assert response.status_code == 200
+    assert bedrock_clients.get_client(make_llm(secret="test-secret-key")) is not old_client
@@ -0,0 +1,72 @@
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from app.db.bulk import bulk_insert, _csv_value, _with_defaults
+from app.models.test import Test, test_prompt_association
+from app.settings.settings import settings
+
+
+def test_csv_values_distinguish_null_from_empty_string():
+    assert _csv_value(None) == ""
+    assert _csv_value("") == '""'
+    assert _csv_value('say "hi"\nbye') == '"say ""hi""\nbye"'
+    assert _csv_value(True) == "true"
+    assert _csv_value(12) == "12"
+    assert _csv_value(datetime(2024, 1, 2, 3, 4, 5)) == "2024-01-02T03:04:05"
+
+def test_rows_are_filled_with_column_defaults():
+    test_id, prompt_id = uuid.uuid4(), uuid.uuid4()
+    columns, values = _with_defaults(
+        test_prompt_association,
+        [{"test_id": test_id, "prompt_id": prompt_id}, {"test_id": test_id}],
+    )
+    assert columns == ["test_id", "prompt_id", "cache_hit"]
+    assert values == [[test_id, prompt_id, False], [test_id, None, False]]
+
+def test_bulk_insert_writes_all_rows(test_db):
+    test = Test(test_name="bulk", user_input="input")
+    test_db.add(test)
+    test_db.flush()
+
+    rows = [
+        {"test_id": test.id, "prompt_id": uuid.uuid4(), "llm_response": f"response {i}", "latency_ms": i}
+        for i in range(250)
+    ]
+    bulk_insert(test_db, test_prompt_association, rows)
+    test_db.commit()
+
+    assert test_db.query(test_prompt_association).count() == 250
+
+class RecordingCursor:
+    def __init__(self):
+        self.copies = []
+        self.closed = False
+
+    def copy_expert(self, sql, file):
+        self.copies.append((sql, file.read()))
+
+    def close(self):
+        self.closed = True
+
+def test_large_batches_are_copied_on_postgres(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_INSERT_COPY_THRESHOLD", 2)
+    cursor = RecordingCursor()
+    raw_connection = SimpleNamespace(cursor=lambda: cursor)
+    db = SimpleNamespace(
+        get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(name="postgresql")),
+        connection=lambda: SimpleNamespace(connection=raw_connection),
+    )
+    test_id, prompt_id = uuid.uuid4(), uuid.uuid4()
+
+    bulk_insert(db, test_prompt_association, [
+        {"test_id": test_id, "prompt_id": prompt_id, "llm_response": 'say "hi"', "latency_ms": 12},
+        {"test_id": test_id, "prompt_id": prompt_id, "llm_response": None, "latency_ms": None},
+    ])
+
+    assert cursor.copies == [(
+        "COPY test_prompt_association (test_id, prompt_id, llm_response, latency_ms, cache_hit) "
+        "FROM STDIN WITH (FORMAT csv)",
+        f'"{test_id}","{prompt_id}","say ""hi""",12,false\n'
+        f'"{test_id}","{prompt_id}",,,false\n',
+    )]
+    assert cursor.closed
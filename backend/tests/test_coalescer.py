@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from uuid import uuid4
+from app.utils.llm import invoker
+from app.utils.llm.coalescer import RequestCoalescer, converse_coalescer
+from tests.conftest import FakeBedrockClient
+
+
+@pytest.fixture
+def llm():
+    return SimpleNamespace(id=uuid4(), requests_per_minute=None, tokens_per_minute=None)
+
+@pytest.fixture
+def slow_bedrock(monkeypatch):
+    fake_client = FakeBedrockClient(delay=0.1)
+    monkeypatch.setattr(invoker.bedrock_clients, "get_client", lambda llm: fake_client)
+    converse_coalescer.reset_stats()
+    return fake_client
+
+def request(text="Hello"):
+    return {
+        "modelId": "anthropic.claude-v2",
+        "messages": [{"role": "user", "content": [{"text": text}]}],
+        "inferenceConfig": {"maxTokens": 100},
+    }
+
+def test_identical_concurrent_requests_share_one_call(llm, slow_bedrock):
+    async def run():
+        return await asyncio.gather(*[invoker.converse(llm, request()) for _ in range(3)])
+
+    responses = asyncio.run(run())
+    assert len(slow_bedrock.calls) == 1
+    assert responses[0] == responses[1] == responses[2]
+    stats = converse_coalescer.stats()
+    assert stats["calls"] == 1
+    assert stats["coalesced"] == 2
+    assert stats["in_flight"] == 0
+
+def test_different_requests_are_not_coalesced(llm, slow_bedrock):
+    async def run():
+        return await asyncio.gather(
+            invoker.converse(llm, request("Hello")),
+            invoker.converse(llm, request("Goodbye")),
+        )
+
+    asyncio.run(run())
+    assert len(slow_bedrock.calls) == 2
+
+def test_coalescing_can_be_turned_off(llm, slow_bedrock):
+    async def run():
+        return await asyncio.gather(
+            invoker.converse(llm, request(), coalesce=False),
+            invoker.converse(llm, request(), coalesce=False),
+        )
+
+    asyncio.run(run())
+    assert len(slow_bedrock.calls) == 2
+
+def test_errors_are_shared_with_waiters():
+    coalescer = RequestCoalescer()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            coalescer.run("key", failing),
+            coalescer.run("key", failing),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert len(attempts) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    coalescer = RequestCoalescer()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        first = asyncio.ensure_future(coalescer.run("key", slow))
+        second = asyncio.ensure_future(coalescer.run("key", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "done"
+
+def test_invocation_stats_endpoint(client):
+    response = client.get("/api/v1/llms/invocation-stats")
+    assert response.status_code == 200
+    assert set(response.json()) == {"calls", "coalesced", "in_flight"}
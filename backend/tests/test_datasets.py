@@ -0,0 +1,178 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import test_job
+from app.models.llm import LLM
+from app.models.prompt import Prompt
+from app.settings.settings import settings
+from app.utils.datasets.upload import DatasetFileError, DatasetRecords
+from app.utils.jobs.worker import run_next_job
+
+
+@pytest.fixture
+def prompt_ids(test_db):
+    llm = LLM(id=uuid.uuid4(), name="Claude", llm_model_id="anthropic.claude-v2")
+    prompts = [Prompt(id=uuid.uuid4(), name=f"dataset prompt {i}", prompt=f"Prompt {i}", llm_id=llm.id) for i in range(2)]
+    test_db.add_all([llm, *prompts])
+    test_db.commit()
+    return [str(prompt.id) for prompt in prompts]
+
+
+def _upload(client, filename, content, **params):
+    return client.post("/api/v1/datasets", params=params, files={"file": (filename, content)})
+
+
+def test_csv_records_span_chunks_and_quoted_newlines():
+    content = 'user_input,expected_answer\n"Hello, ""world""",hi\n"two\nlines",\nplain,x\n'.encode()
+    records = DatasetRecords("csv")
+    items = []
+    for i in range(len(content)):
+        items.extend(records.feed(content[i:i + 1]))
+    items.extend(records.close())
+
+    assert [item["user_input"] for item in items] == ['Hello, "world"', "two\nlines", "plain"]
+    assert [item["expected_answer"] for item in items] == ["hi", None, "x"]
+
+
+def test_jsonl_errors_report_the_line():
+    records = DatasetRecords("jsonl")
+    records.feed(b'{"user_input": "one"}\n\n')
+    with pytest.raises(DatasetFileError, match="Line 3"):
+        records.feed(b'{"input": 2}\n')
+
+
+def test_expected_patterns_are_checked_like_scoring_does():
+    records = DatasetRecords("jsonl")
+    items = records.feed(b'{"user_input": "one", "expected_pattern": "\\\\p{Lu}+"}\n')
+    assert items[0]["expected_pattern"] == "\\p{Lu}+"
+    with pytest.raises(DatasetFileError, match="Line 2: invalid expected_pattern"):
+        records.feed(b'{"user_input": "two", "expected_pattern": "(unclosed"}\n')
+
+
+def test_upload_streams_items_in_batches(client, monkeypatch):
+    monkeypatch.setattr(settings, "DATASET_UPLOAD_BATCH_SIZE", 2)
+    lines = [json.dumps({"user_input": f"Question {i}", "expected_pattern": "^echo"}) for i in range(5)]
+
+    response = _upload(client, "suite.jsonl", "\n".join(lines))
+    assert response.status_code == 200
+    dataset = response.json()
+    assert (dataset["name"], dataset["format"], dataset["item_count"]) == ("suite.jsonl", "jsonl", 5)
+    assert client.get(f"/api/v1/datasets/{dataset['id']}").json()["item_count"] == 5
+
+
+def test_upload_rejects_bad_files(client):
+    response = _upload(client, "suite.csv", "question\nHello\n")
+    assert response.status_code == 400
+    assert response.json()["error_key"] == "INVALID_DATASET_FILE"
+
+    response = _upload(client, "suite.txt", "Hello\n")
+    assert response.status_code == 400
+    assert response.json()["error_key"] == "INVALID_DATASET_FILE"
+
+    response = _upload(client, "suite.csv", "user_input\n")
+    assert response.status_code == 400
+    assert response.json()["error_key"] == "DATASET_EMPTY"
+    assert client.get("/api/v1/datasets").json() == []
+
+
+def test_dataset_run_stores_results_in_batches(client, test_db, prompt_ids, fake_bedrock, monkeypatch):
+    monkeypatch.setattr(settings, "DATASET_RUN_FLUSH_SIZE", 3)
+    content = "user_input,expected_answer\n" + "".join(f"Case {i},echo: Case {i}\n" for i in range(4))
+    dataset = _upload(client, "suite.csv", content).json()
+
+    response = client.post(f"/api/v1/datasets/{dataset['id']}/runs", json={"prompt_ids": prompt_ids})
+    assert response.status_code == 202
+    run = response.json()
+    assert (run["status"], run["total"], run["completed"]) == ("queued", 8, 0)
+
+    assert asyncio.run(run_next_job(test_db, "worker-1")) == uuid.UUID(run["job_id"])
+
+    run = client.get(f"/api/v1/dataset-runs/{run['id']}").json()
+    assert (run["status"], run["completed"], run["failed"]) == ("succeeded", 8, 0)
+    assert len(fake_bedrock.calls) == 8
+    results = client.get(f"/api/v1/tests/{prompt_ids[0]}").json()
+    assert sorted(result["test_name"] for result in results) == [f"suite.csv #{i}" for i in range(1, 5)]
+    assert all(result["exact_match"] for result in results)
+
+
+def test_dataset_run_resumes_where_it_stopped(client, test_db, prompt_ids, fake_bedrock, monkeypatch):
+    monkeypatch.setattr(settings, "DATASET_RUN_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "DATASET_RUN_MAX_CONCURRENCY", 1)
+    dataset = _upload(client, "suite.csv", "user_input\nOne\nTwo\n").json()
+    run = client.post(f"/api/v1/datasets/{dataset['id']}/runs", json={"prompt_ids": prompt_ids}).json()
+    converse = fake_bedrock.converse
+
+    def crash_on_third_call(**request):
+        if len(fake_bedrock.calls) == 2:
+            fake_bedrock.calls.append(request)
+            raise KeyboardInterrupt
+        return converse(**request)
+
+    monkeypatch.setattr(fake_bedrock, "converse", crash_on_third_call)
+    # The worker dies after its first batch is stored, and its lease expires
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(run_next_job(test_db, "worker-1"))
+    test_db.rollback()
+    assert client.get(f"/api/v1/dataset-runs/{run['id']}").json()["completed"] == 2
+    test_db.query(test_job.TestJob).update({"locked_until": datetime.utcnow() - timedelta(seconds=1)})
+    test_db.commit()
+
+    monkeypatch.setattr(fake_bedrock, "converse", converse)
+    asyncio.run(run_next_job(test_db, "worker-2"))
+
+    run = client.get(f"/api/v1/dataset-runs/{run['id']}").json()
+    assert (run["status"], run["completed"], run["attempts"]) == ("succeeded", 4, 2)
+    assert len(fake_bedrock.calls) == 5
+
+
+def test_dataset_run_uses_its_session_one_task_at_a_time(client, test_db, prompt_ids, fake_bedrock, monkeypatch):
+    from app.utils.jobs import worker
+    from app.utils.llm.response_cache import response_cache
+
+    monkeypatch.setattr(settings, "DATASET_RUN_BATCH_SIZE", 1)
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 0.03)
+    dataset = _upload(client, "suite.csv", "user_input\nOne\nTwo\nThree\n").json()
+    run = client.post(
+        f"/api/v1/datasets/{dataset['id']}/runs", json={"prompt_ids": prompt_ids, "use_cache": True}
+    ).json()
+
+    active = []
+    overlaps = []
+    guard = threading.Lock()
+
+    def exclusive(fn):
+        def wrapper(*args, **kwargs):
+            with guard:
+                overlaps.append(len(active))
+                active.append(fn)
+            try:
+                time.sleep(0.02)
+                return fn(*args, **kwargs)
+            finally:
+                with guard:
+                    active.remove(fn)
+        return wrapper
+
+    monkeypatch.setattr(response_cache, "get_many", exclusive(response_cache.get_many))
+    monkeypatch.setattr(worker, "_heartbeat_once", exclusive(lambda db, job_id, worker_id: None))
+    asyncio.run(run_next_job(test_db, "worker-1"))
+
+    assert client.get(f"/api/v1/dataset-runs/{run['id']}").json()["status"] == "succeeded"
+    assert len(overlaps) > 3
+    assert max(overlaps) == 0
+
+
+def test_dataset_run_needs_known_prompts(client):
+    dataset = _upload(client, "suite.csv", "user_input\nOne\n").json()
+    response = client.post(f"/api/v1/datasets/{dataset['id']}/runs", json={"prompt_ids": [str(uuid.uuid4())]})
+    assert response.status_code == 400
+    assert response.json()["error_key"] == "INVALID_PROMPT_IDS"
+
+    assert client.get(f"/api/v1/dataset-runs/{uuid.uuid4()}").status_code == 404
+    assert client.get("/api/v1/datasets/not-a-uuid").status_code == 400
@@ -0,0 +1,103 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.models.llm import LLM
+from app.models.prompt import Prompt
+from app.models.response_lsh_band import ResponseLshBand
+from app.models.test import Test, test_prompt_association
+from app.utils.analytics.rollups import record_results
+from app.utils.similarity.backfill_minhashes import backfill_minhashes
+from app.utils.similarity.minhash import MinHasher, estimated_similarity
+
+ANSWER = (
+    "The quarterly report shows revenue growth of twelve percent driven by strong demand "
+    "in the enterprise segment, while operating costs remained flat compared with last year"
+)
+
+
+@pytest.fixture
+def template(test_db):
+    template_id = uuid.uuid4()
+    llm = LLM(id=uuid.uuid4(), name="Claude")
+    v1 = Prompt(id=uuid.uuid4(), name="v1", prompt="", version=1, llm_id=llm.id, prompt_template_id=template_id)
+    v2 = Prompt(id=uuid.uuid4(), name="v2", prompt="", version=2, llm_id=llm.id, prompt_template_id=template_id)
+    test_db.add_all([llm, v1, v2])
+    test_db.commit()
+    return template_id, llm, v1, v2
+
+
+def _results(test_db, llm, responses):
+    """Add one test per (prompt, user input, response), returning its result rows."""
+    rows = []
+    for prompt, user_input, response in responses:
+        test = Test(id=uuid.uuid4(), test_name=f"{prompt.name} {len(rows)}", user_input=user_input)
+        test_db.add(test)
+        rows.append({
+            "test_id": test.id,
+            "prompt_id": prompt.id,
+            "llm_id": llm.id,
+            "creation_date": datetime(2024, 1, 1),
+            "llm_response": response,
+        })
+    test_db.flush()
+    return rows
+
+
+def test_minhash_estimates_jaccard_similarity():
+    hasher = MinHasher(256)
+    words = [f"w{i}" for i in range(200)]
+    left = " ".join(words[:150])
+    right = " ".join(words[50:])
+
+    # 98 of 198 distinct 3-grams are shared
+    assert estimated_similarity(hasher.signature(left), hasher.signature(right)) == pytest.approx(98 / 198, abs=0.1)
+    assert estimated_similarity(hasher.signature(left), hasher.signature(left)) == 1.0
+    assert hasher.signature("") is None
+
+
+def test_duplicate_clusters_per_template(client, test_db, template):
+    template_id, llm, v1, v2 = template
+    record_results(test_db, _results(test_db, llm, [
+        (v1, "Summarise Q3", ANSWER),
+        (v2, "Summarise Q3", ANSWER + " overall"),
+        (v2, "Summarise Q4", ANSWER),
+        (v1, "Summarise Q4", "Revenue fell sharply as the consumer business lost two of its largest accounts"),
+    ]))
+    test_db.commit()
+
+    response = client.get(f"/api/v1/prompt-template/{template_id}/duplicates")
+
+    assert response.status_code == 200
+    [cluster] = response.json()
+    assert (cluster["size"], cluster["prompt_count"], cluster["input_count"]) == (3, 2, 2)
+    assert cluster["similarity_min"] >= 0.8
+    assert cluster["members"][0]["version"] == 1.0
+
+    assert client.get(f"/api/v1/prompt-template/{uuid.uuid4()}/duplicates").json() == []
+
+
+def test_deleting_a_result_removes_it_from_the_index(client, test_db, template):
+    template_id, llm, v1, v2 = template
+    rows = _results(test_db, llm, [(v1, "A", ANSWER), (v2, "A", ANSWER)])
+    record_results(test_db, rows)
+    test_db.commit()
+    test_id, prompt_id = str(rows[0]["test_id"]), str(v1.id)
+
+    client.delete(f"/api/v1/test/{test_id}/prompt/{prompt_id}")
+
+    assert client.get(f"/api/v1/prompt-template/{template_id}/duplicates").json() == []
+    assert test_db.query(ResponseLshBand).filter(ResponseLshBand.test_id == uuid.UUID(test_id)).count() == 0
+
+
+def test_backfill_indexes_existing_results(client, test_db, template):
+    template_id, llm, v1, v2 = template
+    test_db.execute(test_prompt_association.insert(), _results(test_db, llm, [(v1, "A", ANSWER), (v2, "B", ANSWER), (v2, "C", "")]))
+    test_db.commit()
+
+    assert backfill_minhashes(test_db, batch_size=2) == 3
+    assert backfill_minhashes(test_db) == 0
+
+    [cluster] = client.get(f"/api/v1/prompt-template/{template_id}/duplicates").json()
+    assert cluster["input_count"] == 2
@@ -0,0 +1,139 @@
+import io
+import os
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from app.models.image_blob import ImageBlob
+from app.models.llm import LLM
+from app.models.prompt import Prompt
+from app.models.test import Test
+from app.utils.blobs.blob_store import image_store, sniff_content_type
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+@pytest.fixture
+def image_prompt(test_db):
+    llm = LLM(id=uuid.uuid4(), name="Vision", llm_model_id="anthropic.claude-3-haiku", aws_region="us-east-1")
+    prompt = Prompt(id=uuid.uuid4(), name="Describe", prompt="Describe the image", llm_id=llm.id)
+    test_db.add_all([llm, prompt])
+    test_db.commit()
+    return str(prompt.id)
+
+
+def post_image_test(client, prompt_id, name, image):
+    return client.post(
+        "/api/v1/test/image",
+        data={"test_name": name, "prompt_ids": f'["{prompt_id}"]', "input_type": "image"},
+        files={"image_input": ("screenshot.png", io.BytesIO(image), "image/png")},
+    )
+
+
+def stored_files(root):
+    return [name for _, _, files in os.walk(root) for name in files]
+
+
+def test_identical_images_are_stored_once(client, test_db, image_prompt, image_store_root, fake_bedrock):
+    for name in ["first", "second"]:
+        assert post_image_test(client, image_prompt, name, PNG).status_code == 200
+
+    image_hash = image_store.blobs.hash(PNG)
+    assert stored_files(image_store_root) == [image_hash]
+    blob = test_db.query(ImageBlob).one()
+    assert (blob.ref_count, blob.size, blob.content_type) == (2, len(PNG), "image/png")
+    assert {test.image_hash for test in test_db.query(Test)} == {image_hash}
+
+
+def test_sweep_removes_blob_after_last_reference(client, test_db, image_prompt, image_store_root, fake_bedrock):
+    for name in ["first", "second"]:
+        post_image_test(client, image_prompt, name, PNG)
+    test_ids = [str(test.id) for test in test_db.query(Test)]
+
+    client.delete(f"/api/v1/test/{test_ids[0]}/prompt/{image_prompt}")
+    assert test_db.query(ImageBlob).one().ref_count == 1
+    assert len(stored_files(image_store_root)) == 1
+
+    client.delete(f"/api/v1/test/{test_ids[1]}/prompt/{image_prompt}")
+    assert test_db.query(ImageBlob).one().ref_count == 0
+    assert len(stored_files(image_store_root)) == 1
+
+    assert image_store.sweep(test_db, min_age_seconds=0) == 1
+    assert test_db.query(ImageBlob).count() == 0
+    assert stored_files(image_store_root) == []
+
+
+def test_sweep_keeps_blob_referenced_again(test_db, image_store_root):
+    image_hash = image_store.add(test_db, PNG)
+    test_db.commit()
+    image_store.release(test_db, image_hash)
+    test_db.commit()
+
+    image_store.add(test_db, PNG)
+    test_db.commit()
+
+    assert image_store.sweep(test_db, min_age_seconds=0) == 0
+    assert test_db.query(ImageBlob).one().ref_count == 1
+    assert stored_files(image_store_root) == [image_hash]
+
+
+def test_sweep_keeps_file_of_pending_upload(test_db, image_store_root):
+    image_hash = image_store.add(test_db, PNG)
+    test_db.rollback()
+    path = image_store.blobs.path(image_hash)
+    os.utime(path, (0, 0))
+
+    # Uploading the same image again touches the file before its row commits
+    image_store.blobs.write(PNG)
+
+    assert image_store.sweep(test_db, min_age_seconds=60) == 0
+    assert stored_files(image_store_root) == [image_hash]
+
+
+def test_list_tests_links_images_from_store(client, image_prompt, image_store_root, fake_bedrock):
+    post_image_test(client, image_prompt, "listed", PNG)
+
+    listed = client.get(f"/api/v1/tests/{image_prompt}").json()
+    assert "image" not in listed[0]
+    assert listed[0]["image_hash"] == image_store.blobs.hash(PNG)
+    assert client.get(listed[0]["image_url"]).content == PNG
+
+
+def test_rolled_back_upload_is_swept(test_db, image_store_root):
+    image_store.add(test_db, b"orphan")
+    test_db.rollback()
+
+    assert image_store.sweep(test_db, min_age_seconds=3600) == 0
+    assert image_store.sweep(test_db, min_age_seconds=0) == 1
+    assert stored_files(image_store_root) == []
+
+
+def test_migrate_test_images(test_db, image_store_root):
+    from app.utils.blobs.migrate_test_images import migrate_test_images
+
+    test_db.execute(text("ALTER TABLE tests ADD COLUMN image BLOB"))
+    for name in ["a", "b", "c"]:
+        test_db.execute(
+            text("INSERT INTO tests (id, test_name, user_input, image) VALUES (:id, :name, '', :image)"),
+            {"id": uuid.uuid4().hex, "name": name, "image": PNG},
+        )
+    test_db.commit()
+
+    assert migrate_test_images(test_db, batch_size=2) == 3
+    assert migrate_test_images(test_db) == 0
+
+    assert test_db.execute(text("SELECT COUNT(*) FROM tests WHERE image IS NOT NULL")).scalar() == 0
+    assert test_db.query(ImageBlob).one().ref_count == 3
+    assert stored_files(image_store_root) == [image_store.blobs.hash(PNG)]
+
+
+@pytest.mark.parametrize("data, content_type", [
+    (PNG, "image/png"),
+    (b"\xff\xd8\xff\xe0rest", "image/jpeg"),
+    (b"GIF89a...", "image/gif"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "image/webp"),
+    (b"plain", "application/octet-stream"),
+])
+def test_sniff_content_type(data, content_type):
+    assert sniff_content_type(data) == content_type
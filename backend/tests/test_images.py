@@ -0,0 +1,70 @@
+import pytest
+
+from app.utils.blobs.blob_store import image_store
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+
+@pytest.fixture
+def image_hash(test_db, image_store_root):
+    image_hash = image_store.add(test_db, PNG, "image/png")
+    test_db.commit()
+    return image_hash
+
+
+def test_read_image(client, image_hash):
+    response = client.get(f"/api/v1/images/{image_hash}")
+    assert response.status_code == 200
+    assert response.content == PNG
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == f'"{image_hash}"'
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_read_image_not_modified(client, image_hash):
+    response = client.get(f"/api/v1/images/{image_hash}", headers={"If-None-Match": f'"{image_hash}"'})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get(f"/api/v1/images/{image_hash}", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("range_header, start, end", [
+    ("bytes=0-99", 0, 99),
+    ("bytes=1000-", 1000, len(PNG) - 1),
+    ("bytes=-16", len(PNG) - 16, len(PNG) - 1),
+    ("bytes=10-100000", 10, len(PNG) - 1),
+])
+def test_read_image_range(client, image_hash, range_header, start, end):
+    response = client.get(f"/api/v1/images/{image_hash}", headers={"Range": range_header})
+    assert response.status_code == 206
+    assert response.content == PNG[start:end + 1]
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(PNG)}"
+
+
+def test_read_image_unsatisfiable_range(client, image_hash):
+    response = client.get(f"/api/v1/images/{image_hash}", headers={"Range": f"bytes={len(PNG)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(PNG)}"
+
+
+def test_read_image_ignores_range_for_stale_if_range(client, image_hash):
+    response = client.get(
+        f"/api/v1/images/{image_hash}", headers={"Range": "bytes=0-9", "If-Range": '"other"'}
+    )
+    assert response.status_code == 200
+    assert response.content == PNG
+
+
+def test_read_image_invalid_hash(client):
+    response = client.get("/api/v1/images/not-a-hash")
+    assert response.status_code == 400
+    assert "INVALID_IMAGE_HASH" in str(response.json())
+
+
+def test_read_image_not_found(client, image_store_root):
+    response = client.get(f"/api/v1/images/{'0' * 64}")
+    assert response.status_code == 404
+    assert "IMAGE_NOT_FOUND" in str(response.json())
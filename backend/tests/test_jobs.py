@@ -0,0 +1,140 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.llm import LLM
+from app.models.prompt import Prompt
+from app.models import test_job
+from app.settings.settings import settings
+from app.utils.jobs.queue import claim_job
+from app.utils.jobs.worker import check_image_store, run_next_job
+
+
+@pytest.fixture
+def prompt_ids(test_db):
+    llm = LLM(id=uuid.uuid4(), name="Claude", llm_model_id="anthropic.claude-v2")
+    prompts = [Prompt(id=uuid.uuid4(), name=f"job prompt {i}", prompt=f"Prompt {i}", llm_id=llm.id) for i in range(3)]
+    test_db.add_all([llm, *prompts])
+    test_db.commit()
+    return [str(prompt.id) for prompt in prompts]
+
+
+def _queue(client, prompt_ids, **fields):
+    response = client.post(
+        "/api/v1/test/text/jobs",
+        json={"test_name": "queued", "user_input": "Hello", "prompt_ids": prompt_ids, **fields},
+    )
+    assert response.status_code == 202
+    return response.json()
+
+
+def test_queued_test_returns_a_job_right_away(client, prompt_ids, fake_bedrock):
+    job = _queue(client, prompt_ids)
+
+    assert (job["status"], job["total"], job["completed"]) == ("queued", 3, 0)
+    assert fake_bedrock.calls == []
+    assert client.get(f"/api/v1/jobs/{job['id']}").json()["status"] == "queued"
+
+
+def test_worker_runs_a_job(client, test_db, prompt_ids, fake_bedrock):
+    job = _queue(client, prompt_ids, expected_answer="echo: Hello")
+
+    assert asyncio.run(run_next_job(test_db, "worker-1")) == uuid.UUID(job["id"])
+    assert asyncio.run(run_next_job(test_db, "worker-1")) is None
+
+    job = client.get(f"/api/v1/jobs/{job['id']}").json()
+    assert (job["status"], job["completed"], job["attempts"]) == ("succeeded", 3, 1)
+    results = client.get(f"/api/v1/tests/{prompt_ids[0]}").json()
+    assert [(result["id"], result["exact_match"]) for result in results] == [(job["test_id"], True)]
+
+
+def test_resumed_job_skips_checkpointed_prompts(client, test_db, prompt_ids, fake_bedrock, monkeypatch):
+    job = _queue(client, prompt_ids)
+    converse = fake_bedrock.converse
+
+    def crash_on_second_call(**request):
+        if len(fake_bedrock.calls) == 1:
+            fake_bedrock.calls.append(request)
+            raise KeyboardInterrupt
+        return converse(**request)
+
+    # The worker dies mid-run after checkpointing one result, and its lease expires
+    monkeypatch.setattr(settings, "TEST_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(fake_bedrock, "converse", crash_on_second_call)
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(run_next_job(test_db, "worker-1"))
+    test_db.rollback()
+    test_db.query(test_job.TestJob).update({"locked_until": datetime.utcnow() - timedelta(seconds=1)})
+    test_db.commit()
+    finished = fake_bedrock.calls[0]["system"][0]["text"]
+
+    monkeypatch.setattr(fake_bedrock, "converse", converse)
+    fake_bedrock.calls.clear()
+    asyncio.run(run_next_job(test_db, "worker-2"))
+
+    resumed = {call["system"][0]["text"] for call in fake_bedrock.calls}
+    assert resumed == {"Prompt 0", "Prompt 1", "Prompt 2"} - {finished}
+    job = client.get(f"/api/v1/jobs/{job['id']}").json()
+    assert (job["status"], job["completed"], job["attempts"]) == ("succeeded", 3, 2)
+
+
+def test_failed_prompts_are_retried_then_recorded(client, test_db, prompt_ids, fake_bedrock, monkeypatch):
+    job = _queue(client, prompt_ids[:1])
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "JOB_RETRY_DELAY_SECONDS", 0)
+    monkeypatch.setattr(settings, "BEDROCK_MAX_ATTEMPTS", 1)
+
+    def failing_converse(**request):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(fake_bedrock, "converse", failing_converse)
+
+    asyncio.run(run_next_job(test_db, "worker-1"))
+    first = client.get(f"/api/v1/jobs/{job['id']}").json()
+    assert (first["status"], first["attempts"]) == ("queued", 1)
+    assert client.get(f"/api/v1/tests/{prompt_ids[0]}").json() == []
+
+    asyncio.run(run_next_job(test_db, "worker-1"))
+    last = client.get(f"/api/v1/jobs/{job['id']}").json()
+    assert (last["status"], last["attempts"]) == ("failed", 2)
+    assert "model unavailable" in last["error"]
+    [result] = client.get(f"/api/v1/tests/{prompt_ids[0]}").json()
+    assert "model unavailable" in result["error"]
+
+
+def test_running_job_is_not_claimed_twice(client, test_db, prompt_ids):
+    _queue(client, prompt_ids)
+
+    assert claim_job(test_db, "worker-1") is not None
+    assert claim_job(test_db, "worker-2") is None
+
+
+def test_workers_without_image_store_skip_image_jobs(client, test_db, prompt_ids, tmp_path, monkeypatch):
+    from app.utils.blobs.blob_store import image_store
+
+    job = _queue(client, prompt_ids)
+    test_db.query(test_job.TestJob).update({"kind": "image"})
+    test_db.commit()
+
+    monkeypatch.setattr(image_store.blobs, "root", str(tmp_path / "missing"))
+    with pytest.raises(RuntimeError, match="WORKER_IMAGE_JOBS"):
+        check_image_store()
+
+    monkeypatch.setattr(settings, "WORKER_IMAGE_JOBS", False)
+    check_image_store()
+    assert asyncio.run(run_next_job(test_db, "text-only")) is None
+    assert client.get(f"/api/v1/jobs/{job['id']}").json()["status"] == "queued"
+
+
+def test_job_errors(client, prompt_ids):
+    response = client.post(
+        "/api/v1/test/text/jobs",
+        json={"test_name": "bad", "user_input": "Hi", "prompt_ids": [str(uuid.uuid4())]},
+    )
+    assert response.status_code == 400
+    assert "INVALID_PROMPT_IDS" in str(response.json())
+
+    assert client.get(f"/api/v1/jobs/{uuid.uuid4()}").status_code == 404
+    assert "INVALID_JOB_ID_FORMAT" in str(client.get("/api/v1/jobs/nope").json())
@@ -1,4 +1,6 @@
 import pytest
+import json
+import re
 from uuid import UUID, uuid4
 import sys
 sys.path.append("..")
@@ -198,4 +200,104 @@ def test_invalid_uuid_format(client):
     
 #     response_data = response.json()
 #     assert "error_key" in response_data
-#     assert response_data["error_key"] == "LLM_NOT_FOUND"
\ No newline at end of file
+#     assert response_data["error_key"] == "LLM_NOT_FOUND"
+def test_converse_with_pooled_client(client, sample_llm, fake_bedrock):
+    conversation_data = {
+        "llm_id": str(sample_llm.id),
+        "user_input": "Hello",
+        "prompt": "You are a helpful assistant",
+        "temperature": 0.7,
+        "max_tokens": 100,
+        "top_p": 0.9
+    }
+
+    response = client.post("/api/v1/llm/converse", json=conversation_data)
+    assert response.status_code == 200
+    assert response.json()["response"]["output"]["message"]["content"][0]["text"] == "echo: Hello"
+    assert fake_bedrock.calls[0]["modelId"] == sample_llm.llm_model_id
+
+def test_blocking_calls_run_concurrently():
+    import asyncio
+    import time
+    from app.utils.llm.invoker import run_blocking
+
+    async def run_two():
+        return await asyncio.gather(
+            run_blocking(time.sleep, 0.2),
+            run_blocking(time.sleep, 0.2),
+        )
+
+    start = time.monotonic()
+    asyncio.run(run_two())
+    assert time.monotonic() - start < 0.35
+
+def test_blocking_call_timeout():
+    import asyncio
+    import time
+    from app.utils.llm.invoker import run_blocking
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run_blocking(time.sleep, 0.5, timeout=0.05))
+
+def test_converse_stream_sends_tokens_and_metrics(client, sample_llm, fake_bedrock):
+    conversation_data = {
+        "llm_id": str(sample_llm.id),
+        "user_input": "Hello",
+        "prompt": "You are a helpful assistant",
+    }
+
+    response = client.post("/api/v1/llm/converse-stream", json=conversation_data)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = [block for block in response.text.split("\n\n") if block]
+    assert events[0] == 'event: token\ndata: {"text": "echo: "}'
+    assert events[1] == 'event: token\ndata: {"text": "Hello"}'
+    assert events[-1].startswith("event: metrics")
+    metrics = json.loads(events[-1].split("data: ", 1)[1])
+    assert metrics["usage"]["outputTokens"] == 5
+    assert metrics["timeToFirstTokenMs"] is not None
+
+def test_converse_stream_nonexistent_llm(client):
+    response = client.post(
+        "/api/v1/llm/converse-stream",
+        json={"llm_id": str(uuid4()), "user_input": "Hello", "prompt": "Hi"}
+    )
+    assert response.status_code == 404
+
+def test_converse_reads_llm_config_from_cache(client, test_db, sample_llm, fake_bedrock):
+    from sqlalchemy import event
+
+    conversation_data = {"llm_id": str(sample_llm.id), "user_input": "Hello", "prompt": "Hi"}
+    client.post("/api/v1/llm/converse", json=conversation_data)
+
+    statements = []
+    engine = test_db.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.post("/api/v1/llm/converse", json=conversation_data)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 200
+    assert not [statement for statement in statements if re.search(r"FROM llm\b", statement)]
+
+def test_update_llm_refreshes_cached_config(client, sample_llm, fake_bedrock):
+    llm_id = str(sample_llm.id)
+    conversation_data = {"llm_id": llm_id, "user_input": "Hello", "prompt": "Hi"}
+    client.post("/api/v1/llm/converse", json=conversation_data)
+
+    client.put(f"/api/v1/llm/{llm_id}", json={"llm_model_id": "anthropic.claude-3-haiku"})
+    client.post("/api/v1/llm/converse", json=conversation_data)
+
+    assert fake_bedrock.calls[-1]["modelId"] == "anthropic.claude-3-haiku"
+
+def test_deleted_llm_is_evicted_from_config_cache(client, sample_llm, fake_bedrock):
+    llm_id = str(sample_llm.id)
+    conversation_data = {"llm_id": llm_id, "user_input": "Hello", "prompt": "Hi"}
+    client.post("/api/v1/llm/converse", json=conversation_data)
+
+    client.delete(f"/api/v1/llm/{llm_id}")
+    response = client.post("/api/v1/llm/converse", json=conversation_data)
+    assert response.status_code == 404
@@ -0,0 +1,106 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from app.exceptions.error_messages import ErrorMessages
+from app.models.prompt import Prompt
+from app.models.test import Test, test_prompt_association
+
+NDJSON = {"Accept": "application/x-ndjson"}
+START = datetime(2024, 1, 1)
+
+
+def add_results(test_db, count):
+    prompt = Prompt(id=uuid.uuid4(), name="Exported", prompt="")
+    tests = [Test(id=uuid.uuid4(), test_name=f"Test {i}", user_input="Hi") for i in range(count)]
+    test_db.add_all([prompt, *tests])
+    test_db.flush()
+    test_db.execute(test_prompt_association.insert(), [
+        {
+            "test_id": test.id,
+            "prompt_id": prompt.id,
+            "creation_date": START + timedelta(minutes=i),
+            "llm_response": f"Response {i}",
+        }
+        for i, test in enumerate(tests)
+    ])
+    test_db.commit()
+    return str(prompt.id)
+
+
+def test_list_tests_streams_every_row(client, test_db, monkeypatch):
+    from app.settings.settings import settings
+
+    monkeypatch.setattr(settings, "STREAM_BATCH_SIZE", 7)
+    monkeypatch.setattr(settings, "PAGE_SIZE_MAX", 10)
+    prompt_id = add_results(test_db, 50)
+
+    response = client.get(f"/api/v1/tests/{prompt_id}?include_response=true", headers=NDJSON)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "x-next-cursor" not in response.headers
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["test_name"] for row in rows] == [f"Test {i}" for i in reversed(range(50))]
+    assert rows[0]["llm_response"] == "Response 49"
+
+
+def test_list_tests_stream_applies_filters(client, test_db):
+    prompt_id = add_results(test_db, 10)
+
+    response = client.get(
+        f"/api/v1/tests/{prompt_id}?created_after=2024-01-01T00:05:00", headers=NDJSON
+    )
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["test_name"] for row in rows] == [f"Test {i}" for i in reversed(range(5, 10))]
+    assert {row["llm_response"] for row in rows} == {None}
+
+
+def test_stream_error_ends_with_error_line(client, test_db, monkeypatch):
+    from app.api import tests as tests_api
+
+    prompt_id = add_results(test_db, 3)
+    response_for = tests_api._test_response
+
+    def fail_on_oldest(request, row):
+        if row.test_name == "Test 0":
+            raise RuntimeError("connection lost")
+        return response_for(request, row)
+
+    monkeypatch.setattr(tests_api, "_test_response", fail_on_oldest)
+    response = client.get(f"/api/v1/tests/{prompt_id}", headers=NDJSON)
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line.get("test_name") for line in lines[:-1]] == ["Test 2", "Test 1"]
+    assert lines[-1] == {"error": {"error_key": "STREAM_INCOMPLETE", "message": ErrorMessages.STREAM_INCOMPLETE}}
+
+
+def test_list_tests_defaults_to_json(client, test_db):
+    prompt_id = add_results(test_db, 3)
+
+    response = client.get(f"/api/v1/tests/{prompt_id}", headers={"Accept": "application/json"})
+
+    assert response.headers["content-type"] == "application/json"
+    assert len(response.json()) == 3
+
+
+def test_list_prompts_streams_every_row(client, test_db):
+    template_id = uuid.uuid4()
+    test_db.add_all([
+        Prompt(
+            id=uuid.uuid4(), name=f"Prompt v{i}", prompt="", version=i,
+            prompt_template_id=template_id, creation_date=START + timedelta(hours=i),
+        )
+        for i in range(1, 13)
+    ])
+    test_db.commit()
+
+    response = client.get(
+        f"/api/v1/prompts/{template_id}?min_version=3",
+        headers={"Accept": "application/x-ndjson; q=1.0, application/json; q=0.5"},
+    )
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["version"] for row in rows] == [float(i) for i in reversed(range(3, 13))]
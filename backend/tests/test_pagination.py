@@ -0,0 +1,154 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.llm import LLM
+from app.models.project import Project
+from app.models.prompt import Prompt
+from app.models.test import Test, test_prompt_association
+from app.utils.pagination.pagination import decode_cursor, encode_cursor, page_size
+
+START = datetime(2024, 1, 1)
+
+
+def walk(client, url, limit):
+    """Follow X-Next-Cursor through every page of a list endpoint."""
+    pages = []
+    cursor = None
+    while True:
+        separator = "&" if "?" in url else "?"
+        query = f"{separator}limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url + query)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    row_id = uuid.uuid4()
+    assert decode_cursor(encode_cursor(START, row_id)) == (START, row_id)
+    assert decode_cursor(None) is None
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_page_size_is_capped(monkeypatch):
+    from app.settings.settings import settings
+
+    monkeypatch.setattr(settings, "PAGE_SIZE_DEFAULT", 50)
+    monkeypatch.setattr(settings, "PAGE_SIZE_MAX", 200)
+    assert page_size(None) == 50
+    assert page_size(10) == 10
+    assert page_size(10_000) == 200
+
+
+def test_list_projects_pages_newest_first(client, test_db):
+    # Two projects share a creation date, so the id breaks the tie
+    dates = [START, START, START + timedelta(days=1), START + timedelta(days=2), START + timedelta(days=3)]
+    test_db.add_all([
+        Project(id=uuid.uuid4(), name=f"Project {i}", description="", creation_date=date, last_updated=date)
+        for i, date in enumerate(dates)
+    ])
+    test_db.commit()
+
+    pages = walk(client, "/api/v1/projects", limit=2)
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    listed = [project for page in pages for project in page]
+    assert len({project["id"] for project in listed}) == 5
+    keys = [(project["creation_date"], uuid.UUID(project["id"])) for project in listed]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_list_without_limit_returns_default_page(client, test_db, monkeypatch):
+    from app.settings.settings import settings
+
+    monkeypatch.setattr(settings, "PAGE_SIZE_DEFAULT", 2)
+    test_db.add_all([
+        LLM(id=uuid.uuid4(), name=f"LLM {i}", creation_date=START + timedelta(hours=i))
+        for i in range(3)
+    ])
+    test_db.commit()
+
+    response = client.get("/api/v1/llms")
+    assert [llm["name"] for llm in response.json()] == ["LLM 2", "LLM 1"]
+    assert "x-next-cursor" in response.headers
+
+
+def test_list_projects_invalid_cursor(client):
+    response = client.get("/api/v1/projects?cursor=garbage")
+    assert response.status_code == 400
+    assert "INVALID_CURSOR" in str(response.json())
+
+
+def test_list_llms_pages(client, test_db):
+    test_db.add_all([
+        LLM(id=uuid.uuid4(), name=f"LLM {i}", creation_date=START + timedelta(hours=i))
+        for i in range(3)
+    ])
+    test_db.commit()
+
+    pages = walk(client, "/api/v1/llms", limit=2)
+    assert [[llm["name"] for llm in page] for page in pages] == [["LLM 2", "LLM 1"], ["LLM 0"]]
+
+
+def test_list_prompts_filters_by_version(client, test_db):
+    template_id = uuid.uuid4()
+    llm = LLM(id=uuid.uuid4(), name="Claude")
+    test_db.add(llm)
+    test_db.add_all([
+        Prompt(
+            id=uuid.uuid4(), name=f"Prompt v{version}", prompt="", version=version, llm_id=llm.id,
+            prompt_template_id=template_id, creation_date=START + timedelta(hours=version),
+        )
+        for version in range(1, 7)
+    ])
+    test_db.commit()
+
+    pages = walk(client, f"/api/v1/prompts/{template_id}?min_version=2&max_version=5", limit=3)
+
+    listed = [prompt for page in pages for prompt in page]
+    assert [prompt["version"] for prompt in listed] == [5.0, 4.0, 3.0, 2.0]
+    assert {prompt["llm_model_name"] for prompt in listed} == {"Claude"}
+
+
+def test_list_tests_filters_and_pages(client, test_db):
+    prompt = Prompt(id=uuid.uuid4(), name="Prompt", prompt="")
+    llms = [LLM(id=uuid.uuid4(), name="Claude"), LLM(id=uuid.uuid4(), name="Llama")]
+    tests = [Test(id=uuid.uuid4(), test_name=f"Test {i}", user_input="") for i in range(6)]
+    test_db.add_all([prompt, *llms, *tests])
+    test_db.flush()
+    test_db.execute(test_prompt_association.insert(), [
+        {
+            "test_id": test.id,
+            "prompt_id": prompt.id,
+            "llm_id": llms[i % 2].id,
+            "creation_date": START + timedelta(days=i),
+        }
+        for i, test in enumerate(tests)
+    ])
+    test_db.commit()
+    prompt_id, claude_id = str(prompt.id), str(llms[0].id)
+
+    pages = walk(client, f"/api/v1/tests/{prompt_id}", limit=4)
+    assert [[test["test_name"] for test in page] for page in pages] == [
+        ["Test 5", "Test 4", "Test 3", "Test 2"], ["Test 1", "Test 0"]
+    ]
+
+    listed = client.get(f"/api/v1/tests/{prompt_id}?llm_id={claude_id}").json()
+    assert [test["test_name"] for test in listed] == ["Test 4", "Test 2", "Test 0"]
+    assert {test["llm_id"] for test in listed} == {claude_id}
+
+    listed = client.get(
+        f"/api/v1/tests/{prompt_id}?created_after=2024-01-02T00:00:00&created_before=2024-01-04T00:00:00"
+    ).json()
+    assert [test["test_name"] for test in listed] == ["Test 2", "Test 1"]
+
+
+def test_list_tests_invalid_llm_filter(client):
+    response = client.get(f"/api/v1/tests/{uuid.uuid4()}?llm_id=nope")
+    assert response.status_code == 400
+    assert "INVALID_LLM_ID_FORMAT" in str(response.json())
@@ -118,3 +118,64 @@ def test_invalid_uuid_format(client):
     assert "INVALID_PROMPT_ID_FORMAT" in str(response.json())
     
 # Test Delete Prompt Template & It's associated Prompts
+
+def test_create_prompt_stores_token_count(client):
+    import gpt3_tokenizer
+
+    prompt_data = {
+        "name": "counted-prompt",
+        "prompt": "Summarise the following text in one sentence.",
+        "prompt_template_id": str(uuid4())
+    }
+
+    response = client.post("/api/v1/prompt", json=prompt_data)
+    assert response.status_code == 200
+    assert response.json()["prompt_tokens"] == gpt3_tokenizer.count_tokens(prompt_data["prompt"])
+
+def test_new_prompt_version_recounts_tokens(client, sample_prompt):
+    import gpt3_tokenizer
+
+    new_text = "A considerably longer replacement prompt for the next version."
+    response = client.put(f"/api/v1/prompt/{sample_prompt.id}", json={"prompt": new_text})
+    assert response.status_code == 200
+    assert response.json()["prompt_tokens"] == gpt3_tokenizer.count_tokens(new_text)
+
+def test_test_runs_do_not_retokenize_unchanged_text(client, test_db, sample_llm, fake_bedrock, monkeypatch):
+    from app.utils.tokenizer.backends import GPT3Tokenizer
+    from app.utils.tokenizer.tokenizer import token_counts, tokenizers
+
+    prompt = Prompt(id=uuid4(), name="stored-count", prompt="Stored prompt", prompt_tokens=3, llm_id=sample_llm.id)
+    test_db.add(prompt)
+    test_db.commit()
+    prompt_id = str(prompt.id)
+
+    tokenized = []
+    backend = GPT3Tokenizer()
+    original = backend.count_batch
+    monkeypatch.setattr(backend, "count_batch", lambda texts: tokenized.extend(texts) or original(texts))
+    monkeypatch.setattr(tokenizers, "get", lambda family: backend)
+    token_counts.clear()
+
+    for name in ["first", "second"]:
+        response = client.post(
+            "/api/v1/test/text",
+            json={"test_name": name, "user_input": "Same input", "prompt_ids": [prompt_id]}
+        )
+        assert response.status_code == 200
+
+    assert tokenized == ["Same input"]
+    results = client.get(f"/api/v1/tests/{prompt_id}").json()
+    assert {result["prompt_tokens"] for result in results} == {3}
+
+def test_prompt_tokens_use_the_model_tokenizer(client, test_db, sample_prompt):
+    from app.utils.tokenizer.tokenizer import count_tokens
+
+    llm = LLM(id=uuid4(), name="claude", llm_model_id="anthropic.claude-3-haiku-20240307-v1:0")
+    test_db.add(llm)
+    test_db.commit()
+    llm_id = str(llm.id)
+
+    text = "Classify the sentiment of the review below."
+    response = client.put(f"/api/v1/prompt/{sample_prompt.id}", json={"prompt": text, "llm_id": llm_id})
+    assert response.status_code == 200
+    assert response.json()["prompt_tokens"] == count_tokens(text, "anthropic.claude-3-haiku-20240307-v1:0")
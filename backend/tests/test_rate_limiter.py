@@ -0,0 +1,134 @@
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+from uuid import uuid4
+from botocore.exceptions import ClientError
+from app.settings.settings import settings
+from app.utils.llm import invoker
+from app.utils.llm.rate_limiter import (
+    AdaptiveRateLimiter,
+    TokenBucket,
+    estimate_request_tokens,
+    rate_limiters,
+)
+from tests.conftest import FakeEventStream
+
+
+def throttling_error(code="ThrottlingException"):
+    return ClientError({"Error": {"Code": code, "Message": "Rate exceeded"}}, "Converse")
+
+class FlakyBedrockClient:
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.calls = 0
+
+    def converse(self, **request):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": "ok"}]}},
+            "usage": {"inputTokens": 10, "outputTokens": 5, "totalTokens": 15},
+            "metrics": {"latencyMs": 100},
+        }
+
+@pytest.fixture
+def llm():
+    return SimpleNamespace(id=uuid4(), requests_per_minute=600, tokens_per_minute=100000)
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "BEDROCK_RETRY_BASE_DELAY_SECONDS", 0)
+    rate_limiters.clear()
+    yield
+    rate_limiters.clear()
+
+def use_client(monkeypatch, fake_client):
+    monkeypatch.setattr(invoker.bedrock_clients, "get_client", lambda llm: fake_client)
+
+REQUEST = {
+    "modelId": "anthropic.claude-v2",
+    "messages": [{"role": "user", "content": [{"text": "Hello"}]}],
+    "system": [{"text": "Be brief"}],
+    "inferenceConfig": {"maxTokens": 100},
+}
+
+def test_throttled_calls_are_retried(monkeypatch, llm):
+    fake_client = FlakyBedrockClient([throttling_error(), throttling_error("ServiceUnavailableException")])
+    use_client(monkeypatch, fake_client)
+
+    response = asyncio.run(invoker.converse(llm, REQUEST))
+    assert response["output"]["message"]["content"][0]["text"] == "ok"
+    assert fake_client.calls == 3
+
+def test_throttling_slows_the_limiter_down(monkeypatch, llm):
+    use_client(monkeypatch, FlakyBedrockClient([throttling_error(), throttling_error()]))
+
+    asyncio.run(invoker.converse(llm, REQUEST))
+    limiter = rate_limiters.get(llm)
+    assert limiter.rate_factor == pytest.approx(0.25 + settings.RATE_LIMIT_INCREASE_STEP)
+
+def test_stream_timing_leaves_out_retry_backoff(monkeypatch, llm):
+    class FlakyStreamClient(FlakyBedrockClient):
+        def converse_stream(self, **request):
+            self.calls += 1
+            if self.failures:
+                raise self.failures.pop(0)
+            return {"stream": FakeEventStream([
+                {"contentBlockDelta": {"delta": {"text": "ok"}, "contentBlockIndex": 0}},
+                {"metadata": {"usage": {"outputTokens": 1}, "metrics": {"latencyMs": 100}}},
+            ])}
+
+    use_client(monkeypatch, FlakyStreamClient([throttling_error()]))
+    monkeypatch.setattr(invoker, "backoff_delay", lambda attempt: 0.3)
+
+    response = asyncio.run(invoker.converse_streamed(llm, REQUEST))
+    assert response["output"]["message"]["content"][0]["text"] == "ok"
+    assert response["metrics"]["timeToFirstTokenMs"] < 300
+
+def test_other_errors_are_not_retried(monkeypatch, llm):
+    validation_error = ClientError({"Error": {"Code": "ValidationException"}}, "Converse")
+    fake_client = FlakyBedrockClient([validation_error])
+    use_client(monkeypatch, fake_client)
+
+    with pytest.raises(ClientError):
+        asyncio.run(invoker.converse(llm, REQUEST))
+    assert fake_client.calls == 1
+
+def test_retries_give_up_after_max_attempts(monkeypatch, llm):
+    monkeypatch.setattr(settings, "BEDROCK_MAX_ATTEMPTS", 2)
+    fake_client = FlakyBedrockClient([throttling_error()] * 3)
+    use_client(monkeypatch, fake_client)
+
+    with pytest.raises(ClientError):
+        asyncio.run(invoker.converse(llm, REQUEST))
+    assert fake_client.calls == 2
+
+def test_bucket_reports_wait_when_empty():
+    bucket = TokenBucket(per_minute=60)
+    now = time.monotonic()
+    assert bucket.try_take(60, 1.0, now) == 0
+    assert bucket.try_take(1, 1.0, now) == pytest.approx(1.0, rel=0.01)
+
+def test_reduced_rate_shrinks_the_budget():
+    bucket = TokenBucket(per_minute=60)
+    now = time.monotonic()
+    assert bucket.try_take(30, 0.5, now) == 0
+    assert bucket.try_take(1, 0.5, now) > 0
+
+def test_rate_factor_recovers_after_successes():
+    limiter = AdaptiveRateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+    limiter.record_throttle()
+    assert limiter.rate_factor == 0.5
+    for _ in range(20):
+        limiter.record_success(10, 10)
+    assert limiter.rate_factor == 1.0
+
+def test_limiter_is_rebuilt_when_limits_change(llm):
+    limiter = rate_limiters.get(llm)
+    llm.requests_per_minute = 10
+    assert rate_limiters.get(llm) is not limiter
+
+def test_request_tokens_include_max_tokens():
+    assert estimate_request_tokens(REQUEST) == len("Be brief" + "Hello") // 4 + 1 + 100
@@ -0,0 +1,104 @@
+import uuid
+
+import pytest
+
+from app.models.llm import LLM
+from app.models.prompt import Prompt
+from app.utils.scoring import reference_scoring
+from app.utils.scoring.reference_scoring import reference_scores, rouge_1, rouge_l, score_responses, tokenize
+
+
+@pytest.fixture
+def echo_prompt(test_db):
+    llm = LLM(id=uuid.uuid4(), name="Claude", llm_model_id="anthropic.claude-v2")
+    prompt = Prompt(id=uuid.uuid4(), name="echo", prompt="Repeat", llm_id=llm.id)
+    test_db.add_all([llm, prompt])
+    test_db.commit()
+    return str(prompt.id)
+
+
+def test_rouge():
+    reference = tokenize("the cat sat on the mat")
+    candidate = tokenize("the cat lay on the mat")
+
+    assert rouge_1(reference, candidate) == pytest.approx(5 / 6)
+    assert rouge_l(reference, candidate) == pytest.approx(5 / 6)
+    assert rouge_l(reference, tokenize("mat the on")) == pytest.approx(2 * (2 / 3 * 2 / 6) / (2 / 3 + 2 / 6))
+    assert rouge_1(reference, []) == 0.0
+
+
+def test_score_responses_batches_and_caches(monkeypatch):
+    reference_scores.clear()
+    scored = []
+    original = reference_scoring.bleu
+    monkeypatch.setattr(reference_scoring, "bleu", lambda reference, candidate: scored.append(candidate) or original(reference, candidate))
+
+    responses = ["Paris is the capital.", "paris  is the CAPITAL.", "Paris is the capital.", None]
+    first = score_responses(responses, "Paris is the capital.", r"\bParis\b")
+    second = score_responses(responses, "Paris is the capital.", r"\bParis\b")
+
+    assert len(scored) == 2
+    assert first == second
+    assert [scores["exact_match"] for scores in first] == [True, True, True, None]
+    assert [scores["regex_match"] for scores in first] == [True, False, True, None]
+    assert first[0]["bleu"] == pytest.approx(1.0)
+    assert score_responses(["anything"], None, None) == [dict.fromkeys(reference_scoring.SCORE_COLUMNS)]
+
+
+def test_backtracking_pattern_times_out(monkeypatch):
+    monkeypatch.setattr(reference_scoring.settings, "EXPECTED_PATTERN_TIMEOUT_SECONDS", 0.01)
+    reference_scores.clear()
+
+    scores = score_responses(["a" * 5000 + "!", "aaa"], None, r"^(a|aa)+$")
+    assert [score["regex_match"] for score in scores] == [None, True]
+
+
+def test_scores_are_stored_with_results(client, echo_prompt, fake_bedrock):
+    response = client.post(
+        "/api/v1/test/text",
+        json={
+            "test_name": "graded",
+            "user_input": "Hello world",
+            "prompt_ids": [echo_prompt],
+            "expected_answer": "echo: hello world",
+            "expected_pattern": "^echo:",
+        },
+    )
+    assert response.status_code == 200
+
+    [result] = client.get(f"/api/v1/tests/{echo_prompt}").json()
+    assert result["expected_answer"] == "echo: hello world"
+    assert (result["exact_match"], result["regex_match"]) == (True, True)
+    assert result["bleu"] == pytest.approx(1.0)
+    assert (result["rouge_1"], result["rouge_l"]) == (1.0, 1.0)
+
+
+def test_changing_the_expected_answer_rescores_results(client, echo_prompt, fake_bedrock):
+    test_id = client.post(
+        "/api/v1/test/text",
+        json={"test_name": "regraded", "user_input": "Hello world", "prompt_ids": [echo_prompt]},
+    ).json()["id"]
+    [result] = client.get(f"/api/v1/tests/{echo_prompt}").json()
+    assert result["exact_match"] is None
+
+    response = client.put(f"/api/v1/tests/{test_id}", json={"expected_answer": "Goodbye world"})
+    assert response.status_code == 200
+
+    [result] = client.get(f"/api/v1/tests/{echo_prompt}").json()
+    assert result["exact_match"] is False
+    assert result["rouge_1"] == pytest.approx(_f1(1, 4, 2))
+    assert result["regex_match"] is None
+
+
+def _f1(overlap, candidate_length, reference_length):
+    precision, recall = overlap / candidate_length, overlap / reference_length
+    return 2 * precision * recall / (precision + recall)
+
+
+def test_invalid_expected_pattern(client, echo_prompt):
+    response = client.post(
+        "/api/v1/test/text",
+        json={"test_name": "bad", "user_input": "Hi", "prompt_ids": [echo_prompt], "expected_pattern": "("},
+    )
+    assert response.status_code == 400
+    assert "INVALID_EXPECTED_PATTERN" in str(response.json())
@@ -0,0 +1,88 @@
+import pytest
+import uuid
+from app.models.llm import LLM
+from app.models.prompt import Prompt
+from app.utils.llm.response_cache import response_cache, request_key, is_cache_enabled
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+@pytest.fixture
+def sample_llm(test_db):
+    llm = LLM(id=uuid.uuid4(), name="test-llm", llm_model_id="anthropic.claude-v2", aws_region="us-west-2")
+    test_db.add(llm)
+    test_db.commit()
+    return llm
+
+def conversation(llm_id, **overrides):
+    data = {"llm_id": str(llm_id), "user_input": "Hello", "prompt": "Be brief", "temperature": 0}
+    data.update(overrides)
+    return data
+
+def test_cache_enabled_by_default_only_for_zero_temperature():
+    assert is_cache_enabled(None, 0)
+    assert not is_cache_enabled(None, 0.7)
+    assert is_cache_enabled(True, 0.7)
+    assert not is_cache_enabled(False, 0)
+
+def test_request_key_changes_with_parameters():
+    request = {"modelId": "m", "inferenceConfig": {"temperature": 0, "topP": 0.1}}
+    changed = {"modelId": "m", "inferenceConfig": {"temperature": 0, "topP": 0.2}}
+    assert request_key(request) == request_key(dict(request))
+    assert request_key(request) != request_key(changed)
+
+def test_repeated_deterministic_call_is_served_from_cache(client, sample_llm, fake_bedrock):
+    llm_id = sample_llm.id
+    first = client.post("/api/v1/llm/converse", json=conversation(llm_id))
+    second = client.post("/api/v1/llm/converse", json=conversation(llm_id))
+
+    assert first.json()["cache_hit"] is False
+    assert second.json()["cache_hit"] is True
+    assert second.json()["response"]["output"] == first.json()["response"]["output"]
+    assert len(fake_bedrock.calls) == 1
+
+def test_cache_can_be_bypassed(client, sample_llm, fake_bedrock):
+    llm_id = sample_llm.id
+    client.post("/api/v1/llm/converse", json=conversation(llm_id))
+    response = client.post("/api/v1/llm/converse", json=conversation(llm_id, use_cache=False))
+
+    assert response.json()["cache_hit"] is False
+    assert len(fake_bedrock.calls) == 2
+
+def test_sampled_calls_are_not_cached_by_default(client, sample_llm, fake_bedrock):
+    llm_id = sample_llm.id
+    client.post("/api/v1/llm/converse", json=conversation(llm_id, temperature=0.7))
+    client.post("/api/v1/llm/converse", json=conversation(llm_id, temperature=0.7))
+    assert len(fake_bedrock.calls) == 2
+
+def test_persistent_tier_survives_process_cache_loss(client, sample_llm, fake_bedrock):
+    llm_id = sample_llm.id
+    client.post("/api/v1/llm/converse", json=conversation(llm_id))
+    response_cache.clear()
+
+    response = client.post("/api/v1/llm/converse", json=conversation(llm_id))
+    assert response.json()["cache_hit"] is True
+    assert len(fake_bedrock.calls) == 1
+
+def test_cache_hits_are_marked_on_test_results(client, test_db, sample_llm, fake_bedrock):
+    prompt = Prompt(id=uuid.uuid4(), name="Cached Prompt", prompt="Be brief", llm_id=sample_llm.id)
+    test_db.add(prompt)
+    test_db.commit()
+    prompt_id = str(prompt.id)
+
+    for name in ["First run", "Second run"]:
+        response = client.post(
+            "/api/v1/test/text",
+            json={"test_name": name, "user_input": "Hello", "prompt_ids": [prompt_id], "use_cache": True}
+        )
+        assert response.status_code == 200
+
+    results = {test["test_name"]: test for test in client.get(f"/api/v1/tests/{prompt_id}?include_response=true").json()}
+    assert results["First run"]["cache_hit"] is False
+    assert results["Second run"]["cache_hit"] is True
+    assert results["Second run"]["llm_response"] == results["First run"]["llm_response"]
+    assert len(fake_bedrock.calls) == 1
@@ -0,0 +1,110 @@
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.llm import LLM
+from app.models.prompt import Prompt
+from app.models.test import Test, test_prompt_association
+from app.utils.similarity.response_similarity import ResponseCorpus, compare_prompt_versions
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def template_versions(test_db):
+    """Three versions of a template answering the same inputs; v2 reworded one answer."""
+    template_id = uuid.uuid4()
+    llm = LLM(id=uuid.uuid4(), name="Claude")
+    versions = [
+        Prompt(id=uuid.uuid4(), name=f"v{version}", prompt="", version=version, llm_id=llm.id, prompt_template_id=template_id)
+        for version in (1, 2, 3)
+    ]
+    answers = {
+        "What is the capital of France?": ["Paris is the capital of France", "Paris is the capital of France", "Paris"],
+        "Name a primary colour": ["Red is a primary colour", "Blue is one of the primary colours", "Red"],
+        "Only asked of v1": ["Unmatched", None, None],
+    }
+    rows, tests = [], []
+    for user_input, responses in answers.items():
+        for prompt, response in zip(versions, responses):
+            if response is None:
+                continue
+            # Each version ran the input in its own test, as after update_prompt
+            test = Test(id=uuid.uuid4(), test_name=f"{prompt.name} {user_input}", user_input=user_input)
+            tests.append(test)
+            rows.append({
+                "test_id": test.id,
+                "prompt_id": prompt.id,
+                "llm_id": llm.id,
+                "creation_date": START + timedelta(minutes=len(rows)),
+                "llm_response": response,
+            })
+    test_db.add_all([llm, *versions, *tests])
+    test_db.flush()
+    test_db.execute(test_prompt_association.insert(), rows)
+    test_db.commit()
+    return str(template_id), [str(prompt.id) for prompt in versions]
+
+
+def test_corpus_pair_scores():
+    corpus = ResponseCorpus(["the cat sat", "the cat sat the", "a dog ran", "", ""])
+
+    scores = corpus.pair_scores(np.array([0, 0, 3]), np.array([1, 2, 4]))
+
+    assert scores["cosine"][0] == pytest.approx(0.9428, rel=1e-3)
+    assert scores["cosine"][1] == 0.0
+    assert scores["jaccard"].tolist() == [1.0, 0.0, 1.0]
+    assert scores["length_delta"].tolist() == pytest.approx([1 / 3, 0.0, 0.0])
+    assert scores["drift"][2] == 0.0
+
+
+def test_template_similarity_compares_every_pair(client, template_versions):
+    template_id, (v1, v2, v3) = template_versions
+
+    response = client.get(f"/api/v1/prompt-template/{template_id}/similarity")
+
+    assert response.status_code == 200
+    pairs = {(pair["left_prompt_id"], pair["right_prompt_id"]): pair for pair in response.json()}
+    assert set(pairs) == {(v1, v2), (v1, v3), (v2, v3)}
+    assert pairs[(v1, v2)]["count"] == 2
+    assert "inputs" not in pairs[(v1, v2)]
+    assert 0 < pairs[(v1, v2)]["drift_mean"] < pairs[(v1, v3)]["drift_mean"]
+    assert pairs[(v1, v3)]["length_delta_mean"] < 0
+
+
+def test_similarity_per_input_scores(client, template_versions):
+    template_id, (v1, v2, _) = template_versions
+
+    response = client.get(
+        f"/api/v1/prompt-template/{template_id}/similarity",
+        params={"prompt_ids": [v2, v1], "include_inputs": "true"},
+    )
+
+    [pair] = response.json()
+    assert (pair["left_prompt_id"], pair["right_prompt_id"]) == (v1, v2)
+    inputs = {item["user_input"]: item for item in pair["inputs"]}
+    assert inputs["What is the capital of France?"]["drift"] == pytest.approx(0.0, abs=1e-9)
+    assert inputs["Name a primary colour"]["drift"] > 0.5
+    assert inputs["Name a primary colour"]["left_test_id"] != inputs["Name a primary colour"]["right_test_id"]
+
+
+def test_similarity_needs_two_versions(client, template_versions):
+    template_id, (v1, _, _) = template_versions
+
+    response = client.get(f"/api/v1/prompt-template/{template_id}/similarity", params={"prompt_ids": [v1]})
+    assert response.status_code == 400
+    assert "NOT_ENOUGH_PROMPT_VERSIONS" in str(response.json())
+
+    response = client.get(f"/api/v1/prompt-template/{template_id}/similarity", params={"prompt_ids": ["nope"]})
+    assert response.status_code == 400
+    assert "INVALID_PROMPT_ID_FORMAT" in str(response.json())
+
+
+def test_versions_without_creation_date_are_ordered_first(test_db):
+    undated = Prompt(id=uuid.uuid4(), name="undated", prompt="", version=1, creation_date=None)
+    dated = Prompt(id=uuid.uuid4(), name="dated", prompt="", version=1, creation_date=START)
+
+    comparisons = compare_prompt_versions(test_db, [dated, undated])
+    assert [(row["left_prompt_id"], row["right_prompt_id"]) for row in comparisons] == [(undated.id, dated.id)]
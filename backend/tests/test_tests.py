@@ -244,3 +244,306 @@ def test_read_test_not_found(client):
     
 #     assert response.status_code == 200
 #     assert response.json()["message"] == "Test Image created successfully"
+
+def test_create_text_test_success(client, test_db, fake_bedrock):
+    from app.models.llm import LLM
+    from app.models.prompt import Prompt
+
+    llm = LLM(id=uuid.uuid4(), name="Test Claude", llm_model_id="anthropic.claude-v2", aws_region="us-east-1")
+    prompt = Prompt(id=uuid.uuid4(), name="Test Prompt", prompt="Test prompt", llm_id=llm.id)
+    test_db.add_all([llm, prompt])
+    test_db.commit()
+    prompt_id = str(prompt.id)
+
+    response = client.post(
+        "/api/v1/test/text",
+        json={
+            "test_name": "Test Case 1",
+            "user_input": "Sample user input",
+            "prompt_ids": [prompt_id]
+        }
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["test_name"] == "Test Case 1"
+    assert data["user_input"] == "Sample user input"
+
+    listed = client.get(f"/api/v1/tests/{prompt_id}?include_response=true").json()
+    assert listed[0]["llm_response"] == "echo: Sample user input"
+    assert listed[0]["total_tokens"] == 15
+
+def test_create_text_test_fans_out_concurrently(client, test_db, fake_bedrock):
+    import time
+    from app.models.llm import LLM
+    from app.models.prompt import Prompt
+
+    llm = LLM(id=uuid.uuid4(), name="Test Claude", llm_model_id="anthropic.claude-v2", aws_region="us-east-1")
+    prompts = [
+        Prompt(id=uuid.uuid4(), name=f"Prompt {i}", prompt=f"Prompt {i}", llm_id=llm.id)
+        for i in range(4)
+    ]
+    test_db.add_all([llm, *prompts])
+    test_db.commit()
+    prompt_ids = [str(prompt.id) for prompt in prompts]
+    fake_bedrock.delay = 0.2
+
+    start = time.monotonic()
+    response = client.post(
+        "/api/v1/test/text",
+        json={"test_name": "Fan out", "user_input": "Hi", "prompt_ids": prompt_ids}
+    )
+
+    assert response.status_code == 200
+    assert time.monotonic() - start < 0.6
+    assert len(fake_bedrock.calls) == 4
+    for prompt_id in prompt_ids:
+        assert len(client.get(f"/api/v1/tests/{prompt_id}").json()) == 1
+
+def test_create_streamed_text_test_records_ttft(client, test_db, fake_bedrock):
+    from app.models.llm import LLM
+    from app.models.prompt import Prompt
+
+    llm = LLM(id=uuid.uuid4(), name="Test Claude", llm_model_id="anthropic.claude-v2", aws_region="us-east-1")
+    prompt = Prompt(id=uuid.uuid4(), name="Test Prompt", prompt="Test prompt", llm_id=llm.id)
+    test_db.add_all([llm, prompt])
+    test_db.commit()
+    prompt_id = str(prompt.id)
+
+    response = client.post(
+        "/api/v1/test/text",
+        json={
+            "test_name": "Streamed",
+            "user_input": "Sample user input",
+            "prompt_ids": [prompt_id],
+            "stream": True
+        }
+    )
+    assert response.status_code == 200
+
+    listed = client.get(f"/api/v1/tests/{prompt_id}?include_response=true").json()
+    assert listed[0]["llm_response"] == "echo: Sample user input"
+    assert listed[0]["output_tokens"] == 5
+    assert listed[0]["time_to_first_token_ms"] is not None
+
+def _count_list_statements(client, test_db, prompt_id, query=""):
+    from sqlalchemy import event
+
+    statements = []
+    engine = test_db.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.get(f"/api/v1/tests/{prompt_id}{query}")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert response.status_code == 200
+    return response.json(), statements
+
+@pytest.mark.parametrize("test_count", [1, 25])
+def test_list_tests_runs_one_query(client, test_db, test_count):
+    from app.models.prompt import Prompt
+    from app.models.test import Test, test_prompt_association
+
+    prompt = Prompt(id=uuid.uuid4(), name="Listed", prompt="Listed prompt")
+    tests = [Test(id=uuid.uuid4(), test_name=f"Test {i}", user_input="Hi") for i in range(test_count)]
+    test_db.add_all([prompt, *tests])
+    test_db.flush()
+    test_db.execute(test_prompt_association.insert(), [
+        {"test_id": test.id, "prompt_id": prompt.id, "llm_response": f"Response {i}", "total_tokens": i}
+        for i, test in enumerate(tests)
+    ])
+    test_db.commit()
+    prompt_id = str(prompt.id)
+
+    listed, statements = _count_list_statements(client, test_db, prompt_id)
+    assert len(listed) == test_count
+    assert len(statements) == 1
+    assert "llm_response" not in statements[0]
+    assert {test["llm_response"] for test in listed} == {None}
+
+    listed, statements = _count_list_statements(client, test_db, prompt_id, "?include_response=true")
+    assert len(statements) == 1
+    assert sorted(test["llm_response"] for test in listed) == sorted(f"Response {i}" for i in range(test_count))
+
+def test_failed_prompt_is_recorded_with_its_error(client, test_db, fake_bedrock, monkeypatch):
+    from app.models.llm import LLM
+    from app.models.prompt import Prompt
+
+    llm = LLM(id=uuid.uuid4(), name="Test Claude", llm_model_id="anthropic.claude-v2", aws_region="us-east-1")
+    working = Prompt(id=uuid.uuid4(), name="Working", prompt="Works", llm_id=llm.id)
+    failing = Prompt(id=uuid.uuid4(), name="Failing", prompt="Fails", llm_id=llm.id)
+    test_db.add_all([llm, working, failing])
+    test_db.commit()
+    working_id, failing_id = str(working.id), str(failing.id)
+
+    converse = fake_bedrock.converse
+    def flaky_converse(**request):
+        if request["system"][0]["text"] == "Fails":
+            raise ValueError("model unavailable")
+        return converse(**request)
+    monkeypatch.setattr(fake_bedrock, "converse", flaky_converse)
+
+    response = client.post(
+        "/api/v1/test/text",
+        json={"test_name": "Partial", "user_input": "Hi", "prompt_ids": [working_id, failing_id]}
+    )
+    assert response.status_code == 200
+
+    failed = client.get(f"/api/v1/tests/{failing_id}").json()
+    assert failed[0]["error"] == "ValueError: model unavailable"
+    assert failed[0]["total_tokens"] is None
+    assert client.get(f"/api/v1/tests/{working_id}").json()[0]["error"] is None
+
+def test_test_fails_when_every_prompt_fails(client, test_db, fake_bedrock, monkeypatch):
+    from app.models.llm import LLM
+    from app.models.prompt import Prompt
+    from app.models.test import Test
+
+    llm = LLM(id=uuid.uuid4(), name="Test Claude", llm_model_id="anthropic.claude-v2", aws_region="us-east-1")
+    prompt = Prompt(id=uuid.uuid4(), name="Failing", prompt="Fails", llm_id=llm.id)
+    test_db.add_all([llm, prompt])
+    test_db.commit()
+    prompt_id = str(prompt.id)
+
+    def failing_converse(**request):
+        raise ValueError("model unavailable")
+    monkeypatch.setattr(fake_bedrock, "converse", failing_converse)
+
+    response = client.post(
+        "/api/v1/test/text",
+        json={"test_name": "Failed", "user_input": "Hi", "prompt_ids": [prompt_id]}
+    )
+    assert response.status_code == 500
+    assert test_db.query(Test).count() == 0
+
+def test_matrix_runs_prompts_on_each_llm(client, test_db, fake_bedrock):
+    from app.models.llm import LLM
+    from app.models.prompt import Prompt
+
+    own = LLM(id=uuid.uuid4(), name="Own", llm_model_id="anthropic.claude-v2", aws_region="us-east-1")
+    haiku = LLM(id=uuid.uuid4(), name="Haiku", llm_model_id="anthropic.claude-3-haiku", aws_region="us-west-2")
+    sonnet = LLM(id=uuid.uuid4(), name="Sonnet", llm_model_id="anthropic.claude-3-sonnet", aws_region="eu-west-1")
+    prompts = [Prompt(id=uuid.uuid4(), name=f"Matrix {i}", prompt=f"Prompt {i}", llm_id=own.id) for i in range(2)]
+    test_db.add_all([own, haiku, sonnet, *prompts])
+    test_db.commit()
+    prompt_ids = [str(prompt.id) for prompt in prompts]
+    haiku_id, sonnet_id = str(haiku.id), str(sonnet.id)
+    llm_ids = [sonnet_id, haiku_id]
+
+    response = client.post(
+        "/api/v1/test/matrix",
+        json={
+            "test_name": "Compare [v2]",
+            "user_input": "Hi",
+            "prompt_ids": prompt_ids,
+            "llm_ids": llm_ids,
+            "expected_answer": "echo: Hi",
+        }
+    )
+
+    assert response.status_code == 200
+    matrix = response.json()
+    assert matrix["test_name"] == "Compare [v2]"
+    assert [llm["name"] for llm in matrix["llms"]] == ["Haiku", "Sonnet"]
+    assert [row["prompt_id"] for row in matrix["rows"]] == prompt_ids
+    for row in matrix["rows"]:
+        assert [cell["llm_id"] for cell in row["cells"]] == [haiku_id, sonnet_id]
+        assert all(cell["exact_match"] for cell in row["cells"])
+    assert sorted(call["modelId"] for call in fake_bedrock.calls) == [
+        "anthropic.claude-3-haiku", "anthropic.claude-3-haiku",
+        "anthropic.claude-3-sonnet", "anthropic.claude-3-sonnet",
+    ]
+    assert client.get(f"/api/v1/test/matrix/{matrix['matrix_id']}").json() == matrix
+
+    listed = client.get(f"/api/v1/tests/{prompt_ids[0]}").json()
+    assert [test["test_name"] for test in listed] == ["Compare [v2]", "Compare [v2]"]
+    assert sorted(test["llm_id"] for test in listed) == sorted(llm_ids)
+
+def test_matrix_needs_known_llms(client, test_db):
+    from app.models.prompt import Prompt
+
+    prompt = Prompt(id=uuid.uuid4(), name="Matrix", prompt="Prompt")
+    test_db.add(prompt)
+    test_db.commit()
+    body = {"test_name": "Compare", "user_input": "Hi", "prompt_ids": [str(prompt.id)]}
+
+    response = client.post("/api/v1/test/matrix", json={**body, "llm_ids": []})
+    assert response.status_code == 400
+    assert response.json()["error_key"] == "INVALID_LLM_IDS"
+    response = client.post("/api/v1/test/matrix", json={**body, "llm_ids": [str(uuid.uuid4())]})
+    assert response.status_code == 404
+    assert client.get(f"/api/v1/test/matrix/{uuid.uuid4()}").status_code == 404
+
+def test_slow_pool_does_not_hold_up_others():
+    import asyncio
+    import time
+    from app.utils.llm.invoker import gather_bounded
+
+    finished = {}
+
+    async def call(pool, index, delay):
+        await asyncio.sleep(delay)
+        finished[(pool, index)] = time.monotonic()
+
+    async def run():
+        keys = ["slow"] * 3 + ["fast"] * 3
+        coroutines = [call("slow", i, 0.1) for i in range(3)] + [call("fast", i, 0.01) for i in range(3)]
+        await gather_bounded(coroutines, limit=1, keys=keys)
+
+    start = time.monotonic()
+    asyncio.run(run())
+    assert max(finished[("fast", i)] for i in range(3)) - start < 0.1
+    assert max(finished[("slow", i)] for i in range(3)) - start >= 0.3
+
+def test_sampled_test_stores_and_summarizes_every_sample(client, test_db, fake_bedrock, monkeypatch):
+    import itertools
+    from app.models.llm import LLM
+    from app.models.prompt import Prompt
+
+    llm = LLM(id=uuid.uuid4(), name="Test Claude", llm_model_id="anthropic.claude-v2", aws_region="us-east-1")
+    prompt = Prompt(id=uuid.uuid4(), name="Sampled", prompt="Sample me", llm_id=llm.id)
+    test_db.add_all([llm, prompt])
+    test_db.commit()
+    prompt_id = str(prompt.id)
+
+    latencies = itertools.cycle([100, 200, 300, 400])
+    converse = fake_bedrock.converse
+
+    def varying_converse(**request):
+        response = converse(**request)
+        response["metrics"]["latencyMs"] = next(latencies)
+        return response
+    monkeypatch.setattr(fake_bedrock, "converse", varying_converse)
+
+    response = client.post(
+        "/api/v1/test/text",
+        json={"test_name": "Sampled", "user_input": "Hi", "prompt_ids": [prompt_id], "samples": 4}
+    )
+    assert response.status_code == 200
+    test_id = response.json()["id"]
+    # Identical requests are sent one by one rather than coalesced or cached
+    assert len(fake_bedrock.calls) == 4
+    assert len(client.get(f"/api/v1/tests/{prompt_id}").json()) == 1
+
+    [summary] = client.get(f"/api/v1/test/{test_id}/samples").json()
+    assert (summary["prompt_id"], summary["samples"], summary["error_count"]) == (prompt_id, 4, 0)
+    assert summary["latency_ms_mean"] == 250
+    assert summary["latency_ms_stddev"] == pytest.approx(129.0994, rel=1e-4)
+    assert summary["latency_ms_p95"] == pytest.approx(385)
+    assert summary["latency_ms_ci95_low"] < 250 < summary["latency_ms_ci95_high"]
+    assert summary["total_tokens_variance"] == 0
+    assert (summary["distinct_responses"], summary["modal_response_share"]) == (1, 1.0)
+    assert summary["mean_pairwise_similarity"] == pytest.approx(1.0)
+
+def test_sample_count_is_bounded(client, monkeypatch):
+    from app.settings.settings import settings
+
+    monkeypatch.setattr(settings, "SAMPLE_MAX_COUNT", 5)
+    body = {"test_name": "Sampled", "user_input": "Hi", "prompt_ids": [str(uuid.uuid4())]}
+    response = client.post("/api/v1/test/text", json={**body, "samples": 6})
+    assert response.status_code == 400
+    assert response.json()["error_key"] == "INVALID_SAMPLE_COUNT"
+    response = client.post("/api/v1/test/text/jobs", json={**body, "samples": 3})
+    assert response.status_code == 400
+    assert response.json()["error_key"] == "SAMPLING_NOT_QUEUEABLE"
@@ -0,0 +1,145 @@
+import pytest
+import gpt3_tokenizer
+from app.utils.tokenizer import tokenizer as tokenizer_module
+from app.utils.tokenizer.backends import GPT3Tokenizer, HuggingFaceTokenizer, TiktokenTokenizer
+from app.utils.tokenizer.tokenizer import (
+    DEFAULT_FAMILY,
+    TokenizerRegistry,
+    count_tokens,
+    count_tokens_batch,
+    model_family,
+    token_counts,
+    tokenizers,
+)
+
+
+class RecordingTokenizer(GPT3Tokenizer):
+    def __init__(self):
+        self.batches = []
+
+    def count_batch(self, texts):
+        self.batches.append(list(texts))
+        return super().count_batch(texts)
+
+
+@pytest.fixture
+def recording_tokenizer(monkeypatch):
+    backend = RecordingTokenizer()
+    monkeypatch.setattr(tokenizers, "get", lambda family: backend)
+    token_counts.clear()
+    yield backend
+    token_counts.clear()
+
+
+@pytest.mark.parametrize("llm_model_id, family", [
+    ("anthropic.claude-3-haiku-20240307-v1:0", "anthropic"),
+    ("us.anthropic.claude-3-5-sonnet-20240620-v1:0", "anthropic"),
+    ("amazon.titan-text-express-v1", "amazon"),
+    ("meta.llama3-8b-instruct-v1:0", "meta"),
+    ("eu.meta.llama3-2-1b-instruct-v1:0", "meta"),
+    ("mistral.mistral-7b-instruct-v0:2", "mistral"),
+    ("some-custom-model", "default"),
+    (None, "default"),
+])
+def test_model_family(llm_model_id, family):
+    assert model_family(llm_model_id) == family
+
+
+def test_batch_counts_in_one_backend_call(recording_tokenizer):
+    texts = ["Hello world", "", "A longer sentence to count.", "Hello world"]
+
+    counts = count_tokens_batch(texts, "meta.llama3-8b-instruct-v1:0")
+
+    assert counts == [gpt3_tokenizer.count_tokens(text) if text else 0 for text in texts]
+    assert recording_tokenizer.batches == [["Hello world", "A longer sentence to count."]]
+
+
+def test_counts_are_memoized_per_family(recording_tokenizer):
+    count_tokens("Same text", "anthropic.claude-v2")
+    count_tokens("Same text", "anthropic.claude-3-haiku")
+    count_tokens("Same text", "meta.llama3-8b-instruct-v1:0")
+
+    assert recording_tokenizer.batches == [["Same text"], ["Same text"]]
+
+
+def test_registry_falls_back_when_vocabulary_is_unavailable(monkeypatch):
+    def unavailable(self):
+        raise OSError("no vocabulary")
+
+    monkeypatch.setattr(HuggingFaceTokenizer, "load", unavailable)
+    monkeypatch.setattr(TiktokenTokenizer, "load", unavailable)
+
+    registry = TokenizerRegistry()
+    assert registry.get("anthropic") is None
+    assert isinstance(registry.get(DEFAULT_FAMILY), GPT3Tokenizer)
+
+
+def test_families_without_a_tokenizer_have_no_counts(tmp_path, monkeypatch):
+    monkeypatch.setattr(tokenizer_module.settings, "TOKENIZER_DIR", str(tmp_path))
+    monkeypatch.setattr(tokenizer_module, "tokenizers", TokenizerRegistry())
+
+    assert count_tokens_batch(["Hello", ""], "meta.llama3-8b-instruct-v1:0") == [None, 0]
+
+
+def test_registry_loads_each_family_once(monkeypatch):
+    loads = []
+    monkeypatch.setattr(
+        tokenizer_module, "_candidates", lambda family: loads.append(family) or [GPT3Tokenizer()]
+    )
+    registry = TokenizerRegistry()
+
+    first = registry.get("meta")
+    assert registry.get("meta") is first
+    assert loads == ["meta"]
+
+
+def test_local_vocabulary_takes_precedence(tmp_path, monkeypatch):
+    tokenizers_lib = pytest.importorskip("tokenizers")
+    from tokenizers.models import WordLevel
+    from tokenizers.pre_tokenizers import Whitespace
+
+    vocabulary = tokenizers_lib.Tokenizer(WordLevel({"[UNK]": 0, "hello": 1}, unk_token="[UNK]"))
+    vocabulary.pre_tokenizer = Whitespace()
+    vocabulary.save(str(tmp_path / "amazon.json"))
+    monkeypatch.setattr(tokenizer_module.settings, "TOKENIZER_DIR", str(tmp_path))
+
+    backend = TokenizerRegistry().get("amazon")
+
+    assert isinstance(backend, HuggingFaceTokenizer)
+    assert backend.count_batch(["hello hello there", ""]) == [3, 0]
+
+
+def test_slow_family_load_does_not_block_other_families(monkeypatch):
+    import threading
+
+    loading = threading.Event()
+    release = threading.Event()
+
+    class SlowTokenizer(GPT3Tokenizer):
+        def load(self):
+            loading.set()
+            release.wait(5)
+
+    monkeypatch.setattr(
+        tokenizer_module, "_candidates",
+        lambda family: [SlowTokenizer()] if family == "amazon" else [GPT3Tokenizer()],
+    )
+    registry = TokenizerRegistry()
+    slow = threading.Thread(target=registry.get, args=("amazon",))
+    slow.start()
+    try:
+        assert loading.wait(5)
+        assert isinstance(registry.get("meta"), GPT3Tokenizer)
+    finally:
+        release.set()
+        slow.join()
+
+
+def test_preload_loads_every_family(monkeypatch):
+    loads = []
+    monkeypatch.setattr(
+        tokenizer_module, "_candidates", lambda family: loads.append(family) or [GPT3Tokenizer()]
+    )
+    TokenizerRegistry().preload()
+
+    assert sorted(loads) == sorted([*tokenizer_module.MODEL_FAMILIES, "default"])
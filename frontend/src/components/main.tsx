@@ -10,6 +10,7 @@ import Navbar from "./shared/navbar/navbar";
 import Settings from "./shared/settings/settings";
 import { toast } from "react-toastify";
 import { API_BASE_URL } from "../config";
+import { fetchAllPages } from "../utils/pagination";
 
 interface Project {
   id: number;
@@ -35,8 +36,7 @@ function Projects() {
 
   const fetchProjects = async () => {
     try {
-      const response = await axios.get<Project[]>(`${API_BASE_URL}/projects`);
-      setProjects(response.data);
+      setProjects(await fetchAllPages<Project>(`${API_BASE_URL}/projects`));
     } catch (error: any) {
       toast.error(error?.response?.data?.message);
     }
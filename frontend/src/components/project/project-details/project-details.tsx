@@ -9,6 +9,7 @@ import ConfirmationPopup from "../../shared/delete-confirmation/delete-confirmat
 import CreatePromptTemplatePopup from "../../prompt/create-prompt-template-popup/create-prompt-template-popup";
 import { toast } from "react-toastify";
 import { API_BASE_URL } from "../../../config";
+import { fetchAllPages } from "../../../utils/pagination";
 import { ChevronUp, ChevronDown, Terminal, SquareFunction, Edit, Trash2 } from "lucide-react";
 
 interface IPromptTemplate {
@@ -65,10 +66,10 @@ function ProjectDetails() {
 
   const fetchProjectPrompts = useCallback(async () => {
     try {
-      const response: any = await axios.get(
+      const templates = await fetchAllPages<IPromptTemplate>(
         `${API_BASE_URL}/prompt-templates/${projectId}`
       );
-      setPromptTemplates(response.data.reverse());
+      setPromptTemplates(templates.reverse());
     } catch (error: any) {
       toast.error(
         error?.response?.data?.message || "Failed to fetch prompt templates"
@@ -3,6 +3,7 @@ import axios from "axios";
 import styles from "./create-prompt-popup.module.css";
 import { toast } from "react-toastify";
 import { API_BASE_URL } from "../../../config";
+import { fetchAllPages } from "../../../utils/pagination";
 import { encode } from 'gpt-tokenizer'
 
 interface Prompt {
@@ -55,8 +56,7 @@ function CreatePromptPopup({
   useEffect(() => {
     const fetchLLMs = async () => {
       try {
-        const response = await axios.get<LLM[]>(`${API_BASE_URL}/llms`);
-        setAvailableLLMs(response.data);
+        setAvailableLLMs(await fetchAllPages<LLM>(`${API_BASE_URL}/llms`));
       } catch (error: any) {
         toast.error(error?.response?.data?.message);
       }
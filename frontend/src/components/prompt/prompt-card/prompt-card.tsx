@@ -4,6 +4,7 @@ import styles from "./prompt-card.module.css";
 import CreateTestPopup from "../../test/create-test-popup/create-test-popup";
 import axios from "axios";
 import { API_BASE_URL } from "../../../config";
+import { fetchAllPages } from "../../../utils/pagination";
 import ConfirmationPopup from "../../shared/delete-confirmation/delete-confirmation";
 import { toast } from "react-toastify";
 interface Prompt {
@@ -39,7 +40,7 @@ interface Test {
   latency_ms: string | null;
   prompt_tokens: string | null;
   user_input_tokens: string | null;
-  image: string | null;
+  image_url: string | null;
 }
 
 const PromptCard: React.FC<PromptCardProps> = ({
@@ -69,10 +70,11 @@ const PromptCard: React.FC<PromptCardProps> = ({
 
   const fetchTests = async () => {
     try {
-      const response = await axios.get<Test[]>(
-        `${API_BASE_URL}/tests/${prompt.id}`
+      setTests(
+        await fetchAllPages<Test>(
+          `${API_BASE_URL}/tests/${prompt.id}?include_response=true`
+        )
       );
-      setTests(response.data);
     } catch (error) {
       toast.error('Failed to fetch tests');
     }
@@ -174,7 +176,7 @@ const PromptCard: React.FC<PromptCardProps> = ({
               <div className={styles.testItem} key={test.id}>
                 <div className={styles.header}>
                   <span className={styles.title}>{test.test_name}</span>
-                  {test.image ? (
+                  {test.image_url ? (
                     <div />
                   ) : (
                     <span className={styles.title}>User Input:</span>
@@ -187,14 +189,14 @@ const PromptCard: React.FC<PromptCardProps> = ({
                   </div>
                 </div>
 
-                {test.image ? (
+                {test.image_url ? (
                   <div>
                     <div
                       className={styles.imageContainer}
                       style={{ display: showImage ? "block" : "none" }}
                     >
                       <img
-                        src={`data:image/png;base64,${test.image}`}
+                        src={test.image_url}
                         alt="Test Visual Representation"
                         className={styles.testImage}
                       />
@@ -255,7 +257,7 @@ const PromptCard: React.FC<PromptCardProps> = ({
                   <div className={styles.metricItem}>
                     <span>Prompt Tokens:</span> {test.prompt_tokens}
                   </div>
-                  {test.image ? (
+                  {test.image_url ? (
                     <div />
                   ) : (
                     <div className={styles.metricItem}>
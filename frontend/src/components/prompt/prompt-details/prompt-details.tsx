@@ -3,6 +3,7 @@ import styles from "./prompt-details.module.css";
 import Navbar from "../../shared/navbar/navbar";
 import Settings from "../../shared/settings/settings";
 import { API_BASE_URL } from "../../../config";
+import { fetchAllPages } from "../../../utils/pagination";
 import CreatePromptPopup from "../create-prompt-popup/create-prompt-popup";
 import axios from "axios";
 import { toast } from "react-toastify";
@@ -64,14 +65,9 @@ const PromptDetails: React.FC = () => {
 
   const fetchPrompts = async () => {
     try {
-      const response = await fetch(
+      const data = await fetchAllPages<IPrompt>(
         `${API_BASE_URL}/prompts/${ids?.promptTemplateId}`
       );
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-
-      const data = await response.json();
       setPrompts(data.reverse());
     } catch (error) {
       toast.error('Failed to fetch prompts');
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import { toast } from 'react-toastify';
 import { API_BASE_URL } from '../../../config';
+import { fetchAllPages } from '../../../utils/pagination';
 import styles from './settings.module.css';
 import { Edit2, Trash2 } from "lucide-react";
 
@@ -28,8 +29,7 @@ const LLMList: React.FC = () => {
 
   const fetchLLMs = async () => {
     try {
-      const response = await axios.get<LLM[]>(`${API_BASE_URL}/llms`);
-      setLLMs(response.data);
+      setLLMs(await fetchAllPages<LLM>(`${API_BASE_URL}/llms`));
       setLoading(false);
     } catch (error: any) {
       toast.error(error?.response?.data?.message);
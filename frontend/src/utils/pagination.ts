@@ -0,0 +1,19 @@
+import axios from "axios";
+
+// List endpoints return one page at a time, with the next page's cursor in
+// this header; it is absent on the last page
+const NEXT_CURSOR_HEADER = "x-next-cursor";
+
+export const fetchAllPages = async <T>(url: string): Promise<T[]> => {
+  const items: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const response = await axios.get<T[]>(url, {
+      params: cursor ? { cursor } : undefined,
+    });
+    items.push(...response.data);
+    const next = response.headers[NEXT_CURSOR_HEADER];
+    cursor = typeof next === "string" && next ? next : undefined;
+  } while (cursor);
+  return items;
+};